@@ -1,15 +1,30 @@
-import os, sys
-from PySide6.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QWidget, QLabel, QDialog, QCalendarWidget, QFormLayout, QLineEdit, QGridLayout, QFrame
-from PySide6.QtCore import QDate, Qt, QDateTime, QPointF
-from PySide6.QtCharts import QChart, QChartView, QLineSeries, QValueAxis, QDateTimeAxis
-from PySide6.QtGui import QPainter, QFont, QRegularExpressionValidator
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar
-from matplotlib.dates import DateFormatter
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+import os, sys, time
+startTime = time.perf_counter()
+
+# "--profile" (timings) or "--profile=cprofile" turn on src/profiling.py, before the src modules are imported,
+# "--verbose" (or OT_DEBUG=1) turns on the debug log
+for arg in list(sys.argv[1:]):
+    if arg == "--profile" or arg.startswith("--profile="):
+        os.environ["OT_PROFILE"] = arg.partition("=")[2] or "1"
+        sys.argv.remove(arg)
+    elif arg == "--verbose":
+        os.environ["OT_DEBUG"] = "1"  # The debug log, e.g. the memory report of the view cache
+        sys.argv.remove(arg)
+
+import logging
+import tracemalloc
+from PySide6.QtWidgets import QApplication, QMainWindow, QPushButton, QVBoxLayout, QWidget, QLabel, QDialog, QCalendarWidget, QFormLayout, QLineEdit, QGridLayout, QFrame, QMessageBox
+from PySide6.QtCore import QDate, Qt, QTimer, Signal
+from PySide6.QtGui import QFont, QKeySequence, QRegularExpressionValidator, QShortcut
+from src.history import OTHistory
 from src.json_func import OTDStorage
+from src.profiling import instrument
 from src.sdtime import SDTime
+from src.workers import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+# The graph dialogs (and with them matplotlib and QtCharts) are imported the first time a graph is opened
 
 jsonFileName = "ot.json"
 otdStorage = OTDStorage(jsonFileName)
@@ -45,7 +60,14 @@ class OTCalculator(QDialog):
                 return
 
             actualLunchLength = sdt.diffTime(riceTime, lunchEnd)
-            totalActualLength = sdt.diffTime(backTime, workEnd)
+            totalActualLength = sdt.diffTime(backTime, workEnd, overnight=True)  # Leaving before arriving means leaving after midnight
+
+            if actualLunchLength < 0:
+                # The lunch cannot end before it starts, so the input is not valid yet
+                for label in (actualWorkLengthLabel, actualLunchLengthLabel, totalActualLengthLabel, otLengthLabel):
+                    label.setText("--- 分鐘")
+                return
+
             actualWorkLength = totalActualLength - actualLunchLength
 
             # Update the labels with the calculated values
@@ -53,7 +75,7 @@ class OTCalculator(QDialog):
             actualLunchLengthLabel.setText(f"{actualLunchLength} 分鐘")
             totalActualLengthLabel.setText(f"{totalActualLength} 分鐘")
 
-            ot = totalActualLength - sdt.diffTime(otdStorage.workhour_start, otdStorage.workhour_end)
+            ot = totalActualLength - sdt.diffTime(otdStorage.workhour_start, otdStorage.workhour_end, overnight=True)
 
             otLengthLabel.setText(f"{ot} 分鐘" if isinstance(ot, int) else "--- 分鐘")
 
@@ -126,9 +148,9 @@ class OTCalculator(QDialog):
         buttomLayout.addWidget(QLabel("<b>正常午餐時間:</b>"), 1, 0, 1, 1)
         buttomLayout.addWidget(QLabel("<b>總在校時間:</b>"), 2, 0, 1, 1)
 
-        normalWorkLengthLabel = QLabel(f"{sdt.diffTime(otdStorage.workhour_start, otdStorage.workhour_end) - 60} 分鐘")
-        normalLunchLengthLabel = QLabel(f"{sdt.diffTime(otdStorage.workhour_lunch_start, otdStorage.workhour_lunch_end)} 分鐘")
-        totalTimeLengthLabel = QLabel(f"{sdt.diffTime(otdStorage.workhour_start, otdStorage.workhour_end)} 分鐘")
+        normalWorkLengthLabel = QLabel(f"{sdt.diffTime(otdStorage.workhour_start, otdStorage.workhour_end, overnight=True) - 60} 分鐘")
+        normalLunchLengthLabel = QLabel(f"{sdt.diffTime(otdStorage.workhour_lunch_start, otdStorage.workhour_lunch_end, overnight=True)} 分鐘")
+        totalTimeLengthLabel = QLabel(f"{sdt.diffTime(otdStorage.workhour_start, otdStorage.workhour_end, overnight=True)} 分鐘")
         normalWorkLengthLabel.setAlignment(Qt.AlignLeft)
         normalLunchLengthLabel.setAlignment(Qt.AlignLeft)
         totalTimeLengthLabel.setAlignment(Qt.AlignLeft)
@@ -226,14 +248,22 @@ class OTRecordDialog(QDialog):
         """
         # Convert the date to a string
         date_str = date.toString("yyyy-MM-dd")
-        # Convert the length to a number
+        # Convert the length to a number, the storage checks the date and the amount
         try:
-            otdStorage.newEntry(date_str, int(length), reason, by)
+            amount = int(length)
         except ValueError:
+            error = "OT時長必須是一個有效的數字！請重新輸入。"
+        else:
+            try:
+                otdStorage.newEntry(date_str, amount, reason, by)
+                error = None
+            except ValueError as e:
+                error = f"OT記錄無效：{e}\n請重新輸入。"
+        if error is not None:
             error_dialog = QDialog(self)
             error_dialog.setWindowTitle("輸入錯誤")
             error_layout = QVBoxLayout()
-            error_layout.addWidget(QLabel("OT時長必須是一個有效的數字！請重新輸入。"))
+            error_layout.addWidget(QLabel(error))
             close_button = QPushButton("關閉")
             close_button.clicked.connect(error_dialog.close)
             error_layout.addWidget(close_button)
@@ -265,140 +295,80 @@ class OTRecordDialog(QDialog):
         recorded_dialog.setLayout(recorded_layout)
         recorded_dialog.exec()
 
-class PlotDialog(QDialog):
-    """
-    A dialog to display a plot of the OT records using matplotlib.
+class ViewCache:
     """
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("OT 記錄圖表")
-        self.setMinimumSize(960, 640)  # Set minimum size for the dialog
-
-        # Create a layout for the dialog
-        layout = QVBoxLayout()
-        
-        # Set the font for matplotlib
-        plt.rcParams['font.family'] = 'Microsoft JhengHei'
-        plt.rcParams['font.size'] = 10.5
-
-        # Create a figure and canvas for matplotlib
-        self.figure, self.ax = plt.subplots()
-        self.canvas = FigureCanvas(self.figure)
-        # Create a toolbar for navigation
-        self.toolbar = NavigationToolbar(self.canvas, self)
-
-        layout.addWidget(self.toolbar)
-        layout.addWidget(self.canvas)
-
-        # Set the layout for the dialog
-        self.setLayout(layout)
-
-    def plot(self, data):
-
-        # Prepare data for the graph
-        dates = [QDateTime.fromString(entry['date'], "yyyy-MM-dd").toPython() for entry in data]
-        lengths = [entry['amount'] for entry in data]
-
-        # Create the plot
-        self.ax.plot(dates, lengths, marker='o', linestyle='-', color='b', label='OT 時長')
-
-        # Format the x-axis
-        self.ax.xaxis.set_major_formatter(DateFormatter("%Y-%m-%d"))
-        self.ax.xaxis.set_major_locator(mdates.DayLocator(interval=1))
-        plt.xticks(rotation=45)
-
-        # Add labels and title
-        self.ax.set_title("OT 時間記錄", fontsize=16)
-        self.ax.set_xlabel("日期", fontsize=12)
-        self.ax.set_ylabel("OT 時長 (分鐘)", fontsize=12)
-        self.ax.legend()
-
-        # Add labels to each data point
-        for i, (date, length) in enumerate(zip(dates, lengths)):
-            self.ax.text(date, length + 1, f"{length}", fontsize=9, ha='center', va='bottom', color='black')
-
-        # Enable snapping to data points and showing labels
-        def on_hover(event):
-            if event.inaxes == self.ax:
-            # Find the closest data point
-                closest_index = min(range(len(dates)), key=lambda i: abs(mdates.date2num(dates[i]) - event.xdata))
-                closest_date = dates[closest_index]
-                closest_length = lengths[closest_index]
-
-                # Update the cursor position and label
-                cursor.set_data([closest_date], [closest_length])
-                label.set_position((event.xdata, event.ydata))
-                label.set_text(f"{closest_date.strftime('%Y-%m-%d')}\n{closest_length} mins")
-                label.set_visible(True)
-                self.figure.canvas.draw_idle()
-            else:
-                label.set_visible(False)
-                self.figure.canvas.draw_idle()
-
-        # Add a cursor and label for snapping
-        cursor, = self.ax.plot([], [], 'ro')  # Red dot for the cursor
-        label = self.ax.text(0, 0, "", fontsize=9, color="red", ha="center", va="bottom", visible=False)
-
-        # Connect the hover event
-        # self.figure.canvas.mpl_connect("motion_notify_event", on_hover)
+    A cache of the matplotlib dialogs.
 
-        # Add grid for better readability
-        self.ax.grid(True, linestyle='--', alpha=0.6)
-
-        plt.tight_layout()
-
-class HistogramDialog(QDialog):
+    The dialogs (with their figures and canvases) are created once and reused when they are opened again,
+    and they are only re-rendered when the data version of the storage has changed since the last render.
+    With a WorkerPool, the dialogs that have a prepare step run it on a worker thread and are drawn when it is done.
     """
-    A dialog to display a histogram of the OT records using matplotlib.
-    """
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("OT 記錄 Histogram")
-        self.setMinimumSize(960, 640)  # Set minimum size for the dialog
-
-        # Create a layout for the dialog
-        layout = QVBoxLayout()
-        
-        # Set the font for matplotlib
-        plt.rcParams['font.family'] = 'Microsoft JhengHei'
-        plt.rcParams['font.size'] = 10.5
-
-        # Create a figure and canvas for matplotlib
-        self.figure, self.ax = plt.subplots()
-        self.canvas = FigureCanvas(self.figure)
-        # Create a toolbar for navigation
-        self.toolbar = NavigationToolbar(self.canvas, self)
-
-        layout.addWidget(self.toolbar)
-        layout.addWidget(self.canvas)
-
-        # Set the layout for the dialog
-        self.setLayout(layout)
-
-    def plot(self, data):
+    def __init__(self, storage, reportEvery: int = 10, workers: WorkerPool = None):
+        self.storage = storage
+        self.reportEvery = reportEvery
+        self.workers = workers
+        self.views = {}  # kind -> (dialog, rendered data version)
+        self.pending = {}  # kind -> worker preparing the data of the dialog
+        self.openings = 0
+        self.renders = 0
+
+    def open(self, kind: str, factory, parent, data) -> QDialog:
         """
-        Plot the histogram of the OT records.
+        Get the dialog of a kind, creating it with factory(parent) if needed and plotting data if it is outdated.
         """
-        # Prepare data for the histogram
-        lengths = [entry['amount'] for entry in data]
-
-        # Create the histogram
-        self.ax.hist(lengths, bins=30, color='blue', alpha=0.7, edgecolor='black')
-
-        # Add labels and title
-        self.ax.set_title("OT 時間 Histogram", fontsize=16)
-        self.ax.set_xlabel("OT 時長 (分鐘)", fontsize=12)
-        self.ax.set_ylabel("次數", fontsize=12)
+        self.openings += 1
+        dialog, version = self.views.get(kind, (None, None))
+        if dialog is None:
+            dialog = factory(parent)
+        if version != self.storage.version:
+            if self.workers is not None and hasattr(dialog, "prepare"):
+                # Only the latest data is drawn, an older preparation still running is cancelled
+                if kind in self.pending:
+                    self.pending.pop(kind).cancel()
+                self.pending[kind] = self.workers.start(dialog.prepare, data, onResult=dialog.render)
+            else:
+                dialog.plot(data)
+            self.renders += 1
+        self.views[kind] = (dialog, self.storage.version)
 
-        # Add grid for better readability
-        self.ax.grid(True, linestyle='--', alpha=0.6)
+        if self.openings % self.reportEvery == 0 and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("View cache: %s", self.memoryReport())
+        return dialog
 
-        plt.tight_layout()
-        # self.canvas.draw()  # Draw the canvas to display the histogram
+    def release(self):
+        """
+        Close the cached dialogs and free their figures.
+        """
+        for worker in self.pending.values():
+            worker.cancel()
+        self.pending.clear()
+        for dialog, _ in self.views.values():
+            dialog.figure.clear()
+            dialog.close()
+            dialog.deleteLater()
+        self.views.clear()
+
+    def memoryReport(self) -> dict:
+        """
+        Report the number of openings and renders, the cached figures and the memory in use.
+        The memory is only known when tracemalloc is tracing (e.g. started with "python -X tracemalloc app.py").
+        """
+        report = {
+            "openings": self.openings,
+            "renders": self.renders,
+            "cached_figures": len(self.views),
+            "pyplot_figures": len(sys.modules["matplotlib.pyplot"].get_fignums()) if "matplotlib.pyplot" in sys.modules else 0,
+            "artists": sum(len(dialog.figure.findobj()) for dialog, _ in self.views.values()),
+        }
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            report["memory_kib"] = current // 1024
+            report["peak_memory_kib"] = peak // 1024
+        return report
 
 class OTGUI(QMainWindow):
+    dataLoaded = Signal()
+
     def __init__(self):
         super().__init__()
 
@@ -421,10 +391,12 @@ class OTGUI(QMainWindow):
         button2 = QPushButton("按我查看OT記錄(Graph)")
         button3 =  QPushButton("按我查看OT記錄(統計)")
         button4 = QPushButton("按我查看OT記錄(Histogram)")
+        button5 = QPushButton("按我查看OT記錄(列表)")
         layout.addWidget(button)
         layout.addWidget(button2)
         layout.addWidget(button3)
         layout.addWidget(button4)
+        layout.addWidget(button5)
         # Set the layout to a central widget
         container = QWidget()
         container.setLayout(layout)
@@ -435,34 +407,111 @@ class OTGUI(QMainWindow):
         button2.clicked.connect(self.showOTGraphMatPlot)
         button3.clicked.connect(self.showOTStats)
         button4.clicked.connect(self.showHistogram)
+        button5.clicked.connect(self.showEntries)
+
+        # The buttons are enabled once the data is loaded (see loadData)
+        self.buttons = [button, button2, button3, button4, button5]
+        for b in self.buttons:
+            b.setEnabled(False)
+
+        # Undo and redo the changes of the entries (recorded once the data is loaded)
+        QShortcut(QKeySequence.Undo, self, self.undo)
+        QShortcut(QKeySequence.Redo, self, self.redo)
+
+        # Loading, statistics and graph data run on the workers, the saves run one after another on their own thread
+        self.workers = WorkerPool()
+        self.saves = WorkerPool(maxThreads=1)
+        self.viewCache = ViewCache(otdStorage, workers=self.workers)
+
+        # The search index (once the entries dialog has loaded it) is saved shortly after entries are added
+        self.indexTimer = QTimer(self)
+        self.indexTimer.setSingleShot(True)
+        self.indexTimer.setInterval(2000)
+        self.indexTimer.timeout.connect(otdStorage.saveSearchIndex)
+
+    @instrument
+    def loadData(self):
+        """
+        Load the JSON file on a worker thread, after the window is shown, and enable the buttons when it is loaded.
+        """
+        def load():
+            otdStorage.loadJson()
+            otdStorage.histogram  # Build the histogram here rather than when it is first opened
+
+        def loaded(result):
+            otdStorage.saver = self.saves.start  # Save in the background from now on
+            OTHistory(otdStorage)  # Record the changes from now on, for undo and redo
+            otdStorage.addListener(lambda entries: self.indexTimer.start())
+            for b in self.buttons:
+                b.setEnabled(True)
+            self.dataLoaded.emit()
+
+        def failed(error):
+            # The buttons stay disabled, the entries of the file are not known
+            message = f"無法載入 {otdStorage.filename}：{error}"
+            self.statusBar().showMessage(message)
+            QMessageBox.critical(self, "載入錯誤", message)
+
+        self.workers.start(load, onResult=loaded, onError=failed)
+
+    @instrument
+    def undo(self):
+        """
+        Undo the last change of the entries, the result is shown in the status bar.
+        The entries removed by an undo come back with the next sync if another copy has them (see src/history.py).
+        """
+        if otdStorage.history is not None and otdStorage.history.undo():
+            self.statusBar().showMessage(f"已復原上一次更改，共 {otdStorage.total} 項OT記錄", 5000)
+        else:
+            self.statusBar().showMessage("沒有可以復原的更改", 5000)
 
+    @instrument
+    def redo(self):
+        """
+        Redo the last undone change of the entries, the result is shown in the status bar.
+        """
+        if otdStorage.history is not None and otdStorage.history.redo():
+            self.statusBar().showMessage(f"已重做上一次復原的更改，共 {otdStorage.total} 項OT記錄", 5000)
+        else:
+            self.statusBar().showMessage("沒有可以重做的更改", 5000)
+
+    def closeEvent(self, event):
+        self.workers.cancelAll()
+        self.viewCache.release()  # Free the cached figures
+        self.saves.waitForDone()  # Do not lose the last entries
+        self.indexTimer.stop()
+        otdStorage.saveSearchIndex()
+        return super().closeEvent(event)
+
+    @instrument
     def showHistogram(self):
         """
         Display a histogram of the OT records using matplotlib.
         """
-        histogram_dialog = HistogramDialog(self)
-        data = otdStorage.entries  # Assuming this returns a list of dicts with 'date' and 'length'
-        data.sort(key=lambda entry: QDateTime.fromString(entry['date'], "yyyy-MM-dd").toSecsSinceEpoch())
-        histogram_dialog.plot(data)  # Plot the data
+        from src.plot_dialogs import HistogramDialog
+        histogram_dialog = self.viewCache.open("histogram", HistogramDialog, self, otdStorage.histogram)  # Plot the data if it changed
         histogram_dialog.show()  # Show the dialog
 
+    @instrument
+    def showEntries(self):
+        """
+        Display the entries in a table that can be filtered and sorted, the rows are read as they are scrolled to.
+        """
+        from src.entries_view import EntriesDialog
+        dialog = EntriesDialog(otdStorage, self.workers, self)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.show()
+
+    @instrument
     def showOTGraphMatPlot(self):
         """
         Display a time-based graph showing the amount of OT recorded.
         """
-        # Create a new dialog for the plot
-        plot_dialog = PlotDialog(self)
-        
-        # Retrieve data from storage
-        data = otdStorage.entries
+        # Retrieve data from storage (already sorted by date), copied as it is prepared on a worker thread
+        data = list(otdStorage.entries)
 
-        # Sort the entries by date
-        data.sort(key=lambda entry: QDateTime.fromString(entry['date'], "yyyy-MM-dd").toSecsSinceEpoch())
-
-        # Save the sorted entries back to the JSON file
-        otdStorage.saveJson()
-
-        plot_dialog.plot(data)  # Plot the data
+        from src.plot_dialogs import PlotDialog
+        plot_dialog = self.viewCache.open("plot", PlotDialog, self, data)  # Plot the data if it changed
         plot_dialog.show()  # Show the dialog
     
     def showOTGraph(self):
@@ -470,81 +519,70 @@ class OTGUI(QMainWindow):
         Display a time-based graph showing the amount of OT recorded.   (Using pure PySide6)
         """
 
-        # Retrieve data from storage
-        data = otdStorage.entries  # Assuming this returns a list of dicts with 'date' and 'length'
-
-        # Sort the entries by date
-        data.sort(key=lambda entry: QDateTime.fromString(entry['date'], "yyyy-MM-dd").toSecsSinceEpoch())
-
-        # Save the sorted entries back to the JSON file
-        otdStorage.saveJson()
-
-        minDate = QDateTime().fromString(otdStorage.firstDate(), "yyyy-MM-dd")
-        maxDate = QDateTime().fromString(otdStorage.lastDate(), "yyyy-MM-dd")
-
-        # Prepare data for the graph
-        series = QLineSeries()
-        for entry in data:
-            series.append(QPointF(QDateTime.fromString(entry['date'], "yyyy-MM-dd").toMSecsSinceEpoch(), entry['amount']))
-        series.setPointLabelsVisible(True)  # Show point labels
-        series.setPointLabelsFormat("@yPoint mins")  # Format for point labels
-        series.setPointLabelsFont(QFont("Arial", 10))
-        series.setPointLabelsColor("#4b006e")
-        series.setPointLabelsClipping(False)  # Ensure labels are fully visible
-        #series.setPointLabelsPosition(QLineSeries.LabelsAbove)  # Position labels above the points
-
-        # Create the chart
-        chart = QChart()
-        chart.addSeries(series)
-        chart.setTitle("OT 時間記錄")
-        chart.setAnimationOptions(QChart.AllAnimations)
-
-        axisX = QDateTimeAxis()
-        axisX.setTitleText("日期")
-        axisX.setFormat("yyyy-MM-dd")  # Set the date format
-        axisX.setTickCount(minDate.daysTo(maxDate) + 3)
-        axisX.setLabelsAngle(-90)  # Rotate the labels for better readability
-        axisX.setRange(minDate.addDays(-1), maxDate.addDays(1))  # Set the range of the x-axis
-        chart.addAxis(axisX, Qt.AlignBottom)
-        series.attachAxis(axisX)
-
-        axisY = QValueAxis()
-        axisY.setTitleText("OT 時長 (分鐘)")
-        axisY.setLabelFormat("%d")
-        axisY.setTickCount(len(data) + 1)
-        axisY.setRange(0, 0 if len(data) == 0 else max(entry['amount'] for entry in data) + 10)  # Add some padding
-        chart.addAxis(axisY, Qt.AlignLeft)
-        series.attachAxis(axisY)
-
-        # Create a chart view
-        chart_view = QChartView(chart)
-        chart_view.setRenderHint(QPainter.Antialiasing)
-        chart_view.setMinimumSize(960, 640)  # Set minimum size for the chart view
-
-        # Display the chart in a dialog
-        dialog = QDialog(self)
-        dialog.setWindowTitle("OT 記錄圖表")
-        layout = QVBoxLayout()
-        layout.addWidget(chart_view)
-        close_button = QPushButton("關閉")
-        close_button.clicked.connect(dialog.close)
-        layout.addWidget(close_button)
-        dialog.setLayout(layout)
-        dialog.exec()
+        # Retrieve data from storage (already sorted by date)
+        data = otdStorage.entries
 
-    def showOTStats(self):
+        # Display the chart in a dialog, it follows the new entries while it is open
+        from src.plot_dialogs import ChartDialog
+        dialog = ChartDialog(otdStorage, self)
+        dialog.load(data)
+        dialog.show()
+
+    @staticmethod
+    def computeStats(storage):
         """
-        Display a dialog with OT statistics.
+        Compute the OT statistics shown by showOTStats, one label at a time.
+        Yields (label key, text) pairs, so that the dialog can be filled in while they are computed on a worker thread.
         """
-            
         def div(x, y):
             return x / y if y != 0 else 0
 
-        # Retrieve data from storage
-        data = otdStorage.entries
+        totalLength = storage.totalLength
+        yield "totalLength", f"OT 總時長: {totalLength} 分鐘"
+        yield "total", f"OT 總次數: {storage.total} 次"
+        yield "average", f"平均每次 OT 時長: {div(totalLength, storage.total):.2f} 分鐘"
+        yield "maximum", f"OT 最長時長: {storage.maximumLength()} 分鐘"
+        yield "minimum", f"OT 最短時長: {storage.minimumLength()} 分鐘"
+
+        # The periods are quick to compute with the sorted entries, the distribution statistics scan every entry
+        periods = {
+            "thisWeek": (sdt.thisWeekStart(), sdt.thisWeekEnd()),
+            "lastWeek": (sdt.lastWeekStart(), sdt.lastWeekEnd()),
+            "thisMonth": (sdt.thisMonthStart(), sdt.thisMonthEnd()),
+            "lastMonth": (sdt.lastMonthStart(), sdt.lastMonthEnd()),
+        }
+        for period, (start, end) in periods.items():
+            periodTotalLength = storage.rangedTotalLength(start, end)
+            periodTotal = storage.rangedTotal(start, end)
+            yield f"{period}TotalLength", f"OT 總時長: {periodTotalLength} 分鐘"
+            yield f"{period}Total", f"OT 總次數: {periodTotal} 次"
+            yield f"{period}Average", f"平均每次 OT 時長: {div(periodTotalLength, periodTotal):.2f} 分鐘"
+            yield f"{period}WorkingDayAverage", f"平均每工作日 OT 時長: {storage.workingDayAverage(start, end):.2f} 分鐘"
+
+        yield "median", f"OT 中位數: {storage.median()} 分鐘"
+        yield "standardDeviation", f"OT 標準差: {storage.standardDeviation():.2f} 分鐘"
+        yield "skewness", f"OT 偏度: {storage.skewness():.2f}"
+        yield "kurtosis", f"OT 峰度: {storage.kurtosis():.2f}"
+        tInterval = storage.studentTConfidenceInterval()
+        yield "tInterval", f"95%可信區間: {tInterval[0]:.2f} 分鐘 - {tInterval[1]:.2f} 分鐘"
+
+    @instrument
+    def showOTStats(self):
+        """
+        Display a dialog with OT statistics.
+        The dialog opens at once and its labels are filled in as the statistics are computed on a worker thread.
+        """
         dialog = QDialog(self)
         dialog.setWindowTitle("OT 記錄統計")
         dialog.setMinimumSize(400,300)
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+
+        # The labels of the statistics, by the keys of computeStats
+        labels = {}
+
+        def statLabel(key: str) -> QLabel:
+            labels[key] = QLabel("計算中……")
+            return labels[key]
 
         # Grid layout with 4 rows and 2 columns
         grid_layout = QGridLayout()
@@ -565,86 +603,35 @@ class OTGUI(QMainWindow):
         totalStatsLabel.setAlignment(Qt.AlignCenter)
         totalStatsLabel.setStyleSheet("font-size: 14px; font-weight: bold;")
         totalStatsLayout.addWidget(totalStatsLabel, 0, 0, 1, 2)
-        totalStatsLayout.addWidget(QLabel(f"OT 總時長: {otdStorage.totalLength} 分鐘"), 1, 0, 1, 1)
-        totalStatsLayout.addWidget(QLabel(f"OT 總次數: {otdStorage.total} 次"), 2, 0, 1, 1)
-        totalStatsLayout.addWidget(QLabel(f"平均每次 OT 時長: {div(otdStorage.totalLength, otdStorage.total):.2f} 分鐘"), 3, 0, 1, 1)
-        totalStatsLayout.addWidget(QLabel(f"OT 中位數: {otdStorage.median()} 分鐘"), 4, 0, 1, 1)
-        totalStatsLayout.addWidget(QLabel(f"OT 標準差: {otdStorage.standardDeviation():.2f} 分鐘"), 5, 0, 1, 1)
-        totalStatsLayout.addWidget(QLabel(f"OT 最長時長: {otdStorage.maximumLength()} 分鐘"), 1, 1, 1, 1)
-        totalStatsLayout.addWidget(QLabel(f"OT 最短時長: {otdStorage.minimumLength()} 分鐘"), 2, 1, 1, 1)
-        tInterval = otdStorage.studentTConfidenceInterval()
-        totalStatsLayout.addWidget(QLabel(f"95%可信區間: {tInterval[0]:.2f} 分鐘 - {tInterval[1]:.2f} 分鐘"), 3, 1, 1, 1)
-        totalStatsLayout.addWidget(QLabel(f"OT 偏度: {otdStorage.skewness():.2f}"), 4, 1, 1, 1)
-        totalStatsLayout.addWidget(QLabel(f"OT 峰度: {otdStorage.kurtosis():.2f}"), 5, 1, 1, 1)
+        totalStatsLayout.addWidget(statLabel("totalLength"), 1, 0, 1, 1)
+        totalStatsLayout.addWidget(statLabel("total"), 2, 0, 1, 1)
+        totalStatsLayout.addWidget(statLabel("average"), 3, 0, 1, 1)
+        totalStatsLayout.addWidget(statLabel("median"), 4, 0, 1, 1)
+        totalStatsLayout.addWidget(statLabel("standardDeviation"), 5, 0, 1, 1)
+        totalStatsLayout.addWidget(statLabel("maximum"), 1, 1, 1, 1)
+        totalStatsLayout.addWidget(statLabel("minimum"), 2, 1, 1, 1)
+        totalStatsLayout.addWidget(statLabel("tInterval"), 3, 1, 1, 1)
+        totalStatsLayout.addWidget(statLabel("skewness"), 4, 1, 1, 1)
+        totalStatsLayout.addWidget(statLabel("kurtosis"), 5, 1, 1, 1)
         grid_layout.addWidget(totalStatsFrame, 1, 0, 1, 2)
 
-        # The second frame that spans row 2 and column 1
-        thisWeekFrame = QFrame()
-        thisWeekFrame.setFrameShape(QFrame.Box)
-        thisWeekFrame.setLineWidth(2)
-        thisWeekLayout = QVBoxLayout()
-        thisWeekFrame.setLayout(thisWeekLayout)
-        thisWeekLabel = QLabel("<b>本周</b>")
-        thisWeekLabel.setAlignment(Qt.AlignCenter)
-        thisWeekLabel.setStyleSheet("font-size: 14px; font-weight: bold;")
-        thisWeekLayout.addWidget(thisWeekLabel)
-        thisWeekTotalLength = otdStorage.rangedTotalLength(sdt.thisWeekStart(), sdt.thisWeekEnd())
-        thisWeekTotal = otdStorage.rangedTotal(sdt.thisWeekStart(), sdt.thisWeekEnd())
-        thisWeekLayout.addWidget(QLabel(f"OT 總時長: {thisWeekTotalLength} 分鐘"))
-        thisWeekLayout.addWidget(QLabel(f"OT 總次數: {thisWeekTotal} 次"))
-        thisWeekLayout.addWidget(QLabel(f"平均每次 OT 時長: {div(thisWeekTotalLength, thisWeekTotal):.2f} 分鐘"))
-        grid_layout.addWidget(thisWeekFrame, 2, 0)
-
-        # The third frame that spans row 2 and column 2
-        lastWeekFrame = QFrame()
-        lastWeekFrame.setFrameShape(QFrame.Box)
-        lastWeekFrame.setLineWidth(2)
-        lastWeekLayout = QVBoxLayout()
-        lastWeekFrame.setLayout(lastWeekLayout)
-        lastWeekLabel = QLabel("<b>上周</b>")
-        lastWeekLabel.setAlignment(Qt.AlignCenter)
-        lastWeekLabel.setStyleSheet("font-size: 14px; font-weight: bold;")
-        lastWeekLayout.addWidget(lastWeekLabel)
-        lastWeekTotalLength = otdStorage.rangedTotalLength(sdt.lastWeekStart(), sdt.lastWeekEnd())
-        lastWeekTotal = otdStorage.rangedTotal(sdt.lastWeekStart(), sdt.lastWeekEnd())
-        lastWeekLayout.addWidget(QLabel(f"OT 總時長: {lastWeekTotalLength} 分鐘"))
-        lastWeekLayout.addWidget(QLabel(f"OT 總次數: {lastWeekTotal} 次"))
-        lastWeekLayout.addWidget(QLabel(f"平均每次 OT 時長: {div(lastWeekTotalLength, lastWeekTotal):.2f} 分鐘"))
-        grid_layout.addWidget(lastWeekFrame, 2, 1)
-
-        # The fourth frame that spans row 3 and column 1
-        thisMonthFrame = QFrame()
-        thisMonthFrame.setFrameShape(QFrame.Box)
-        thisMonthFrame.setLineWidth(2)
-        thisMonthLayout = QVBoxLayout()
-        thisMonthFrame.setLayout(thisMonthLayout)
-        thisMonthLabel = QLabel("<b>本月</b>")
-        thisMonthLabel.setAlignment(Qt.AlignCenter)
-        thisMonthLabel.setStyleSheet("font-size: 14px; font-weight: bold;")
-        thisMonthLayout.addWidget(thisMonthLabel)
-        thisMonthTotalLength = otdStorage.rangedTotalLength(sdt.thisMonthStart(), sdt.thisMonthEnd())
-        thisMonthTotal = otdStorage.rangedTotal(sdt.thisMonthStart(), sdt.thisMonthEnd())
-        thisMonthLayout.addWidget(QLabel(f"OT 總時長: {thisMonthTotalLength} 分鐘"))
-        thisMonthLayout.addWidget(QLabel(f"OT 總次數: {thisMonthTotal} 次"))
-        thisMonthLayout.addWidget(QLabel(f"平均每次 OT 時長: {div(thisMonthTotalLength, thisMonthTotal):.2f} 分鐘"))
-        grid_layout.addWidget(thisMonthFrame, 3, 0)
-
-        # The fifth frame that spans row 3 and column 2
-        lastMonthFrame = QFrame()
-        lastMonthFrame.setFrameShape(QFrame.Box)
-        lastMonthFrame.setLineWidth(2)
-        lastMonthLayout = QVBoxLayout()
-        lastMonthFrame.setLayout(lastMonthLayout)
-        lastMonthLabel = QLabel("<b>上月</b>")
-        lastMonthLabel.setAlignment(Qt.AlignCenter)
-        lastMonthLabel.setStyleSheet("font-size: 14px; font-weight: bold;")
-        lastMonthLayout.addWidget(lastMonthLabel)
-        lastMonthTotalLength = otdStorage.rangedTotalLength(sdt.lastMonthStart(), sdt.lastMonthEnd())
-        lastMonthTotal = otdStorage.rangedTotal(sdt.lastMonthStart(), sdt.lastMonthEnd())
-        lastMonthLayout.addWidget(QLabel(f"OT 總時長: {lastMonthTotalLength} 分鐘"))
-        lastMonthLayout.addWidget(QLabel(f"OT 總次數: {lastMonthTotal} 次"))
-        lastMonthLayout.addWidget(QLabel(f"平均每次 OT 時長: {div(lastMonthTotalLength, lastMonthTotal):.2f} 分鐘"))
-        grid_layout.addWidget(lastMonthFrame, 3, 1)
+        # The frames of this week, last week (row 2), this month and last month (row 3)
+        for period, title, row, column in (("thisWeek", "本周", 2, 0), ("lastWeek", "上周", 2, 1),
+                                           ("thisMonth", "本月", 3, 0), ("lastMonth", "上月", 3, 1)):
+            periodFrame = QFrame()
+            periodFrame.setFrameShape(QFrame.Box)
+            periodFrame.setLineWidth(2)
+            periodLayout = QVBoxLayout()
+            periodFrame.setLayout(periodLayout)
+            periodLabel = QLabel(f"<b>{title}</b>")
+            periodLabel.setAlignment(Qt.AlignCenter)
+            periodLabel.setStyleSheet("font-size: 14px; font-weight: bold;")
+            periodLayout.addWidget(periodLabel)
+            periodLayout.addWidget(statLabel(f"{period}TotalLength"))
+            periodLayout.addWidget(statLabel(f"{period}Total"))
+            periodLayout.addWidget(statLabel(f"{period}Average"))
+            periodLayout.addWidget(statLabel(f"{period}WorkingDayAverage"))
+            grid_layout.addWidget(periodFrame, row, column)
 
         # Detailed frame, initially hidden
         detailedStatsFrame = QFrame()
@@ -654,19 +641,32 @@ class OTGUI(QMainWindow):
         grid_layout.addWidget(detailedStatsFrame, 4, 0, 1, 2)  # span 2 columns
 
         dialog.setLayout(grid_layout)
-        dialog.exec()
+
+        # Compute on a copy of the storage, so entries can be added meanwhile, and stop when the dialog is closed
+        worker = self.workers.start(self.computeStats, otdStorage.copy(), onProgress=lambda item: labels[item[0]].setText(item[1]))
+        dialog.finished.connect(lambda result: worker.cancel())
+        dialog.open()
 
 
 if __name__ == "__main__":
-    otdStorage.loadJson()  # Load the JSON file
-    
     name = os.path.basename(sys.argv[0])  # Get the name of the file
     if name == "OT 記錄器(地下專用版本).exe":
         version_flag = True
 
+    # Only the log of the app and of the src modules goes down to debug, not the one of the libraries
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+    if os.environ.get("OT_DEBUG"):
+        for name in (__name__, "src"):
+            logging.getLogger(name).setLevel(logging.DEBUG)
+
     app = QApplication(sys.argv)
     app.setFont(QFont("Microsoft JhengHei UI", 11))
     ot_gui = OTGUI()
     ot_gui.show()
+
+    if os.environ.get("OT_STARTUP_PROBE"):
+        # Used by benchmarks/startup.py: report the time to the first window and to the loaded data, then quit
+        QTimer.singleShot(0, lambda: print(f"first-window {(time.perf_counter() - startTime) * 1000:.1f} ms", flush=True))
+        ot_gui.dataLoaded.connect(lambda: (print(f"data-loaded {(time.perf_counter() - startTime) * 1000:.1f} ms", flush=True), app.quit()))
+    QTimer.singleShot(0, ot_gui.loadData)  # Load the JSON file behind the shown window
     sys.exit(app.exec())
-    
@@ -0,0 +1,95 @@
+"""
+Synthetic OT history generator for the benchmarks.
+
+Writes "ot.json" files in the format of OTDStorage with realistic data: the amounts are skewed
+(most OT is short, a few sessions are very long), the "reason" and "by" values repeat from small pools
+with a few frequent ones, some entries have neither, and the dates are not sorted.
+
+    python benchmarks/generate.py                   # benchmarks/data/ot-1k.json, ot-100k.json and ot-1m.json
+    python benchmarks/generate.py -s 5000 -o data   # data/ot-5k.json
+"""
+import argparse
+import json
+import os
+import random
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, "benchmarks", "data")
+SIZES = (1_000, 100_000, 1_000_000)
+
+REASONS = ["開會", "改簿", "家長日", "準備教材", "學生補課", "活動籌備", "考試監考", "批改試卷", "行政工作", "陸運會",
+           "水運會", "畢業禮", "開放日", "教師發展日", "課外活動", "處理學生問題", "寫報告", "出卷", "校外比賽", "維修電腦"]
+BYS = ["校長", "副校長", "科主任", "級主任", "訓導主任", "課外活動主任", "自己", "教務主任"]
+
+def sizeName(size: int) -> str:
+    """
+    The short name of a size, e.g. "1k" or "1m".
+    """
+    if size % 1_000_000 == 0:
+        return f"{size // 1_000_000}m"
+    if size % 1_000 == 0:
+        return f"{size // 1_000}k"
+    return str(size)
+
+def dataFile(size: int, directory: str = DATA_DIR) -> str:
+    """
+    The name of the generated file of a size.
+    """
+    return os.path.join(directory, f"ot-{sizeName(size)}.json")
+
+def entries(size: int, seed: int = 0, start: date = date(2012, 9, 1), years: int = 12) -> list[dict]:
+    """
+    Generate size entries between start and years later, in random order.
+    """
+    rng = random.Random(seed)
+    days = years * 365
+    # Zipf-like weights, so a few reasons and people come up most of the time
+    reasonWeights = [1 / (rank + 1) for rank in range(len(REASONS))]
+    byWeights = [1 / (rank + 1) for rank in range(len(BYS))]
+    dayOffsets = [rng.randrange(days) for _ in range(size)]
+    reasons = rng.choices(REASONS, reasonWeights, k=size)
+    bys = rng.choices(BYS, byWeights, k=size)
+
+    result = []
+    for offset, reason, by in zip(dayOffsets, reasons, bys):
+        entry = {"date": (start + timedelta(days=offset)).isoformat(),
+                 "amount": min(max(int(rng.lognormvariate(3.8, 0.7)), 1), 720)}  # Median about 45 minutes
+        if rng.random() < 0.7:
+            entry["reason"] = reason
+        if rng.random() < 0.5:
+            entry["by"] = by
+        result.append(entry)
+    return result
+
+def generate(size: int, filename: str, seed: int = 0):
+    """
+    Write an OT JSON file with size synthetic entries.
+    """
+    data = {
+        "entries": entries(size, seed),
+        "total": size,
+        "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "workhour": {
+            "start": "08:10",
+            "end": "16:58",
+            "lunch_start": "12:30",
+            "lunch_end": "13:30",
+        }
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+    with open(filename, "w") as f:
+        json.dump(data, f, indent=4)  # As OTDStorage.saveJson writes it
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic OT history files for the benchmarks.")
+    parser.add_argument("-s", "--size", type=int, action="append", help="number of entries (default: 1k, 100k and 1m)")
+    parser.add_argument("-o", "--output", default=DATA_DIR, help="output directory (default: benchmarks/data)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args()
+
+    for size in args.size or SIZES:
+        filename = dataFile(size, args.output)
+        generate(size, filename, args.seed)
+        print(f"Wrote {size} entries to {filename}")
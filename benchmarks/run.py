@@ -0,0 +1,202 @@
+"""
+Benchmark harness of OTDStorage, the statistics and the headless plot builders.
+
+Every case is run on the synthetic histories of benchmarks/generate.py (generated when missing), up to
+--repeat times or until it has taken --max-seconds. The results are written as JSON, and when a baseline
+(an earlier results file) is given, every case that got slower than the tolerance is reported as a regression
+and the exit status is non-zero.
+
+    python benchmarks/run.py                                    # writes benchmarks/results/<time>.json
+    python benchmarks/run.py -s 1000 -s 100000 --baseline benchmarks/results/baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.generate import SIZES, dataFile, generate, sizeName
+from src.json_func import OTDStorage
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+def plotCase(draw):
+    """
+    Make a case that draws on a new Agg figure and renders it to PNG, as the reports do.
+    """
+    def case(storage):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        figure = Figure(figsize=(11.69, 8.27))
+        FigureCanvasAgg(figure)
+        draw(figure.add_subplot(), storage)
+        figure.savefig(io.BytesIO(), format="png")
+    return case
+
+def timeSeries(ax, storage):
+    from src.plotting import OTPlot
+    OTPlot.timeSeries(ax, *OTPlot.timeSeriesData(storage.entries))
+
+def pointLabels(ax, storage):
+    from src.plotting import OTPlot
+    x, y = OTPlot.timeSeriesData(storage.entries)
+    OTPlot.timeSeries(ax, x, y)
+    OTPlot.pointLabels(ax, x, y)
+
+def histogram(ax, storage):
+    from src.plotting import OTPlot
+    OTPlot.histogram(ax, [entry["amount"] for entry in storage.entries], bins=30)
+
+def histogramBars(ax, storage):
+    from src.histogram import MinuteHistogram
+    from src.plotting import OTPlot
+    counts = MinuteHistogram([entry["amount"] for entry in storage.entries])
+    OTPlot.histogramBars(ax, *counts.rebin(counts.defaultWidth()))
+    OTPlot.histogramLabels(ax)
+
+def statsTable(ax, storage):
+    from src.plotting import OTPlot
+    OTPlot.statsTable(ax, storage)
+
+def quietly(fn):
+    """
+    Run fn without its printed output (shapiro_wilkTest prints its result).
+    """
+    def case(storage):
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn(storage)
+    return case
+
+# name -> (function of a loaded storage, largest size it is run on or None)
+# The storage is loaded from a copy of the data file, as saveJson and newEntry write to it.
+CASES = {
+    "loadJson": (lambda storage: OTDStorage(storage.filename).loadJson(), None),
+    "rangedTotal.month": (lambda storage: storage.rangedTotal("2018-03-01", "2018-03-31"), None),
+    "rangedTotalLength.month": (lambda storage: storage.rangedTotalLength("2018-03-01", "2018-03-31"), None),
+    "rangedTotalLength.year": (lambda storage: storage.rangedTotalLength("2018-01-01", "2018-12-31"), None),
+    "workingDayAverage.month": (lambda storage: storage.workingDayAverage("2018-03-01", "2018-03-31"), None),
+    "totalLength": (lambda storage: storage.totalLength, None),
+    "median": (lambda storage: storage.median(), None),
+    "standardDeviation": (lambda storage: storage.standardDeviation(), None),
+    "maximumLength": (lambda storage: storage.maximumLength(), None),
+    "minimumLength": (lambda storage: storage.minimumLength(), None),
+    "skewness": (lambda storage: storage.skewness(), None),
+    "kurtosis": (lambda storage: storage.kurtosis(), None),
+    "studentTConfidenceInterval": (lambda storage: storage.studentTConfidenceInterval(), None),
+    "shapiro_wilkTest": (quietly(lambda storage: storage.shapiro_wilkTest()), None),
+    "bucketTotals.week": (lambda storage: storage.bucketTotals("week"), None),
+    "bucketTotals.month": (lambda storage: storage.bucketTotals("month"), None),
+    "plot.timeSeries": (plotCase(timeSeries), None),
+    "plot.pointLabels": (plotCase(pointLabels), 10_000),
+    "plot.histogram": (plotCase(histogram), None),
+    "plot.histogramBars": (plotCase(histogramBars), None),
+    "plot.statsTable": (plotCase(statsTable), None),
+    "search.cjk": (lambda storage: storage.search("學生補課"), None),
+    "search.range": (lambda storage: storage.search("開會", start_date="2018-01-01", end_date="2018-12-31"), None),
+    "saveJson": (lambda storage: storage.saveJson(), None),
+    "newEntry": (lambda storage: storage.newEntry("2018-03-15", 45, "開會", "校長"), None),  # Last, it adds entries
+}
+
+def timeCase(fn, storage, repeat: int, maxSeconds: float) -> dict:
+    """
+    Run a case up to repeat times, or until it has taken maxSeconds (at least once).
+    Returns the number of runs and the minimum and median times in milliseconds.
+    """
+    times = []
+    while len(times) < repeat and sum(times) < maxSeconds:
+        start = time.perf_counter()
+        fn(storage)
+        times.append(time.perf_counter() - start)
+    return {"runs": len(times), "min_ms": min(times) * 1000, "median_ms": statistics.median(times) * 1000}
+
+def runSize(size: int, repeat: int, maxSeconds: float, selected=None) -> dict:
+    """
+    Run the cases on the history of a size, on a copy of its file in a temporary directory.
+    """
+    filename = dataFile(size)
+    if not os.path.exists(filename):
+        print(f"Generating {filename}")
+        generate(size, filename)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        copy = os.path.join(directory, "ot.json")
+        shutil.copyfile(filename, copy)
+        storage = OTDStorage(copy)
+        storage.loadJson()
+        for name, (fn, maxSize) in CASES.items():
+            if (selected and name not in selected) or (maxSize is not None and size > maxSize):
+                continue
+            results[name] = timeCase(fn, storage, repeat, maxSeconds)
+            print(f"  {sizeName(size):>5} {name:<30} {results[name]['median_ms']:10.3f} ms  ({results[name]['runs']} runs)")
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float, floorMs: float) -> list:
+    """
+    Compare the minimum times (the least noisy) with a baseline.
+    Returns the (size, case, baseline ms, ms) of every case slower than the baseline by more than the tolerance
+    (a fraction) and by more than floorMs, so the noise of the very fast cases is not flagged.
+    """
+    regressions = []
+    for size, cases in results["results"].items():
+        for name, result in cases.items():
+            base = baseline["results"].get(size, {}).get(name)
+            if base is None:
+                continue
+            before, after = base["min_ms"], result["min_ms"]
+            if after > before * (1 + tolerance) and after - before > floorMs:
+                regressions.append((size, name, before, after))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark OTDStorage, the statistics and the headless plots.")
+    parser.add_argument("-s", "--size", type=int, action="append", help="history size (default: 1k, 100k and 1m)")
+    parser.add_argument("-c", "--case", action="append", choices=list(CASES), help="case to run (default: all)")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="runs of every case (default: 5)")
+    parser.add_argument("--max-seconds", type=float, default=5.0, help="time limit of the runs of a case (default: 5)")
+    parser.add_argument("-o", "--output", help="results file (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--baseline", help="results file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="slowdown allowed before a regression (default: 0.2)")
+    parser.add_argument("--floor-ms", type=float, default=0.5, help="slowdowns under this are never flagged (default: 0.5)")
+    args = parser.parse_args()
+
+    # The missing CJK glyphs of the default font and the accuracy of shapiro on large samples are not of interest here
+    warnings.simplefilter("ignore", UserWarning)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    for size in args.size or SIZES:
+        results["results"][sizeName(size)] = runSize(size, args.repeat, args.max_seconds, args.case)
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.floor_ms)
+        for size, name, before, after in regressions:
+            print(f"REGRESSION: {size} {name} {before:.3f} ms -> {after:.3f} ms ({after / before - 1:+.0%})")
+        print(f"{len(regressions)} regression(s) against {args.baseline}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,146 @@
+"""
+Load test of the HTTP service (src/service.py).
+
+Starts the service on a copy of a synthetic history (see benchmarks/generate.py), then runs concurrent clients
+on keep-alive connections with a mix of inserts, range totals and statistics, and reports the requests per second,
+the latency percentiles and how many saves the inserts were grouped into.
+
+    python benchmarks/service_load.py -c 32 -n 200 --write-ratio 0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.generate import dataFile, generate
+from src.profiling import percentile
+
+class Client:
+    """
+    A minimal HTTP/1.1 client on one keep-alive connection.
+    """
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method: str, target: str, document=None) -> tuple[int, object]:
+        body = json.dumps(document).encode("utf-8") if document is not None else b""
+        self.writer.write(f"{method} {target} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+        await self.writer.drain()
+        head = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+        status = int(head.split(" ", 2)[1])
+        length = next(int(line.split(":", 1)[1]) for line in head.split("\r\n") if line.lower().startswith("content-length:"))
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        self.writer.close()
+
+def requestMix(rng: random.Random, writeRatio: float) -> tuple:
+    """
+    Pick the next request: an insert, or a range total or the statistics (served from the cache between inserts).
+    """
+    if rng.random() < writeRatio:
+        day = f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        return "POST", "/entries", {"date": day, "amount": rng.randint(5, 240), "reason": "壓力測試"}
+    if rng.random() < 0.5:
+        month = rng.randint(1, 12)
+        return "GET", f"/range?start=2024-{month:02d}-01&end=2024-{month:02d}-28", None
+    return "GET", "/stats", None
+
+async def runClient(host: str, port: int, requests: int, writeRatio: float, seed: int, latencies: list, errors: list):
+    rng = random.Random(seed)
+    client = Client(host, port)
+    await client.connect()
+    try:
+        for _ in range(requests):
+            method, target, document = requestMix(rng, writeRatio)
+            start = time.perf_counter()
+            status, answer = await client.request(method, target, document)
+            latencies.append(time.perf_counter() - start)
+            if status >= 300:
+                errors.append((status, answer))
+    finally:
+        client.close()
+
+async def waitForServer(host: str, port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+async def loadTest(host: str, port: int, clients: int, requests: int, writeRatio: float) -> dict:
+    await waitForServer(host, port)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(runClient(host, port, requests, writeRatio, seed, latencies, errors) for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    client = Client(host, port)
+    await client.connect()
+    _, health = await client.request("GET", "/health")
+    client.close()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "saves": health["saves"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the HTTP service with concurrent keep-alive clients.")
+    parser.add_argument("-s", "--size", type=int, default=100_000, help="history size (default: 100000)")
+    parser.add_argument("-c", "--clients", type=int, default=16, help="concurrent connections (default: 16)")
+    parser.add_argument("-n", "--requests", type=int, default=200, help="requests per connection (default: 200)")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="share of inserts (default: 0.2)")
+    parser.add_argument("-p", "--port", type=int, default=8799, help="port of the service (default: 8799)")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args()
+
+    filename = dataFile(args.size)
+    if not os.path.exists(filename):
+        generate(args.size, filename)
+
+    with tempfile.TemporaryDirectory() as directory:
+        copy = os.path.join(directory, "ot.json")
+        shutil.copyfile(filename, copy)
+        server = subprocess.Popen([sys.executable, "-m", "src.service", "-f", copy, "-p", str(args.port)], cwd=ROOT)
+        try:
+            result = asyncio.run(loadTest("127.0.0.1", args.port, args.clients, args.requests, args.write_ratio))
+        finally:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        print(json.dumps(result))
+    else:
+        inserts = round(result["requests"] * args.write_ratio)
+        print(f"{result['requests']} requests ({result['errors']} errors) in {result['seconds']:.2f} s: "
+              f"{result['requests_per_second']:.0f} req/s, p50 {result['p50_ms']:.2f} ms, "
+              f"p99 {result['p99_ms']:.2f} ms, max {result['max_ms']:.2f} ms")
+        print(f"About {inserts} inserts were grouped into {result['saves']} saves")
@@ -0,0 +1,92 @@
+"""
+Startup benchmark of the GUI.
+
+Two measurements, both in fresh interpreters:
+  - the imports of app.py, parsed from `python -X importtime`, to see which modules cost the most
+    and to check that the graph libraries (matplotlib, QtCharts) are not imported at startup;
+  - the time to the first window, reported by app.py itself when OT_STARTUP_PROBE is set.
+
+Exits with a non-zero status when the time to the first window is over the budget,
+or when a lazily imported module is imported at startup.
+
+    python benchmarks/startup.py --budget-ms 1500
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported when a graph is opened
+LAZY_MODULES = ("matplotlib", "PySide6.QtCharts", "scipy", "numpy")
+
+importLine = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def environment(platform: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    if platform:
+        env["QT_QPA_PLATFORM"] = platform
+    return env
+
+def importTimes(platform: str) -> list:
+    """
+    Import app.py with -X importtime.
+    Returns the (cumulative microseconds, self microseconds, depth, module) of every imported module.
+    """
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                                cwd=cwd, env=environment(platform), capture_output=True, text=True, check=True)
+    times = []
+    for line in result.stderr.splitlines():
+        match = importLine.match(line)
+        if match:
+            times.append((int(match.group(2)), int(match.group(1)), len(match.group(3)) // 2, match.group(4)))
+    return times
+
+def firstWindow(platform: str) -> tuple[float, float]:
+    """
+    Launch app.py in an empty directory until its first window is shown and its data is loaded.
+    Returns the two times in milliseconds, as measured by the app since the start of its imports.
+    """
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run([sys.executable, os.path.join(ROOT, "app.py")],
+                                cwd=cwd, env=dict(environment(platform), OT_STARTUP_PROBE="1"),
+                                capture_output=True, text=True, timeout=60, check=True)
+    marks = dict(re.findall(r"^(first-window|data-loaded) ([\d.]+) ms$", result.stdout, re.MULTILINE))
+    return float(marks["first-window"]), float(marks["data-loaded"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the imports and the time to the first window of the GUI.")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="time to the first window budget (default: 1500)")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="number of launches, the median is checked (default: 5)")
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to show (default: 15)")
+    parser.add_argument("--platform", default=os.environ.get("QT_QPA_PLATFORM", "offscreen"),
+                        help="Qt platform plugin (default: $QT_QPA_PLATFORM or offscreen)")
+    args = parser.parse_args()
+    failed = False
+
+    times = importTimes(args.platform)
+    print(f"Imports of app.py: {len(times)} modules, {sum(t[1] for t in times) / 1000:.1f} ms")
+    for cumulative, own, depth, module in sorted(times, reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {own / 1000:8.1f} ms  {module}")
+
+    imported = {t[3] for t in times}
+    for module in LAZY_MODULES:
+        if module in imported:
+            print(f"FAIL: {module} is imported at startup")
+            failed = True
+
+    runs = [firstWindow(args.platform) for _ in range(args.runs)]
+    window = statistics.median(r[0] for r in runs)
+    loaded = statistics.median(r[1] for r in runs)
+    print(f"First window: {window:.1f} ms, data loaded: {loaded:.1f} ms (median of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    if window > args.budget_ms:
+        print(f"FAIL: the first window took {window:.1f} ms, over the budget of {args.budget_ms:.0f} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,223 @@
+"""
+Command-line interface of the OT records, without Qt or matplotlib (for scripts and cron reports).
+
+    python cli.py add 2024-05-02 45 --reason 開會 --by 校長
+    python cli.py import punches.csv
+    python cli.py stats
+    python cli.py range --period last-month
+    python cli.py range 2024-01-01 2024-06-30 --json
+    python cli.py export --format csv --from 2024-01-01 -o ot.csv
+    python cli.py search 補課 --from 2024-01-01 --limit 20
+    python cli.py stats --as-of 2024-04-30
+    python cli.py undo
+
+Every command prints a machine-readable JSON document instead of text with --json.
+"""
+import argparse
+import csv
+import json
+import sys
+
+from src.history import OTHistory
+from src.json_func import OTDStorage
+from src.sdtime import SDTime
+
+def addEntry(storage: OTDStorage, args) -> dict:
+    """
+    Add one entry.
+    """
+    storage.newEntry(args.date, args.amount, args.reason, args.by)
+    return {"added": 1, "date": args.date, "amount": int(args.amount), "total": storage.total}
+
+def readEntries(filename: str) -> list[dict]:
+    """
+    Read entries from a JSON file (a list of entries, or an OT JSON file) or a CSV file with "date" and "amount" columns.
+    """
+    if filename.lower().endswith(".json"):
+        with open(filename, 'r') as f:
+            data = json.load(f)
+        return data["entries"] if isinstance(data, dict) else data
+    with open(filename, 'r', newline='', encoding="utf-8-sig") as f:
+        return [{key: value for key, value in row.items() if value} for row in csv.DictReader(f)]
+
+def importEntries(storage: OTDStorage, args) -> dict:
+    """
+    Import entries from a file, or the OT of a punch-clock export (a CSV file with an "arrive" column).
+    """
+    if not args.source.lower().endswith(".json"):
+        with open(args.source, 'r', newline='', encoding="utf-8-sig") as f:
+            header = next(csv.reader(f), [])
+        if "arrive" in header:
+            from src.punch_import import PunchImporter
+            return PunchImporter(storage, reason=args.reason).ingest(args.source)
+
+    entries = readEntries(args.source)
+    storage.newEntries(entries)
+    return {"inserted": len(entries), "ot_minutes": sum(int(entry["amount"]) for entry in entries), "total": storage.total}
+
+def stats(storage: OTDStorage, args) -> dict:
+    """
+    The statistics of all the entries, as in the statistics dialog of the GUI.
+    """
+    result = storage.summary()
+    if args.ci:
+        result["confidence_interval_95"] = list(storage.studentTConfidenceInterval())  # Imports SciPy
+    return result
+
+def rangeTotals(storage: OTDStorage, args) -> dict:
+    """
+    The totals of a date range, or of a period (this or last week or month).
+    """
+    if args.period:
+        start, end = SDTime.periodBounds(args.period)
+    elif args.start and args.end:
+        start, end = args.start, args.end
+    else:
+        raise ValueError("Give a start and an end date, or a --period.")
+    return storage.rangeSummary(start, end)
+
+def export(storage: OTDStorage, args) -> dict:
+    """
+    Write the entries (of a date range if given) as CSV or JSON, to a file or to the standard output.
+    """
+    entries = storage.entries
+    if args.start or args.end:
+        entries = storage.rangedEntries(args.start or storage.firstDate() or "1970-01-01",
+                                        args.end or storage.lastDate() or "1970-01-01")
+    out = open(args.output, 'w', newline='', encoding="utf-8") if args.output else sys.stdout
+    try:
+        if args.format == "csv":
+            writer = csv.DictWriter(out, fieldnames=["date", "amount", "reason", "by", "person"], lineterminator="\n")
+            writer.writeheader()
+            writer.writerows(entries)
+        else:
+            json.dump(entries, out, ensure_ascii=False, indent=4)
+            out.write("\n")
+    finally:
+        if args.output:
+            out.close()
+    return {"exported": len(entries), "output": args.output}
+
+def search(storage: OTDStorage, args) -> dict:
+    """
+    The entries whose reason or requester matches a query, with their total minutes.
+    """
+    result = storage.search(args.query, args.field, args.prefix, args.start, args.end, args.limit)
+    storage.saveSearchIndex()  # The index is built on the first search, and kept up to date from then on
+    return result
+
+def undo(storage: OTDStorage, args) -> dict:
+    """
+    Undo the last change (or redo the last undone change with redo).
+    """
+    done = storage.history.redo() if args.command == "redo" else storage.history.undo()
+    if not done:
+        raise ValueError(f"Nothing to {args.command}.")
+    return {args.command: storage.history.log(1)[0][args.command], "total": storage.total}
+
+def history(storage: OTDStorage, args) -> dict:
+    """
+    The last changes, or make a checkpoint that --as-of accepts.
+    """
+    if args.checkpoint:
+        return {"checkpoint": args.checkpoint, "index": storage.history.checkpoint(args.checkpoint)}
+    return {"changes": storage.history.log(args.limit)}
+
+def printText(result: dict):
+    """
+    Print a result as "key: value" lines.
+    """
+    for key, value in result.items():
+        if isinstance(value, float):
+            value = f"{value:.2f}"
+        elif isinstance(value, list) and all(isinstance(v, dict) and "date" in v for v in value):
+            value = "".join(f"\n  {v['date']} {v['amount']:>4} {v.get('reason') or ''} {v.get('by') or ''}".rstrip() for v in value)
+        elif isinstance(value, list) and all(isinstance(v, dict) for v in value):
+            value = "".join("\n  " + " ".join(f"{k}={v[k]}" for k in v) for v in value)
+        elif isinstance(value, list):
+            value = " - ".join(f"{v:.2f}" for v in value)
+        print(f"{key}: {value}")
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="OT records from the command line.")
+    parser.add_argument("-f", "--file", default="ot.json", help="OT JSON file (default: ot.json)")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    # --json is also accepted after the command
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", default=argparse.SUPPRESS, help="print the result as JSON")
+
+    add = commands.add_parser("add", help="add an entry", parents=[common])
+    add.add_argument("date", help="date, YYYY-MM-DD")
+    add.add_argument("amount", help="OT length in minutes")
+    add.add_argument("--reason", help="OT reason")
+    add.add_argument("--by", help="who asked for the OT")
+    add.set_defaults(run=addEntry)
+
+    bulk = commands.add_parser("import", help="import entries (JSON or CSV) or a punch-clock export (CSV)", parents=[common])
+    bulk.add_argument("source", help="file to import")
+    bulk.add_argument("--reason", help="reason of the entries of a punch-clock export")
+    bulk.set_defaults(run=importEntries)
+
+    statistics = commands.add_parser("stats", help="statistics of all the entries", parents=[common])
+    statistics.add_argument("--ci", action="store_true", help="add the 95%% confidence interval of the mean (needs SciPy)")
+    statistics.add_argument("--as-of", help="as it was at a date (its end), a time or a checkpoint")
+    statistics.set_defaults(run=stats)
+
+    ranged = commands.add_parser("range", help="totals of a date range", parents=[common])
+    ranged.add_argument("start", nargs="?", help="first date, YYYY-MM-DD")
+    ranged.add_argument("end", nargs="?", help="last date, YYYY-MM-DD")
+    ranged.add_argument("-p", "--period", choices=SDTime.periods, help="a period instead of dates")
+    ranged.add_argument("--as-of", help="as it was at a date (its end), a time or a checkpoint")
+    ranged.set_defaults(run=rangeTotals)
+
+    exporter = commands.add_parser("export", help="export the entries", parents=[common])
+    exporter.add_argument("--format", choices=["csv", "json"], default="csv", help="output format (default: csv)")
+    exporter.add_argument("--from", dest="start", help="first date, YYYY-MM-DD")
+    exporter.add_argument("--to", dest="end", help="last date, YYYY-MM-DD")
+    exporter.add_argument("-o", "--output", help="output file (default: standard output)")
+    exporter.set_defaults(run=export)
+
+    finder = commands.add_parser("search", help="find entries by reason or requester", parents=[common])
+    finder.add_argument("query", nargs="?", default="", help="words or Chinese text, all of them must match")
+    finder.add_argument("--field", choices=["reason", "by"], help="search only this field")
+    finder.add_argument("--prefix", action="store_true", help="match the words that start with the words of the query")
+    finder.add_argument("--from", dest="start", help="first date, YYYY-MM-DD")
+    finder.add_argument("--to", dest="end", help="last date, YYYY-MM-DD")
+    finder.add_argument("-n", "--limit", type=int, default=50, help="entries to list (default: 50)")
+    finder.set_defaults(run=search)
+
+    commands.add_parser("undo", help="undo the last change", parents=[common]).set_defaults(run=undo)
+    commands.add_parser("redo", help="redo the last undone change", parents=[common]).set_defaults(run=undo)
+
+    changes = commands.add_parser("history", help="the last changes", parents=[common])
+    changes.add_argument("-n", "--limit", type=int, default=20, help="changes to list (default: 20)")
+    changes.add_argument("--checkpoint", metavar="LABEL", help="name the current state instead")
+    changes.set_defaults(run=history)
+    return parser
+
+def main(argv=None) -> int:
+    args = parser().parse_args(argv)
+    storage = OTDStorage(args.file)
+    storage.loadJson()
+    OTHistory(storage)  # Every change is recorded beside the data file
+    try:
+        if getattr(args, "as_of", None):
+            storage = storage.history.asOf(args.as_of)
+        result = args.run(storage, args)
+    except (ValueError, KeyError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.command == "export" and not args.output:
+        return 0  # The entries are the output
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+    else:
+        printText(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+# The entries browser of app.py. The table rows are the ids of the search index of the storage, so filtering and
+# sorting a million entries is done with NumPy, and an entry is only read when its row is painted.
+import numpy as np
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QRegularExpression, Qt, QTimer
+from PySide6.QtGui import QIntValidator, QRegularExpressionValidator
+from PySide6.QtWidgets import QComboBox, QDialog, QHBoxLayout, QHeaderView, QLabel, QLineEdit, QPushButton, QTableView, QVBoxLayout
+
+from src.profiling import instrument
+
+
+class EntriesModel(QAbstractTableModel):
+    """
+    A table model of the entries of a list of ids of a SearchIndex.
+
+    The rows are made available a page at a time through canFetchMore/fetchMore as the view is scrolled, and nothing
+    is kept per row: the data of a cell is read from the entry when the view asks for it.
+    Sorting reorders the ids with the columns of the index, instead of sorting the entries.
+    """
+    columns = ("date", "amount", "reason", "by")
+    headers = ("日期", "OT時長 (分鐘)", "OT原因", "邊個叫你OT")
+    pageSize = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.searchIndex = None
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.loaded = 0  # The number of rows made available to the view
+        self.sortColumn = 0
+        self.sortOrder = Qt.AscendingOrder
+
+    def setIds(self, searchIndex, ids: np.ndarray):
+        """
+        Show the entries of ids (already sorted), starting again from the first page.
+        """
+        self.beginResetModel()
+        self.searchIndex = searchIndex
+        self.ids = ids
+        self.loaded = min(len(ids), self.pageSize)
+        self.endResetModel()
+
+    ### QAbstractTableModel ###
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        # Called for every role of every painted cell, the other roles are answered first
+        if role == Qt.DisplayRole:
+            value = self.searchIndex.docs[self.ids[index.row()]].get(self.columns[index.column()])
+            return "" if value is None else str(value)
+        if role == Qt.TextAlignmentRole and index.column() == 1:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section: int, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self.loaded < len(self.ids)
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(self.pageSize, len(self.ids) - self.loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    @instrument
+    def sort(self, column: int, order=Qt.AscendingOrder):
+        self.sortColumn, self.sortOrder = column, order
+        if self.searchIndex is not None:
+            self.setIds(self.searchIndex, self.searchIndex.sortIds(self.ids, self.columns[column], order == Qt.DescendingOrder))
+
+
+class EntriesDialog(QDialog):
+    """
+    A dialog to browse the entries, filtered by reason or requester, date range and amount range,
+    and sorted by any column (click its header).
+
+    The search index is loaded (or built) and queried on a worker thread, and the table is filled in when it is ready.
+    The worker never uses the index of the storage, which the GUI thread changes as entries are added: it queries a
+    snapshot of it, or it loads the index from a copy of the storage, which the storage then keeps.
+    The filters are applied shortly after the typing stops, and again when entries are added.
+    """
+    def __init__(self, storage, workers, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("OT 記錄")
+        self.setMinimumSize(720, 560)
+        self.storage = storage
+        self.workers = workers
+        self.query = None  # The worker of the current query
+
+        self.model = EntriesModel(self)
+        self.view = QTableView()
+        self.view.setModel(self.model)
+        self.view.horizontalHeader().setSortIndicator(0, Qt.AscendingOrder)
+        self.view.setSortingEnabled(True)
+        self.view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.view.horizontalHeader().setStretchLastSection(True)
+        # No row is measured, and no row header (it is measured for every page of rows)
+        self.view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.view.verticalHeader().hide()
+        self.view.setWordWrap(False)
+
+        # The filters
+        self.text = QLineEdit()
+        self.text.setPlaceholderText("搜尋OT原因或邊個叫你OT")
+        self.field = QComboBox()
+        for label, field in (("全部", None), ("OT原因", "reason"), ("邊個叫你OT", "by")):
+            self.field.addItem(label, field)
+        dateValidator = QRegularExpressionValidator(QRegularExpression(r"\d{4}-\d{2}-\d{2}"), self)
+        self.start, self.end = QLineEdit(), QLineEdit()
+        for edit, placeholder in ((self.start, "由 YYYY-MM-DD"), (self.end, "至 YYYY-MM-DD")):
+            edit.setPlaceholderText(placeholder)
+            edit.setValidator(dateValidator)
+        self.minAmount, self.maxAmount = QLineEdit(), QLineEdit()
+        for edit, placeholder in ((self.minAmount, "最短 (分鐘)"), (self.maxAmount, "最長 (分鐘)")):
+            edit.setPlaceholderText(placeholder)
+            edit.setValidator(QIntValidator(0, 1_000_000, self))
+
+        # Coalesce the changes of the filters into one query
+        self.filterTimer = QTimer(self)
+        self.filterTimer.setSingleShot(True)
+        self.filterTimer.setInterval(250)
+        self.filterTimer.timeout.connect(self.refresh)
+        for edit in (self.text, self.start, self.end, self.minAmount, self.maxAmount):
+            edit.textChanged.connect(self.filterTimer.start)
+        self.field.currentIndexChanged.connect(self.filterTimer.start)
+
+        filters = QHBoxLayout()
+        filters.addWidget(self.text, 3)
+        filters.addWidget(self.field)
+        filters.addWidget(self.start)
+        filters.addWidget(self.end)
+        filters.addWidget(self.minAmount)
+        filters.addWidget(self.maxAmount)
+
+        self.summary = QLabel("載入中……")
+        close_button = QPushButton("關閉")
+        close_button.clicked.connect(self.close)
+
+        layout = QVBoxLayout()
+        layout.addLayout(filters)
+        layout.addWidget(self.view)
+        layout.addWidget(self.summary)
+        layout.addWidget(close_button)
+        self.setLayout(layout)
+
+        self.storage.addListener(self.onEntriesAdded)
+        self.finished.connect(self.onFinished)
+        self.refresh()
+
+    def filters(self) -> dict:
+        """
+        Get the arguments of SearchIndex.matchIds from the filters, the incomplete dates are left out.
+        """
+        return {
+            "query": self.text.text(),
+            "field": self.field.currentData(),
+            "prefix": True,  # Match the words as they are typed
+            "start": self.start.text() if self.start.hasAcceptableInput() else None,
+            "end": self.end.text() if self.end.hasAcceptableInput() else None,
+            "minAmount": int(self.minAmount.text()) if self.minAmount.hasAcceptableInput() else None,
+            "maxAmount": int(self.maxAmount.text()) if self.maxAmount.hasAcceptableInput() else None,
+        }
+
+    def refresh(self):
+        """
+        Query the entries that match the filters on a worker thread, the previous query is cancelled.
+        """
+        if self.query is not None:
+            self.query.cancel()
+        filters = self.filters()
+        column, descending = self.model.columns[self.model.sortColumn], self.model.sortOrder == Qt.DescendingOrder
+        if self.storage.searchIndexLoaded:
+            snapshot, copy = self.storage.searchIndex.snapshot(), None
+        else:
+            snapshot, copy = None, self.storage.copy()
+
+        def query():
+            searchIndex = snapshot if snapshot is not None else copy.searchIndex  # Loaded or built the first time
+            try:
+                ids = searchIndex.matchIds(**filters)
+            except ValueError:
+                ids = np.zeros(0, dtype=np.int64)  # A date that does not exist, e.g. 2024-02-30
+            return searchIndex, searchIndex.sortIds(ids, column, descending), copy
+
+        self.query = self.workers.start(query, onResult=self.showIds)
+
+    def showIds(self, result):
+        searchIndex, ids, copy = result
+        if copy is not None and self.storage.adoptSearchIndex(searchIndex, copy.version):
+            searchIndex = searchIndex.snapshot()  # The storage adds the new entries to the index from now on
+        self.model.setIds(searchIndex, ids)
+        self.summary.setText(f"共 {len(ids)} 項OT記錄，總時長 {searchIndex.minutes(ids)} 分鐘")
+
+    def onEntriesAdded(self, entries):
+        self.filterTimer.start()
+
+    def onFinished(self, result):
+        self.storage.removeListener(self.onEntriesAdded)
+        self.filterTimer.stop()
+        if self.query is not None:
+            self.query.cancel()
@@ -0,0 +1,72 @@
+import numpy as np
+
+class MinuteHistogram:
+    """
+    A histogram of the OT amounts with one bin per minute.
+
+    New amounts are added in O(1) each, and any coarser bin width is obtained by re-aggregating the
+    per-minute counts (O(maximum amount)) instead of going through all the entries again.
+    The amounts of maxMinutes or more are counted in the bin of maxMinutes, so one absurd amount cannot make
+    the counts that long.
+    """
+    maxMinutes = 7 * 24 * 60
+
+    def __init__(self, amounts=()):
+        amounts = self.minutes(amounts)
+        self.counts = np.bincount(amounts) if len(amounts) else np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def minutes(self, amounts) -> np.ndarray:
+        """
+        Get the bins of amounts, as an array with the amounts past maxMinutes capped.
+        """
+        return np.minimum(np.asarray(amounts, dtype=np.int64), self.maxMinutes)
+
+    @property
+    def total(self) -> int:
+        """
+        Get the number of amounts in the histogram.
+        """
+        return int(self.counts.sum())
+
+    def add(self, amounts):
+        """
+        Add amounts to the histogram.
+        """
+        amounts = self.minutes(amounts)
+        if not len(amounts):
+            return
+        size = int(amounts.max()) + 1
+        if size > len(self.counts):
+            # Grow geometrically so that a run of increasing amounts does not copy the counts every time
+            grown = np.zeros(max(size, min(2 * len(self.counts), self.maxMinutes + 1)), dtype=np.int64)
+            grown[:len(self.counts)] = self.counts
+            self.counts = grown
+        np.add.at(self.counts, amounts, 1)
+
+    def remove(self, amounts):
+        """
+        Remove amounts (that were added) from the histogram.
+        """
+        amounts = self.minutes(amounts)
+        if len(amounts):
+            np.subtract.at(self.counts, amounts, 1)
+
+    def rebin(self, width: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Aggregate the per-minute counts into bins of the given width (in minutes).
+        Returns the bin edges and the count of every bin.
+        """
+        width = max(int(width), 1)
+        used = len(np.trim_zeros(self.counts, 'b'))
+        bins = -(-used // width)
+        padded = np.zeros(bins * width, dtype=np.int64)
+        padded[:used] = self.counts[:used]
+        return np.arange(bins + 1) * width, padded.reshape(bins, width).sum(axis=1)
+
+    def defaultWidth(self, bins: int = 30) -> int:
+        """
+        Returns the bin width that gives about the given number of bins.
+        """
+        used = len(np.trim_zeros(self.counts, 'b'))
+        return max(-(-used // bins), 1)
@@ -0,0 +1,244 @@
+import json
+import os
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import datetime
+
+from src.json_func import OTDStorage, entryDate
+
+
+class OTHistory:
+    """
+    OTHistory class to keep the history of the changes of an OTDStorage, for as-of queries and undo/redo.
+
+    Every change is a delta (the entries added and the entries removed, with its time) appended as one line to a
+    journal beside the data file ("ot.json" -> "ot.history.jsonl"). Nothing is copied when a change is recorded or a
+    checkpoint is made, so the journal (and the memory, once it is read) grows with the changes, not with the data.
+    A past state is the current entries with the later deltas undone, so it shares every unchanged entry.
+
+    Undo and redo are changes too (the inverse or the same delta again), so the history itself is never rewritten
+    and the undo and redo stacks are rebuilt from the journal when it is read again.
+    A checkpoint is a line of the journal too, and it is found again by its position, not by its time.
+
+    The history is of this copy only: sync (src/sync.py) only adds entries, so an entry removed by an undo comes
+    back with the next sync if another copy has it.
+    """
+    timeFormat = "%Y-%m-%d %H:%M:%S"
+
+    def __init__(self, storage: OTDStorage):
+        self.storage = storage
+        self.filename = os.path.splitext(storage.filename)[0] + ".history.jsonl"
+        self._changes = None  # Read from the journal on first use
+        self.undoStack = []  # Indexes of the changes that can be undone, the last one at the end
+        self.redoStack = []  # Indexes of the undone changes that can be redone, the last one at the end
+        self.checkpoints = {}  # label -> index of the checkpoint in the changes
+        self.applying = None  # ("undo" or "redo", index) while an undo or a redo is applied
+        storage.history = self
+
+    @staticmethod
+    def key(entry: dict) -> tuple:
+        """
+        Get the value of an entry, entries with the same value are the same entry in the history.
+        """
+        return entry["date"], entry["amount"], entry.get("reason"), entry.get("by"), entry.get("person")
+
+    @classmethod
+    def timeOf(self, point: str) -> str:
+        """
+        Get the time ("YYYY-MM-DD HH:MM:SS") of a point in time, a date means the end of that day.
+        """
+        if len(point) == 10:
+            return point + " 23:59:59"
+        return datetime.fromisoformat(point).strftime(self.timeFormat)
+
+    ### Journal ###
+    @property
+    def changes(self) -> list[dict]:
+        """
+        Get the recorded changes in time order, read from the journal on first use.
+        """
+        if self._changes is None:
+            self._changes = []
+            try:
+                with open(self.filename, 'r', encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            self.replay(json.loads(line))
+            except FileNotFoundError:
+                pass
+        return self._changes
+
+    def replay(self, change: dict):
+        """
+        Add a change to the history and to the undo and redo stacks.
+        """
+        self._changes.append(change)
+        if "checkpoint" in change:
+            self.checkpoints[change["checkpoint"]] = len(self._changes) - 1
+        elif "undo" in change:
+            self.redoStack.append(self.undoStack.pop())
+        elif "redo" in change:
+            self.undoStack.append(self.redoStack.pop())
+        else:
+            self.undoStack.append(len(self._changes) - 1)
+            self.redoStack.clear()
+
+    def append(self, change: dict):
+        """
+        Add a change to the history and write it to the journal.
+        """
+        if self._changes is not None:
+            self.replay(change)
+        with open(self.filename, 'a', encoding="utf-8") as f:
+            f.write(json.dumps(change, ensure_ascii=False) + "\n")
+
+    def record(self, added: list[dict], removed: list[dict]):
+        """
+        Record a change of the storage, called by OTDStorage on every change.
+        Only the difference is kept, the entries both removed and added (e.g. by replaceMonth) cancel out.
+        """
+        common = Counter(self.key(entry) for entry in added) & Counter(self.key(entry) for entry in removed)
+        if common:
+            added, removed = self.without(added, common), self.without(removed, common)
+        if not added and not removed and self.applying is None:
+            return
+        change = {"time": datetime.now().strftime(self.timeFormat), "added": added, "removed": removed}
+        if self.applying is not None:
+            change[self.applying[0]] = self.applying[1]
+        self.append(change)
+
+    @classmethod
+    def without(self, entries: list[dict], counts: Counter) -> list[dict]:
+        """
+        Get the entries without count of the entries of every value in counts.
+        """
+        counts = Counter(counts)
+        kept = []
+        for entry in entries:
+            key = self.key(entry)
+            if counts[key] > 0:
+                counts[key] -= 1
+            else:
+                kept.append(entry)
+        return kept
+
+    def checkpoint(self, label: str) -> int:
+        """
+        Name the current state, so it can be given to asOf. Returns the index of the checkpoint in the changes.
+        The state is the changes before it, so a change made in the same second after it is not part of it.
+        """
+        index = len(self.changes)
+        self.append({"time": datetime.now().strftime(self.timeFormat), "checkpoint": label})
+        return index
+
+    ### Undo and redo ###
+    def canUndo(self) -> bool:
+        return bool(self.changes and self.undoStack)  # The stacks are filled when the changes are read
+
+    def canRedo(self) -> bool:
+        return bool(self.changes and self.redoStack)
+
+    def undo(self) -> bool:
+        """
+        Undo the last change that is not undone yet. Returns False if there is nothing to undo.
+        The entries removed by the undo come back with the next sync if another copy has them (see the class).
+        """
+        if not self.canUndo():
+            return False
+        index = self.undoStack[-1]
+        self.applying = ("undo", index)
+        try:
+            self.storage.changeEntries(self.changes[index]["removed"], self.changes[index]["added"])
+        finally:
+            self.applying = None
+        return True
+
+    def redo(self) -> bool:
+        """
+        Redo the last undone change. Returns False if there is nothing to redo.
+        """
+        if not self.canRedo():
+            return False
+        index = self.redoStack[-1]
+        self.applying = ("redo", index)
+        try:
+            self.storage.changeEntries(self.changes[index]["added"], self.changes[index]["removed"])
+        finally:
+            self.applying = None
+        return True
+
+    ### As-of queries ###
+    def asOf(self, point: str) -> OTDStorage:
+        """
+        Get the storage as it was at a point in time: a checkpoint label (the changes before it in the journal),
+        a time, or a date (the end of that day).
+        The result is a read-only storage (like OTDStorage.copy) that shares the unchanged entries with the current one.
+        Only the dates touched by the later changes are rebuilt.
+        """
+        changes = self.changes  # Also reads the checkpoints
+        if point in self.checkpoints:
+            index = self.checkpoints[point]
+            earlier, later = changes[:index], changes[index + 1:]
+        else:
+            time = self.timeOf(point)
+            earlier = [change for change in changes if change["time"] <= time]
+            later = [change for change in changes if change["time"] > time]
+        earlier = [change for change in earlier if "checkpoint" not in change]
+        later = [change for change in later if "checkpoint" not in change]
+
+        # The net count of every entry value to take out of (positive) or put back into (negative) the current entries
+        net = Counter()
+        values = {}
+        for change in later:
+            for entry in change["added"]:
+                net[self.key(entry)] += 1
+            for entry in change["removed"]:
+                net[self.key(entry)] -= 1
+                values.setdefault(self.key(entry), entry)
+
+        restored = {}  # date -> entries to put back
+        for key, count in net.items():
+            if count < 0:
+                restored.setdefault(key[0], []).extend([values[key]] * -count)
+
+        entries = list(self.storage.entries)
+        for date in sorted({key[0] for key, count in net.items() if count}, reverse=True):
+            lo = bisect_left(entries, date, key=entryDate)
+            hi = bisect_right(entries, date, lo=lo, key=entryDate)
+            day = []
+            for entry in entries[lo:hi]:
+                key = self.key(entry)
+                if net[key] > 0:
+                    net[key] -= 1  # Added later
+                else:
+                    day.append(entry)
+            day.extend(restored.get(date, ()))
+            entries[lo:hi] = day
+
+        storage = OTDStorage(self.storage.filename)
+        storage.data = dict(self.storage.snapshot(), entries=entries, total=len(entries),
+                            last_updated=max((change["time"] for change in earlier), default=self.storage.last_updated))
+        storage._calendar = self.storage._calendar
+        return storage
+
+    def log(self, limit: int = None) -> list[dict]:
+        """
+        Get a summary of the recorded changes (the last limit of them), the latest first.
+        """
+        summaries = []
+        for index in range(len(self.changes) - 1, -1, -1):
+            change = self.changes[index]
+            summary = {"index": index, "time": change["time"]}
+            if "checkpoint" in change:
+                summary["checkpoint"] = change["checkpoint"]
+            else:
+                summary.update(added=len(change["added"]), removed=len(change["removed"]),
+                               minutes=sum(entry["amount"] for entry in change["added"])
+                                       - sum(entry["amount"] for entry in change["removed"]))
+                for kind in ("undo", "redo"):
+                    if kind in change:
+                        summary[kind] = change[kind]
+            summaries.append(summary)
+            if limit is not None and len(summaries) >= limit:
+                break
+        return summaries
@@ -1,19 +1,27 @@
 import json
+import os
+import threading
+from bisect import bisect_left, bisect_right, insort
 from datetime import datetime
 
+from src.profiling import instrument, instrumented
+
 class OTData:
     """
     A class to represent the OT data.
     """
-    def __init__(self, date: str, amount: int, reason: str, by: str):
+    def __init__(self, date: str, amount: int, reason: str, by: str, person: str = None):
         """
-        Initialize the OTData object with date, amount, reason, and by.
+        Initialize the OTData object with date, amount, reason, and by
+        (who asked for the OT), and the person who did it if it is not the owner of the file (e.g. a team import).
         """
         self.entry = {"date": date, "amount": amount}
         if reason:
             self.entry["reason"] = reason
         if by:
             self.entry["by"] = by
+        if person:
+            self.entry["person"] = person
 
     def to_dict(self) -> dict:
         """
@@ -21,39 +29,120 @@ class OTData:
         """
         return self.entry
 
+def entryDate(entry: dict) -> str:
+    """
+    The sort key of the entries ("YYYY-MM-DD" strings sort in date order).
+    """
+    return entry["date"]
+
+@instrumented
 class OTDStorage:
     """
     OTDStorage (OT Data Storage) class to manage the storage of OT data.
 
     This is a wrapper class for handling the loading, saving, and creating of a JSON file that stores OT data.
+    The entries are always kept sorted by date (entries of the same date stay in insertion order),
+    so views can use them without sorting and date ranges are found by bisection.
     """
     def __init__(self, filename: str):
         self.filename = filename
         self.data = None
+        self.version = 0  # Increased on every change of the data, so views can tell when to re-render
+        self.listeners = []
+        self.saver = None  # Called as saver(writeSnapshot, sequence, data) to write the file elsewhere, see saveJson
+        self.history = None  # Called as history.record(added, removed) on every change, see src/history.py
+        self._calendar = None
+        self._histogram = None
+        self._searchIndex = None
+        self._monthHashes = None  # month -> hash of its entries, see monthHashes
+        self._dirtyMonths = set()  # The months changed since they were hashed
+        self._monthHasher = None
+        self._saveSequence = 0
+        self._saveLock = threading.Lock()
 
-    def loadJson(self):
+    def loadJson(self, readOnly: bool = False):
         """
         Load the JSON file.
+        With readOnly, the file is never written: a missing file raises FileNotFoundError instead of being created,
+        a file that is not OT data raises ValueError, and an inconsistent total is only fixed in memory.
         """
         try:
             with open(self.filename, 'r') as f:
-                self.data = json.load(f)
+                data = json.load(f)
+            if readOnly and not self.isOTData(data):
+                raise ValueError(f"{self.filename} is not an OT data file")
+            self.data = data
+            self.version += 1
+            self._histogram = None
+            self._searchIndex = None
+            self._monthHashes = None
+
+            # Sort the entries once, they are kept sorted from now on
+            self.entries.sort(key=entryDate)
             
             # Ensure total is consistent with the number of entries
             if len(self.data["entries"]) != self.data["total"]:
                self.total = len(self.entries)
-               self.saveJson()
+               if not readOnly:
+                   self.saveJson()
 
         except FileNotFoundError:
+            if readOnly:
+                raise
             self.data = self.newJson()
 
+    @staticmethod
+    def isOTData(data) -> bool:
+        """
+        Check that loaded JSON data has the format of an OT data file (e.g. not a holidays file).
+        """
+        return (isinstance(data, dict) and isinstance(data.get("entries"), list) and "total" in data
+                and isinstance(data.get("workhour"), dict)
+                and all(isinstance(entry, dict) and "date" in entry and "amount" in entry for entry in data["entries"]))
+
 
     def saveJson(self):
         """
         Save the JSON file.
+        When a saver is set (e.g. to write on a worker thread), it is given a snapshot of the data to write,
+        so the data can keep changing while the file is written.
+        """
+        self._saveSequence += 1
+        if self.saver is None:
+            self.writeSnapshot(self._saveSequence, self.data)
+        else:
+            self.saver(self.writeSnapshot, self._saveSequence, self.snapshot())
+
+    def snapshot(self) -> dict:
+        """
+        Get a copy of the data that is not affected by later changes.
+        The entries themselves are shared, as they are never modified in place.
+        """
+        return dict(self.data, entries=list(self.entries), workhour=dict(self.data["workhour"]))
+
+    def writeSnapshot(self, sequence: int, data: dict):
+        """
+        Write the data given to the saver to the JSON file, through a temporary file so it is never half written.
+        The data is skipped if a newer snapshot has been taken since, as that one is written next.
+        """
+        with self._saveLock:
+            if sequence < self._saveSequence:
+                return
+            temporary = self.filename + ".tmp"
+            with open(temporary, 'w') as f:
+                json.dump(data, f, indent=4)
+            os.replace(temporary, self.filename)
+
+    def copy(self) -> "OTDStorage":
         """
-        with open(self.filename, 'w') as f:
-            json.dump(self.data, f, indent=4)
+        Get a storage on a snapshot of the data, to compute statistics on another thread while entries are added.
+        The copy has no listeners and is not meant to be saved.
+        """
+        storage = OTDStorage(self.filename)
+        storage.version = self.version  # Read first, so the copy is never older than its version
+        storage.data = self.snapshot()
+        storage._calendar = self._calendar
+        return storage
 
     def newJson(self):
         """
@@ -70,6 +159,10 @@ class OTDStorage:
                 "lunch_end": "13:30",
             }
         }
+        self.version += 1
+        self._histogram = None
+        self._searchIndex = None
+        self._monthHashes = None
         self.saveJson()
         return self.data
 
@@ -172,6 +265,7 @@ class OTDStorage:
         self.data["workhour"]["lunch_end"] = value
     
     @property
+    @instrument
     def totalLength(self) -> int:
         """
         Get the total amount from the JSON file.
@@ -179,6 +273,7 @@ class OTDStorage:
         return sum(entry["amount"] for entry in self.entries)
     
     @property
+    @instrument
     def numOfDaySince(self) -> int:
         """
         Get the number of days since the first entry in the JSON file.
@@ -189,21 +284,121 @@ class OTDStorage:
         today = datetime.now()
         return (today - first_date).days
     
+    def rangedEntries(self, start_date: str, end_date: str) -> list[dict]:
+        """
+        Get the entries in a specific date range (inclusive).
+        """
+        start_date = datetime.strptime(start_date, "%Y-%m-%d").strftime("%Y-%m-%d")
+        end_date = datetime.strptime(end_date, "%Y-%m-%d").strftime("%Y-%m-%d")
+        lo = bisect_left(self.entries, start_date, key=entryDate)
+        hi = bisect_right(self.entries, end_date, lo=lo, key=entryDate)
+        return self.entries[lo:hi]
+
     def rangedTotalLength(self, start_date: str, end_date: str) -> int:
         """
         Get the total amount in a specific date range.
         """
-        start_date = datetime.strptime(start_date, "%Y-%m-%d")
-        end_date = datetime.strptime(end_date, "%Y-%m-%d")
-        return sum(entry["amount"] for entry in self.entries if start_date <= datetime.strptime(entry["date"], "%Y-%m-%d") <= end_date)
+        return sum(entry["amount"] for entry in self.rangedEntries(start_date, end_date))
 
     def rangedTotal(self, start_date: str, end_date: str) -> int:
         """
         Get the total number of entries in a specific date range.
         """
-        start_date = datetime.strptime(start_date, "%Y-%m-%d")
-        end_date = datetime.strptime(end_date, "%Y-%m-%d")
-        return sum(1 for entry in self.entries if start_date <= datetime.strptime(entry["date"], "%Y-%m-%d") <= end_date)
+        return len(self.rangedEntries(start_date, end_date))
+
+    @property
+    @instrument
+    def calendar(self):
+        """
+        Get the working day calendar, loaded from "holidays.json" beside the JSON file.
+        """
+        if self._calendar is None:
+            from src.workcalendar import WorkCalendar
+            self._calendar = WorkCalendar.fromFile(os.path.join(os.path.dirname(self.filename), "holidays.json"))
+        return self._calendar
+
+    @calendar.setter
+    def calendar(self, value):
+        """
+        Set the working day calendar.
+        """
+        self._calendar = value
+
+    def workingDayAverage(self, start_date: str, end_date: str) -> float:
+        """
+        Get the average amount per working day in a specific date range.
+        Days after today are not counted, so a period that is not over yet is not diluted.
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        workingDays = self.calendar.workingDaysBetween(start_date, min(end_date, today))
+        if workingDays == 0:
+            return 0.0
+        return self.rangedTotalLength(start_date, end_date) / workingDays
+
+    @property
+    @instrument
+    def histogram(self):
+        """
+        Get the per-minute histogram of the amounts, built on first use and kept up to date by newEntry and newEntries.
+        """
+        if self._histogram is None:
+            from src.histogram import MinuteHistogram
+            self._histogram = MinuteHistogram([entry["amount"] for entry in self.entries])
+        return self._histogram
+
+    @property
+    def searchIndexFile(self) -> str:
+        """
+        Get the name of the search index file, beside the JSON file ("ot.json" -> "ot.search.npz").
+        """
+        return os.path.splitext(self.filename)[0] + ".search.npz"
+
+    @property
+    @instrument
+    def searchIndex(self):
+        """
+        Get the search index of the reasons and requesters, kept up to date by newEntry and newEntries.
+        It is loaded from its file when it was saved for the current data, otherwise it is built and saved.
+        """
+        if self._searchIndex is None:
+            from src.search import SearchIndex
+            self._searchIndex = SearchIndex.load(self.searchIndexFile, self)
+            if self._searchIndex is None:
+                self._searchIndex = SearchIndex.build(self.entries)
+                self.saveSearchIndex()
+        return self._searchIndex
+
+    @property
+    def searchIndexLoaded(self) -> bool:
+        """
+        Check if the search index is loaded (or built), so searchIndex returns at once.
+        """
+        return self._searchIndex is not None
+
+    def adoptSearchIndex(self, index, version: int) -> bool:
+        """
+        Use a search index loaded or built on another thread from a copy of the data (see copy),
+        if the data has not changed since the copy of that version. Returns True if the index is used.
+        """
+        if self._searchIndex is None and version == self.version:
+            self._searchIndex = index
+            return True
+        return False
+
+    def saveSearchIndex(self):
+        """
+        Save the search index if it has changed since it was loaded or saved.
+        """
+        if self._searchIndex is not None and self._searchIndex.dirty:
+            self._searchIndex.save(self.searchIndexFile, self)
+
+    def search(self, query: str = "", field: str = None, prefix: bool = False,
+               start_date: str = None, end_date: str = None, limit: int = None) -> dict:
+        """
+        Find the entries whose reason or by matches a query (see SearchIndex.search), dated between start_date and end_date.
+        Returns the number of entries, their total minutes and the entries sorted by date.
+        """
+        return self.searchIndex.search(query, field, prefix, start_date, end_date, limit)
 
     def median(self) -> float:
         """
@@ -295,6 +490,72 @@ class OTDStorage:
         kurt = sum((entry["amount"] - mean) ** 4 for entry in self.entries) / (n * stddev ** 4) - 3
         return kurt
     
+    def bucketTotals(self, period: str = "week") -> dict:
+        """
+        Group the entries by "week" (ISO week), "month" or "weekday".
+        Returns a dict mapping each bucket label to a (number of entries, total amount) tuple.
+        """
+        if not self.entries:
+            return {}
+        from src.sdbucket import SDBucket
+        days = SDBucket.toDays(entry["date"] for entry in self.entries)
+        ids, counts, totals = SDBucket.bucketSums(SDBucket.bucketIds(period, days), [entry["amount"] for entry in self.entries])
+        return dict(zip(SDBucket.labels(period, ids), zip(counts.tolist(), totals.tolist())))
+
+    def summary(self) -> dict:
+        """
+        Get the statistics of all the entries (those of the statistics dialog, without the SciPy ones).
+        """
+        totalLength = self.totalLength
+        return {
+            "total_length": totalLength,
+            "total": self.total,
+            "average": totalLength / self.total if self.total else 0,
+            "median": self.median(),
+            "standard_deviation": self.standardDeviation(),
+            "maximum": self.maximumLength(),
+            "minimum": self.minimumLength(),
+            "skewness": self.skewness(),
+            "kurtosis": self.kurtosis(),
+            "first_date": self.firstDate(),
+            "last_date": self.lastDate(),
+        }
+
+    def rangeSummary(self, start_date: str, end_date: str) -> dict:
+        """
+        Get the totals of a specific date range.
+        """
+        entries = self.rangedEntries(start_date, end_date)
+        totalLength = sum(entry["amount"] for entry in entries)
+        return {
+            "start": start_date,
+            "end": end_date,
+            "total_length": totalLength,
+            "total": len(entries),
+            "average": totalLength / len(entries) if entries else 0,
+            "working_day_average": self.workingDayAverage(start_date, end_date),
+        }
+
+    def addListener(self, callback):
+        """
+        Register a callback that is called with the list of new entries every time entries are added.
+        """
+        self.listeners.append(callback)
+
+    def removeListener(self, callback):
+        """
+        Unregister a callback registered with addListener.
+        """
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def notifyListeners(self, entries: list[dict]):
+        """
+        Call the registered callbacks with the new entries.
+        """
+        for callback in list(self.listeners):
+            callback(entries)
+
     def newEntry(self, date: str, amount: int, reason: str = None, by: str = None):
         """
         Create a new entry in the JSON file.
@@ -308,12 +569,174 @@ class OTDStorage:
                 raise ValueError("Amount must be a positive number.")
         except ValueError:
             raise ValueError("Amount must be a valid integer.")
+        self.validDate(date)
 
         entry = OTData(date, amount, reason, by).to_dict()  # type ensured, check is skipped
-        self.entries.append(entry)
+        insort(self.entries, entry, key=entryDate)  # Keep the entries sorted by date
         self.total += 1
+        if self._histogram is not None:
+            self._histogram.add([amount])
+        if self._searchIndex is not None:
+            self._searchIndex.add([entry])
+        if self.history is not None:
+            self.history.record([entry], [])
+        self.changedMonths([entry])
+        self.last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.version += 1
+        self.saveJson()
+        self.notifyListeners([entry])
+
+    def newEntries(self, entries: list[dict]):
+        """
+        Create many entries in the JSON file at once.
+        Every entry is a dict with "date", "amount" and optionally "reason", "by" and "person".
+        The entries are validated as in newEntry, and the JSON file is saved only once.
+        The entries are merged into a new list that replaces the current one, so a failure leaves the data unchanged
+        and a reader on another thread sees either all the new entries or none of them.
+        """
+        new = [self.validEntry(entry) for entry in entries]
+        if not new:
+            return
+        new.sort(key=entryDate)
+        merged = self.entries + new
+        merged.sort(key=entryDate)  # Merges the two sorted runs in about linear time
+        if self.history is not None:
+            self.history.record(new, [])
+        self.data["entries"] = merged
+        self.total = len(merged)
+        if self._histogram is not None:
+            self._histogram.add([entry["amount"] for entry in new])
+        if self._searchIndex is not None:
+            self._searchIndex.add(new)
+        self.changedMonths(new)
+        self.last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.version += 1
+        self.saveJson()
+        self.notifyListeners(new)
+
+    @staticmethod
+    def validEntry(entry: dict) -> dict:
+        """
+        Validate an entry given to newEntries ("amount" must be a positive integer, "date" a valid "YYYY-MM-DD").
+        Returns the entry as it is stored.
+        """
+        try:
+            amount = int(entry["amount"])
+
+            if amount < 0:
+                raise ValueError("Amount must be a positive number.")
+        except ValueError:
+            raise ValueError(f"Amount must be a valid integer: {entry!r}")
+        OTDStorage.validDate(entry["date"])
+        return OTData(entry["date"], amount, entry.get("reason"), entry.get("by"), entry.get("person")).to_dict()
+
+    @staticmethod
+    def validDate(date: str) -> str:
+        """
+        Validate a date: it must be a "YYYY-MM-DD" string of a day that exists (not "2024-5-3" or "2024-02-30"),
+        as the entries are sorted and searched by their date strings. Returns the date.
+        """
+        try:
+            if datetime.fromisoformat(date).date().isoformat() == date:
+                return date
+        except (TypeError, ValueError):
+            pass
+        raise ValueError(f"Date must be a valid YYYY-MM-DD date: {date!r}")
+
+    def monthBounds(self, month: str) -> tuple[int, int]:
+        """
+        Get the index range of the entries of a specific month ("YYYY-MM").
+        """
+        lo = bisect_left(self.entries, month, key=entryDate)
+        hi = bisect_left(self.entries, month + "\x7f", lo=lo, key=entryDate)  # After every "YYYY-MM-DD" of the month
+        return lo, hi
+
+    def changedMonths(self, entries: list[dict]):
+        """
+        Mark the months of changed entries, so their hashes are computed again by monthHashes.
+        """
+        if self._monthHashes is not None:
+            self._dirtyMonths.update(entry["date"][:7] for entry in entries)
+
+    def monthHashes(self, hasher) -> dict:
+        """
+        Get the hash of the entries of every month ("YYYY-MM" -> hasher(entries of the month), see src/sync.py).
+        The hashes are kept, so only the months changed since the last call are hashed again.
+        """
+        if self._monthHashes is None or self._monthHasher != hasher:
+            months = {}
+            for entry in self.entries:
+                months.setdefault(entry["date"][:7], []).append(entry)
+            self._monthHashes = {month: hasher(entries) for month, entries in months.items()}
+            self._monthHasher = hasher
+        else:
+            for month in self._dirtyMonths:
+                entries = self.monthEntries(month)
+                if entries:
+                    self._monthHashes[month] = hasher(entries)
+                else:
+                    self._monthHashes.pop(month, None)
+        self._dirtyMonths = set()
+        return dict(self._monthHashes)
+
+    def monthEntries(self, month: str) -> list[dict]:
+        """
+        Get the entries of a specific month ("YYYY-MM").
+        """
+        lo, hi = self.monthBounds(month)
+        return self.entries[lo:hi]
+
+    def replaceMonth(self, month: str, entries: list[dict]):
+        """
+        Replace all entries of a specific month ("YYYY-MM") with the given entries.
+        The json data will be updated after running this function, but it is not saved.
+        """
+        lo, hi = self.monthBounds(month)
+        removed = self.entries[lo:hi]
+        self.entries[lo:hi] = sorted(entries, key=entryDate)
+        self.total = len(self.entries)
+        self._histogram = None
+        self._searchIndex = None
+        self.changedMonths(removed + self.entries[lo:lo + len(entries)])
+        if self.history is not None:
+            self.history.record(self.entries[lo:lo + len(entries)], removed)
+        self.last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.version += 1
+
+    def changeEntries(self, added: list[dict], removed: list[dict]):
+        """
+        Remove entries (equal to the given ones) and add others, as one change, used by undo and redo (see src/history.py).
+        The entries to remove that are not found are skipped. The JSON file is saved once.
+        """
+        added = [self.validEntry(entry) for entry in added]
+        drop = set()
+        for entry in removed:
+            lo = bisect_left(self.entries, entry["date"], key=entryDate)
+            hi = bisect_right(self.entries, entry["date"], lo=lo, key=entryDate)
+            for i in range(lo, hi):
+                if i not in drop and self.entries[i] == entry:
+                    drop.add(i)
+                    break
+        gone = [self.entries[i] for i in sorted(drop)]
+        if drop:
+            # Rebuild only the span of the removed entries
+            lo, hi = min(drop), max(drop) + 1
+            self.entries[lo:hi] = [entry for i, entry in enumerate(self.entries[lo:hi], lo) if i not in drop]
+        if added:
+            self.entries.extend(sorted(added, key=entryDate))
+            self.entries.sort(key=entryDate)
+        self.total = len(self.entries)
+        if self._histogram is not None:
+            self._histogram.remove([entry["amount"] for entry in gone])
+            self._histogram.add([entry["amount"] for entry in added])
+        self._searchIndex = None  # The index cannot remove entries, it is built again when needed
+        self.changedMonths(added + gone)
+        if self.history is not None:
+            self.history.record(added, gone)
         self.last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.version += 1
         self.saveJson()
+        self.notifyListeners(added)
 
     def lastDate(self) -> str:
         """
@@ -321,9 +744,7 @@ class OTDStorage:
         """
         if not self.entries:
             return None
-        # Find the latest date in the entries (as the data may not be sorted)
-        latest_entry = max(self.entries, key=lambda x: x["date"])
-        return latest_entry["date"]
+        return self.entries[-1]["date"]
     
     def firstDate(self) -> str:
         """
@@ -331,6 +752,4 @@ class OTDStorage:
         """
         if not self.entries:
             return None
-        # Find the earliest date in the entries (as the data may not be sorted)
-        earliest_entry = min(self.entries, key=lambda x: x["date"])
-        return earliest_entry["date"]
\ No newline at end of file
+        return self.entries[0]["date"]
\ No newline at end of file
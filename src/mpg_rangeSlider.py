@@ -9,15 +9,18 @@ class RangeSlider(QWidget):
 
     A range slider allows the user to select a range of values by dragging two handles along a track.
     By default, the range slider is horizontal, but it can be set to vertical mode.
-    When the user drag the slider, it will change the values of the slider returned and emit a signal called valuesChanged with the selected values. 
+    When the user drag the slider, it will change the values of the slider returned and emit a signal called valuesChanged with the selected values.
     When the user drag either end of the slider while holding shift, it will change the range of the slider selected. So the user can select a different range of values.
     A rangeChanged signal is also emitted during such operation.
 
-    The range slider has a minimum and maximum value, which can be set using the setRange method.
+    The range slider has a minimum and maximum value, which can be set using the setGlobalRange method.
     """
     rangeChanged = Signal(int, int, name="rangeChanged")
     valuesChanged = Signal(int, int, name="valuesChanged")
 
+    handleSize = 12
+    trackHeight = 6
+
     def __init__(self, parent=None, width = 300, height = 50, startValue=0, endValue=100, defaultRange=(0,10)):
         super().__init__(parent)
         self.setMinimumSize(width, height)
@@ -25,6 +28,19 @@ class RangeSlider(QWidget):
         self.endValue = endValue
         self.range = defaultRange
         self.sos = QStyleOptionSlider()
+        self.orientation = Qt.Horizontal
+
+        # The state of the current drag: which part is dragged, where it started, and the range at that time
+        self.dragging = None
+        self.dragOrigin = 0
+        self.dragRange = self.range
+
+    def setOrientation(self, orientation):
+        """
+        Set the orientation of the slider (Qt.Horizontal or Qt.Vertical).
+        """
+        self.orientation = orientation
+        self.update()
 
     def setGlobalRange(self, startValue, endValue):
         """
@@ -40,10 +56,117 @@ class RangeSlider(QWidget):
         """
         self.range = (startValue, endValue)
         self.update()
-        self.rangeChanged.emit(self.range)
+        self.rangeChanged.emit(*self.range)
+
+    def values(self) -> tuple:
+        """
+        Get the selected values of the slider.
+        """
+        return self.range
+
+    def sizeHint(self):
+        return QSize(300, 50) if self.orientation == Qt.Horizontal else QSize(50, 300)
+
+    ### Geometry ###
+    def trackLength(self) -> float:
+        length = self.width() if self.orientation == Qt.Horizontal else self.height()
+        return max(length - self.handleSize, 1)
+
+    def valueToPos(self, value) -> float:
+        """
+        Convert a value to a position (in pixels) along the track.
+        """
+        span = max(self.endValue - self.startValue, 1)
+        return self.handleSize / 2 + (value - self.startValue) / span * self.trackLength()
+
+    def posToValue(self, pos) -> int:
+        """
+        Convert a position (in pixels) along the track to a value.
+        """
+        span = self.endValue - self.startValue
+        value = self.startValue + (pos - self.handleSize / 2) / self.trackLength() * span
+        return round(min(max(value, self.startValue), self.endValue))
+
+    def eventPos(self, event) -> float:
+        point = event.position()
+        return point.x() if self.orientation == Qt.Horizontal else point.y()
+
+    def rectAlong(self, start, end, thickness) -> QRectF:
+        """
+        A rectangle from start to end along the track, centered across it.
+        """
+        if self.orientation == Qt.Horizontal:
+            return QRectF(start, (self.height() - thickness) / 2, end - start, thickness)
+        return QRectF((self.width() - thickness) / 2, start, thickness, end - start)
+
+    ### Painting ###
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        palette = self.palette()
+
+        # The track
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(QBrush(palette.mid()))
+        painter.drawRoundedRect(self.rectAlong(self.handleSize / 2, self.handleSize / 2 + self.trackLength(), self.trackHeight), 3, 3)
+
+        # The selected range
+        low, high = (self.valueToPos(value) for value in self.range)
+        painter.setBrush(QBrush(palette.highlight()))
+        painter.drawRect(self.rectAlong(low, high, self.trackHeight))
+
+        # The two handles
+        painter.setPen(QPen(palette.dark().color(), 1))
+        painter.setBrush(QBrush(palette.button()))
+        for pos in (low, high):
+            painter.drawEllipse(self.rectAlong(pos - self.handleSize / 2, pos + self.handleSize / 2, self.handleSize))
+        painter.end()
+
+    ### Dragging ###
+    def mousePressEvent(self, event):
+        if event.button() != Qt.LeftButton:
+            return super().mousePressEvent(event)
+        pos = self.eventPos(event)
+        low, high = (self.valueToPos(value) for value in self.range)
+        if abs(pos - low) <= self.handleSize / 2 and abs(pos - low) <= abs(pos - high):
+            self.dragging = "low"
+        elif abs(pos - high) <= self.handleSize / 2:
+            self.dragging = "high"
+        elif low < pos < high:
+            self.dragging = "span"
+        else:
+            self.dragging = None
+            return super().mousePressEvent(event)
+        self.dragOrigin = pos
+        self.dragRange = self.range
+        event.accept()
 
     def mouseMoveEvent(self, event):
-        return super().mouseMoveEvent(event)
+        if self.dragging is None:
+            return super().mouseMoveEvent(event)
+        low, high = self.dragRange
+        resizing = self.dragging != "span" and bool(event.modifiers() & Qt.ShiftModifier)
+
+        if resizing and self.dragging == "low":
+            low = min(self.posToValue(self.eventPos(event)), high)
+        elif resizing and self.dragging == "high":
+            high = max(self.posToValue(self.eventPos(event)), low)
+        else:
+            # Move the whole selection, keeping its width and staying inside the global range
+            delta = round((self.eventPos(event) - self.dragOrigin) / self.trackLength() * (self.endValue - self.startValue))
+            delta = min(max(delta, self.startValue - low), self.endValue - high)
+            low, high = low + delta, high + delta
 
+        if (low, high) != self.range:
+            self.range = (low, high)
+            self.update()
+            if resizing:
+                self.rangeChanged.emit(low, high)
+            self.valuesChanged.emit(low, high)
+        event.accept()
 
-    
\ No newline at end of file
+    def mouseReleaseEvent(self, event):
+        if self.dragging is None:
+            return super().mouseReleaseEvent(event)
+        self.dragging = None
+        event.accept()
@@ -0,0 +1,425 @@
+# The graph dialogs of app.py, in their own module so that matplotlib and QtCharts are only imported
+# the first time a graph is opened, instead of when the application starts.
+from datetime import datetime
+
+import matplotlib.dates as mdates
+import numpy as np
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qtagg import NavigationToolbar2QT as NavigationToolbar
+from matplotlib.figure import Figure
+from PySide6.QtCharts import QChart, QChartView, QLineSeries, QValueAxis, QDateTimeAxis
+from PySide6.QtCore import Qt, QDateTime, QPointF, QTimer
+from PySide6.QtGui import QPainter, QFont
+from PySide6.QtWidgets import QPushButton, QVBoxLayout, QHBoxLayout, QLabel, QDialog, QSpinBox
+
+from src.mpg_rangeSlider import RangeSlider
+from src.plot_lod import PlotLOD
+from src.plotting import OTPlot
+from src.profiling import instrument
+
+
+class PlotDialog(QDialog):
+    """
+    A dialog to display a plot of the OT records using matplotlib.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("OT 記錄圖表")
+        self.setMinimumSize(960, 640)  # Set minimum size for the dialog
+
+        # Create a layout for the dialog
+        layout = QVBoxLayout()
+        
+        # Set the font for matplotlib
+        OTPlot.setupFonts()
+
+        # Create a figure and canvas for matplotlib (not tracked by pyplot, so it is freed with the dialog)
+        self.figure = Figure()
+        self.ax = self.figure.add_subplot()
+        self.canvas = FigureCanvas(self.figure)
+        # Create a toolbar for navigation
+        self.toolbar = NavigationToolbar(self.canvas, self)
+
+        # A range slider (in days since the first entry) to select the date window, with the totals of the window
+        self.slider = RangeSlider(height=30)
+        self.slider.setToolTip("拖動選取範圍以移動日期窗口，按住 Shift 拖動兩端以改變範圍")
+        self.slider.valuesChanged.connect(self.onWindowChanged)
+        self.windowLabel = QLabel()
+        self.windowLabel.setAlignment(Qt.AlignCenter)
+
+        # Coalesce the slider updates to at most one redraw per frame
+        self.windowTimer = QTimer(self)
+        self.windowTimer.setSingleShot(True)
+        self.windowTimer.setInterval(16)
+        self.windowTimer.timeout.connect(self.applyWindow)
+
+        layout.addWidget(self.toolbar)
+        layout.addWidget(self.canvas)
+        layout.addWidget(self.slider)
+        layout.addWidget(self.windowLabel)
+
+        # Set the layout for the dialog
+        self.setLayout(layout)
+
+        # The dates (Matplotlib date numbers) and the minutes of every day, not x and y which are QWidget methods
+        self.dateNums = np.empty(0)
+        self.minutes = np.empty(0)
+        self.cumulative = np.zeros(1)
+        self.pointLabels = []
+        self.background = None
+
+        # Recompute the level of detail when resizing (and, see plot, when zooming or panning)
+        self.canvas.mpl_connect("resize_event", lambda event: self.updateLevelOfDetail())
+
+        # Connect the hover event
+        self.canvas.mpl_connect("draw_event", self.onDraw)
+        self.canvas.mpl_connect("motion_notify_event", self.onHover)
+
+    labelThreshold = 60  # Only label the points when at most this many are visible
+
+    @instrument
+    def plot(self, data):
+        self.render(self.prepare(data))
+
+    @staticmethod
+    @instrument
+    def prepare(data) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Prepare data for the graph, with the running totals used to sum any date window.
+        It does not touch the dialog, so it can run on a worker thread (see ViewCache in app.py).
+        """
+        x, y = OTPlot.timeSeriesData(data)
+        return x, y, np.concatenate(([0], np.cumsum(y)))
+
+    @instrument
+    def render(self, prepared):
+        """
+        Draw the data returned by prepare.
+        """
+        # Start from empty axes, as the dialog may be reused for new data
+        self.ax.clear()
+        self.background = None
+
+        self.dateNums, self.minutes, self.cumulative = prepared
+        self.pointLabels = []
+
+        # Create the plot (the line data is replaced by the level-of-detail data below)
+        self.line = OTPlot.timeSeries(self.ax, self.dateNums, self.minutes)
+
+        # Add a cursor and label for snapping, they are animated so that only they are redrawn (blitted) on hover
+        self.cursor, = self.ax.plot([], [], 'ro', animated=True)  # Red dot for the cursor
+        self.hoverLabel = self.ax.text(0, 0, "", fontsize=9, color="red", ha="center", va="bottom", visible=False, animated=True, clip_on=True)
+
+        self.figure.tight_layout()
+
+        # Recompute the level of detail when zooming or panning from the toolbar (clearing the axes drops the callback)
+        self.ax.callbacks.connect("xlim_changed", lambda ax: self.updateLevelOfDetail())
+        self.updateLevelOfDetail()
+
+        # Select the whole history with the range slider
+        days = int(self.dateNums[-1] - self.dateNums[0]) if len(self.dateNums) else 0
+        self.slider.setGlobalRange(0, days)
+        self.slider.setRange(0, days)
+        self.updateWindowLabel(0, days)
+
+    def onWindowChanged(self, low: int, high: int):
+        """
+        Remember the latest window of the range slider, it is applied on the next frame.
+        """
+        self.pendingWindow = (low, high)
+        if not self.windowTimer.isActive():
+            self.windowTimer.start()
+
+    @instrument
+    def applyWindow(self):
+        """
+        Show the latest window of the range slider.
+        """
+        if not len(self.dateNums):
+            return
+        low, high = self.pendingWindow
+        self.ax.set_xlim(self.dateNums[0] + low - 0.5, self.dateNums[0] + high + 0.5)  # Triggers the level-of-detail update
+        self.updateWindowLabel(low, high)
+
+    def updateWindowLabel(self, low: int, high: int):
+        """
+        Show the dates and the totals of a window (in days since the first entry), using the running totals.
+        """
+        if not len(self.dateNums):
+            self.windowLabel.setText("")
+            return
+        start, end = self.dateNums[0] + low, self.dateNums[0] + high
+        lo = int(np.searchsorted(self.dateNums, start, side="left"))
+        hi = int(np.searchsorted(self.dateNums, end, side="right"))
+        self.windowLabel.setText(f"{mdates.num2date(start).strftime('%Y-%m-%d')} ~ {mdates.num2date(end).strftime('%Y-%m-%d')}    "
+                                 f"OT 總時長: {self.cumulative[hi] - self.cumulative[lo]:.0f} 分鐘    "
+                                 f"OT 總次數: {hi - lo} 次")
+
+    def nearestIndex(self, xdata: float) -> int:
+        """
+        Find the index of the data point closest to xdata, by bisecting the sorted date numbers.
+        """
+        i = int(np.searchsorted(self.dateNums, xdata))
+        if i == 0:
+            return 0
+        if i == len(self.dateNums):
+            return i - 1
+        return i if self.dateNums[i] - xdata < xdata - self.dateNums[i - 1] else i - 1
+
+    def onDraw(self, event):
+        """
+        Cache the background of the axes after a full redraw, then draw the cursor on top of it.
+        """
+        if not len(self.dateNums):
+            return
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.cursor)
+        self.ax.draw_artist(self.hoverLabel)
+
+    def onHover(self, event):
+        """
+        Snap the cursor to the closest data point and show its label.
+        """
+        if self.background is None or not len(self.dateNums):
+            return
+        if event.inaxes == self.ax:
+            i = self.nearestIndex(event.xdata)
+            self.cursor.set_data([self.dateNums[i]], [self.minutes[i]])
+            self.hoverLabel.set_position((event.xdata, event.ydata))
+            self.hoverLabel.set_text(f"{mdates.num2date(self.dateNums[i]).strftime('%Y-%m-%d')}\n{self.minutes[i]:.0f} mins")
+            self.hoverLabel.set_visible(True)
+        elif self.hoverLabel.get_visible():
+            self.cursor.set_data([], [])
+            self.hoverLabel.set_visible(False)
+        else:
+            return
+
+        # Only redraw the cursor and the label over the cached background
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.cursor)
+        self.ax.draw_artist(self.hoverLabel)
+        self.canvas.blit(self.ax.bbox)
+
+    @instrument
+    def updateLevelOfDetail(self):
+        """
+        Downsample the visible part of the data to the pixel width of the plot,
+        and only show the point labels and markers when few points are visible.
+        """
+        if not len(self.dateNums):
+            return
+        xmin, xmax = self.ax.get_xlim()
+        visible = PlotLOD.visibleSlice(self.dateNums, xmin, xmax)
+        x, y = self.dateNums[visible], self.minutes[visible]
+
+        pixels = max(int(self.ax.bbox.width), 100)
+        if len(x) > pixels:
+            indices = PlotLOD.lttb(x, y, pixels)
+            x, y = x[indices], y[indices]
+        self.line.set_data(x, y)
+        self.line.set_marker('o' if len(x) <= pixels // 4 else 'None')
+
+        for text in self.pointLabels:
+            text.remove()
+        self.pointLabels = []
+        if len(x) <= self.labelThreshold:
+            self.pointLabels = OTPlot.pointLabels(self.ax, x, y)
+
+        self.canvas.draw_idle()
+
+class HistogramDialog(QDialog):
+    """
+    A dialog to display a histogram of the OT records using matplotlib.
+
+    The histogram is drawn from the per-minute counts of a MinuteHistogram, so changing the bin width
+    only re-aggregates the counts and updates the bars in place.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("OT 記錄 Histogram")
+        self.setMinimumSize(960, 640)  # Set minimum size for the dialog
+
+        # Create a layout for the dialog
+        layout = QVBoxLayout()
+        
+        # Set the font for matplotlib
+        OTPlot.setupFonts()
+
+        # Create a figure and canvas for matplotlib (not tracked by pyplot, so it is freed with the dialog)
+        self.figure = Figure()
+        self.ax = self.figure.add_subplot()
+        self.canvas = FigureCanvas(self.figure)
+        # Create a toolbar for navigation
+        self.toolbar = NavigationToolbar(self.canvas, self)
+
+        # The bin width control
+        binLayout = QHBoxLayout()
+        binLayout.addWidget(QLabel("Bin 寬度 (分鐘):"))
+        self.binWidth = QSpinBox()
+        self.binWidth.setRange(1, 24 * 60)
+        self.binWidth.valueChanged.connect(lambda value: self.redraw())  # redraw reads the value itself
+        binLayout.addWidget(self.binWidth)
+        binLayout.addStretch()
+
+        layout.addWidget(self.toolbar)
+        layout.addLayout(binLayout)
+        layout.addWidget(self.canvas)
+
+        # Set the layout for the dialog
+        self.setLayout(layout)
+
+        self.histogram = None
+        self.bars = None
+
+    @instrument
+    def plot(self, histogram):
+        """
+        Plot the histogram of the OT records.
+        """
+        # Start from empty axes, as the dialog may be reused for new data
+        self.ax.clear()
+        self.bars = None
+        self.histogram = histogram
+        OTPlot.histogramLabels(self.ax)
+
+        # Start with about 30 bins, without redrawing twice
+        self.binWidth.blockSignals(True)
+        self.binWidth.setValue(histogram.defaultWidth(bins=30))
+        self.binWidth.blockSignals(False)
+        self.redraw()
+
+        self.figure.tight_layout()
+
+    @instrument
+    def redraw(self):
+        """
+        Rebin the histogram with the current bin width, updating the existing bars when possible.
+        """
+        if self.histogram is None:
+            return
+        edges, heights = self.histogram.rebin(self.binWidth.value())
+
+        if self.bars is not None and len(self.bars) == len(heights):
+            for bar, left, width, height in zip(self.bars, edges[:-1], np.diff(edges), heights):
+                bar.set_x(left)
+                bar.set_width(width)
+                bar.set_height(height)
+        else:
+            if self.bars is not None:
+                self.bars.remove()
+            self.bars = OTPlot.histogramBars(self.ax, edges, heights)
+
+        self.ax.set_xlim(0, max(edges[-1], 1))
+        self.ax.set_ylim(0, max(heights.max(initial=0), 1) * 1.05)
+        self.canvas.draw_idle()
+
+class ChartDialog(QDialog):
+    """
+    A dialog to display a time-based graph of the OT records using QtCharts.
+
+    The points are loaded in bulk with QLineSeries.replace, the tick counts are capped,
+    and the animations and point labels are turned off when there are many points.
+    New entries added to the storage while the dialog is open are appended to the series.
+    """
+    detailThreshold = 200  # Above this number of points, animations and point labels are turned off
+    maxTickCount = 15
+
+    def __init__(self, storage, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("OT 記錄圖表")
+        self.storage = storage
+        self.msecsCache = {}  # date string -> msecs since epoch, the dates repeat a lot in large data
+
+        self.series = QLineSeries()
+        self.series.setPointLabelsFormat("@yPoint mins")  # Format for point labels
+        self.series.setPointLabelsFont(QFont("Arial", 10))
+        self.series.setPointLabelsColor("#4b006e")
+        self.series.setPointLabelsClipping(False)  # Ensure labels are fully visible
+
+        # Create the chart
+        self.chart = QChart()
+        self.chart.addSeries(self.series)
+        self.chart.setTitle("OT 時間記錄")
+
+        self.axisX = QDateTimeAxis()
+        self.axisX.setTitleText("日期")
+        self.axisX.setFormat("yyyy-MM-dd")  # Set the date format
+        self.axisX.setLabelsAngle(-90)  # Rotate the labels for better readability
+        self.chart.addAxis(self.axisX, Qt.AlignBottom)
+        self.series.attachAxis(self.axisX)
+
+        self.axisY = QValueAxis()
+        self.axisY.setTitleText("OT 時長 (分鐘)")
+        self.axisY.setLabelFormat("%d")
+        self.chart.addAxis(self.axisY, Qt.AlignLeft)
+        self.series.attachAxis(self.axisY)
+
+        # Create a chart view
+        chart_view = QChartView(self.chart)
+        chart_view.setRenderHint(QPainter.Antialiasing)
+        chart_view.setMinimumSize(960, 640)  # Set minimum size for the chart view
+
+        layout = QVBoxLayout()
+        layout.addWidget(chart_view)
+        close_button = QPushButton("關閉")
+        close_button.clicked.connect(self.close)
+        layout.addWidget(close_button)
+        self.setLayout(layout)
+
+        self.storage.addListener(self.appendEntries)
+        self.finished.connect(lambda result: self.storage.removeListener(self.appendEntries))
+
+    def toPoints(self, entries) -> list:
+        """
+        Convert entries to chart points, each distinct date is only parsed once.
+        """
+        points = []
+        for entry in entries:
+            msecs = self.msecsCache.get(entry['date'])
+            if msecs is None:
+                msecs = self.msecsCache[entry['date']] = datetime.fromisoformat(entry['date']).timestamp() * 1000  # Local midnight
+            points.append(QPointF(msecs, entry['amount']))
+        return points
+
+    @instrument
+    def load(self, data):
+        """
+        Replace all the points of the series with the (sorted) data.
+        """
+        self.maxAmount = max((entry['amount'] for entry in data), default=0)
+        self.series.replace(self.toPoints(data))
+        self.updateDetail()
+
+    @instrument
+    def appendEntries(self, entries):
+        """
+        Append new entries to the series, or reload everything if they are not after the last point.
+        """
+        points = sorted(self.toPoints(entries), key=lambda point: point.x())
+        count = self.series.count()
+        if count and points and points[0].x() < self.series.at(count - 1).x():
+            self.load(self.storage.entries)
+            return
+        self.maxAmount = max([self.maxAmount] + [point.y() for point in points])
+        self.series.append(points)
+        self.updateDetail()
+
+    def updateDetail(self):
+        """
+        Update the axes, and turn the animations and point labels on or off depending on the number of points.
+        """
+        count = self.series.count()
+        detailed = count <= self.detailThreshold
+        self.chart.setAnimationOptions(QChart.AllAnimations if detailed else QChart.NoAnimation)
+        self.series.setPointLabelsVisible(detailed)  # Show point labels
+
+        if count == 0:
+            return
+        minDate = QDateTime.fromMSecsSinceEpoch(int(self.series.at(0).x()))
+        maxDate = QDateTime.fromMSecsSinceEpoch(int(self.series.at(count - 1).x()))
+        self.axisX.setTickCount(min(minDate.daysTo(maxDate) + 3, self.maxTickCount))
+        self.axisX.setRange(minDate.addDays(-1), maxDate.addDays(1))  # Set the range of the x-axis
+        self.axisY.setTickCount(min(count + 1, self.maxTickCount))
+        self.axisY.setRange(0, self.maxAmount + 10)  # Add some padding
@@ -0,0 +1,46 @@
+import numpy as np
+
+class PlotLOD:
+    """
+    Level-of-detail helpers for plotting long time series.
+
+    Only the points inside the visible x range are kept, and they are downsampled to about one point per pixel,
+    so the cost of drawing depends on the size of the plot instead of the length of the history.
+    """
+
+    @staticmethod
+    def visibleSlice(x: np.ndarray, xmin: float, xmax: float) -> slice:
+        """
+        Returns the slice of a sorted x array that is visible between xmin and xmax,
+        including one point on each side so that the line reaches the edges of the plot.
+        """
+        start = max(int(np.searchsorted(x, xmin, side="left")) - 1, 0)
+        stop = min(int(np.searchsorted(x, xmax, side="right")) + 1, len(x))
+        return slice(start, stop)
+
+    @staticmethod
+    def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+        """
+        Largest-Triangle-Three-Buckets downsampling.
+        Returns the indices of at most threshold points that keep the visual shape of the series.
+        """
+        n = len(x)
+        if threshold >= n or threshold < 3:
+            return np.arange(n)
+
+        edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+        selected = np.empty(threshold, dtype=np.int64)
+        selected[0] = 0
+        selected[-1] = n - 1
+        previous = 0
+        for i in range(threshold - 2):
+            start, stop = edges[i], edges[i + 1]
+            # The average point of the next bucket is the third corner of the triangle
+            nextStart, nextStop = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+            avgX = x[nextStart:nextStop].mean() if nextStop > nextStart else x[-1]
+            avgY = y[nextStart:nextStop].mean() if nextStop > nextStart else y[-1]
+            areas = np.abs((x[previous] - avgX) * (y[start:stop] - y[previous])
+                           - (x[previous] - x[start:stop]) * (avgY - y[previous]))
+            previous = start + int(np.argmax(areas))
+            selected[i + 1] = previous
+        return selected
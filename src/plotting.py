@@ -0,0 +1,115 @@
+import matplotlib
+import matplotlib.dates as mdates
+import numpy as np
+from matplotlib.dates import DateFormatter
+
+from src.profiling import instrumented
+from src.sdbucket import SDBucket
+
+@instrumented
+class OTPlot:
+    """
+    The matplotlib drawing of the OT records, shared by the dialogs in app.py and the headless reports.
+
+    The functions only draw on a given Axes, they do not depend on Qt or on a specific backend.
+    """
+
+    @staticmethod
+    def setupFonts():
+        """
+        Set the font for matplotlib.
+        """
+        matplotlib.rcParams['font.family'] = 'Microsoft JhengHei'
+        matplotlib.rcParams['font.size'] = 10.5
+
+    @staticmethod
+    def timeSeriesData(data) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the date numbers and the amounts of the entries as arrays.
+        """
+        days = SDBucket.toDays(entry['date'] for entry in data)
+        return mdates.date2num(days), np.asarray([entry['amount'] for entry in data], dtype=np.float64)
+
+    @staticmethod
+    def timeSeries(ax, x: np.ndarray, y: np.ndarray):
+        """
+        Draw the time series of the OT records. Returns the line.
+        """
+        # Create the plot
+        line, = ax.plot(x, y, marker='o', linestyle='-', color='b', label='OT 時長')
+        ax.xaxis_date()
+
+        # Format the x-axis, the locator adapts to the visible date span
+        ax.xaxis.set_major_formatter(DateFormatter("%Y-%m-%d"))
+        ax.xaxis.set_major_locator(mdates.AutoDateLocator(minticks=3, maxticks=15))
+        ax.tick_params(axis='x', labelrotation=45)
+
+        # Add labels and title
+        ax.set_title("OT 時間記錄", fontsize=16)
+        ax.set_xlabel("日期", fontsize=12)
+        ax.set_ylabel("OT 時長 (分鐘)", fontsize=12)
+        ax.legend()
+
+        # Add grid for better readability
+        ax.grid(True, linestyle='--', alpha=0.6)
+        return line
+
+    @staticmethod
+    def pointLabels(ax, x, y) -> list:
+        """
+        Add labels to each data point. Returns the text artists.
+        """
+        return [ax.text(date, length + 1, f"{length:.0f}", fontsize=9, ha='center', va='bottom', color='black')
+                for date, length in zip(x, y)]
+
+    @staticmethod
+    def histogram(ax, lengths, bins=30):
+        """
+        Draw the histogram of the OT records. Returns the bar container.
+        """
+        # Create the histogram
+        _, _, bars = ax.hist(lengths, bins=bins, color='blue', alpha=0.7, edgecolor='black')
+        OTPlot.histogramLabels(ax)
+        return bars
+
+    @staticmethod
+    def histogramBars(ax, edges, heights):
+        """
+        Draw already counted histogram bins (as given by MinuteHistogram.rebin). Returns the bar container.
+        """
+        return ax.bar(edges[:-1], heights, width=np.diff(edges), align='edge', color='blue', alpha=0.7, edgecolor='black')
+
+    @staticmethod
+    def histogramLabels(ax):
+        """
+        Add the labels, the title and the grid of the histogram.
+        """
+        ax.set_title("OT 時間 Histogram", fontsize=16)
+        ax.set_xlabel("OT 時長 (分鐘)", fontsize=12)
+        ax.set_ylabel("次數", fontsize=12)
+
+        # Add grid for better readability
+        ax.grid(True, linestyle='--', alpha=0.6)
+
+    @staticmethod
+    def statsTable(ax, storage):
+        """
+        Draw a table of the statistics of an OTDStorage.
+        """
+        def div(x, y):
+            return x / y if y != 0 else 0
+
+        rows = [
+            ["OT 總時長", f"{storage.totalLength} 分鐘"],
+            ["OT 總次數", f"{storage.total} 次"],
+            ["平均每次 OT 時長", f"{div(storage.totalLength, storage.total):.2f} 分鐘"],
+            ["OT 中位數", f"{storage.median()} 分鐘"],
+            ["OT 標準差", f"{storage.standardDeviation():.2f} 分鐘"],
+            ["OT 最長時長", f"{storage.maximumLength()} 分鐘"],
+            ["OT 最短時長", f"{storage.minimumLength()} 分鐘"],
+        ]
+        ax.axis('off')
+        ax.set_title("OT 記錄統計", fontsize=16)
+        table = ax.table(cellText=rows, loc='center', cellLoc='left')
+        table.scale(1, 1.4)
+        return table
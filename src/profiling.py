@@ -0,0 +1,183 @@
+# Timing instrumentation of the hot paths (OTDStorage, SDTime, OTPlot and the graph dialogs).
+#
+# It is turned on with the OT_PROFILE environment variable (or "python app.py --profile"), which must be set
+# before the src modules are imported, as their methods are wrapped when the classes are defined:
+#   - OT_PROFILE=1        count the calls and time them, the report is printed and dumped when the program exits;
+#   - OT_PROFILE=cprofile run the whole session under cProfile (main thread only), the stats are printed and dumped when it exits.
+# The report is written to OT_PROFILE_OUT (default "ot-profile.json"), as CSV if the name ends with ".csv",
+# and the cProfile stats to "ot-profile.prof".
+# When it is off, the decorators return the functions and classes unchanged, so there is no overhead at all.
+import atexit
+import csv
+import functools
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+mode = os.environ.get("OT_PROFILE", "").strip().lower()
+enabled = mode not in ("", "0", "off", "false", "cprofile")
+cProfileEnabled = mode == "cprofile"
+outputFile = os.environ.get("OT_PROFILE_OUT", "ot-profile.json")
+
+sampleSize = 10_000  # The latest call durations kept per function for the percentiles
+
+
+class CallStats:
+    """
+    The call count, total and max duration (in nanoseconds) of an instrumented function, and the durations of its
+    latest calls, so the memory stays the same however long the program runs.
+    """
+    __slots__ = ("calls", "total", "max", "samples", "lock")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0
+        self.max = 0
+        self.samples = deque(maxlen=sampleSize)
+        self.lock = threading.Lock()  # Workers can record too
+
+    def add(self, duration: int):
+        with self.lock:
+            self.calls += 1
+            self.total += duration
+            if duration > self.max:
+                self.max = duration
+            self.samples.append(duration)
+
+
+durations = {}  # name -> CallStats
+
+
+def instrument(fn=None, name: str = None):
+    """
+    Decorator that times every call of a function under a name (by default its qualified name).
+    Qt cannot see the parameters of a function through the wrapper, so a slot that does not take the arguments
+    of its signal is given them anyway: connect it through a lambda (e.g. valueChanged to redraw).
+    """
+    if fn is None:
+        return functools.partial(instrument, name=name)
+    if not enabled:
+        return fn
+    stats = durations.setdefault(name or fn.__qualname__, CallStats())
+
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        start = time.perf_counter_ns()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            stats.add(time.perf_counter_ns() - start)
+    return timed
+
+
+def instrumented(cls):
+    """
+    Class decorator that instruments every public method of a class, including static methods and class methods.
+    The getters of properties are left out, as most of them only read a field and timing them would cost more than
+    they do; a getter that does real work is instrumented with @instrument under its @property.
+    """
+    if not enabled:
+        return cls
+    for attr, value in list(vars(cls).items()):
+        if attr.startswith("_"):
+            continue
+        name = f"{cls.__name__}.{attr}"
+        if isinstance(value, (staticmethod, classmethod)) and inspect.isfunction(value.__func__):
+            setattr(cls, attr, type(value)(instrument(value.__func__, name=name)))
+        elif inspect.isfunction(value):
+            setattr(cls, attr, instrument(value, name=name))
+    return cls
+
+
+def percentile(values: list, q: float) -> float:
+    """
+    Get the q-th percentile (0-100) of sorted values, by nearest rank.
+    """
+    if not values:
+        return 0.0
+    return values[min(max(math.ceil(q / 100 * len(values)) - 1, 0), len(values) - 1)]
+
+
+def report() -> list[dict]:
+    """
+    Get the call count and the latency percentiles (in milliseconds) of every instrumented function that was called,
+    the slowest in total first. The percentiles are of the latest sampleSize calls.
+    """
+    rows = []
+    for name, stats in durations.items():
+        with stats.lock:
+            calls, total, longest, values = stats.calls, stats.total, stats.max, sorted(stats.samples)
+        if not calls:
+            continue
+        rows.append({
+            "name": name,
+            "calls": calls,
+            "total_ms": total / 1e6,
+            "mean_ms": total / calls / 1e6,
+            "p50_ms": percentile(values, 50) / 1e6,
+            "p90_ms": percentile(values, 90) / 1e6,
+            "p99_ms": percentile(values, 99) / 1e6,
+            "max_ms": longest / 1e6,
+        })
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+    return rows
+
+
+def dump(filename: str = None) -> str:
+    """
+    Write the report to a JSON file, or a CSV file if the name ends with ".csv".
+    Returns the name of the file.
+    """
+    filename = filename or outputFile
+    rows = report()
+    if filename.lower().endswith(".csv"):
+        with open(filename, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["name", "calls", "total_ms", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"])
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(filename, "w") as f:
+            json.dump(rows, f, indent=4)
+    return filename
+
+
+def printReport(limit: int = 20):
+    """
+    Print the slowest instrumented functions.
+    """
+    print(f"{'function':<40} {'calls':>8} {'total ms':>10} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for row in report()[:limit]:
+        print(f"{row['name']:<40} {row['calls']:>8} {row['total_ms']:>10.2f} {row['p50_ms']:>9.3f} "
+              f"{row['p90_ms']:>9.3f} {row['p99_ms']:>9.3f} {row['max_ms']:>9.3f}")
+
+
+def finish():
+    """
+    Print and dump the report, called when the program exits.
+    """
+    if any(stats.calls for stats in durations.values()):
+        printReport()
+        print(f"Profile written to {dump()}")
+
+
+if enabled:
+    atexit.register(finish)
+
+if cProfileEnabled:
+    import cProfile
+    import pstats
+
+    session = cProfile.Profile()
+
+    def finishSession():
+        session.disable()
+        session.dump_stats("ot-profile.prof")
+        pstats.Stats(session).sort_stats("cumulative").print_stats(30)
+        print("cProfile stats written to ot-profile.prof")
+
+    atexit.register(finishSession)
+    session.enable()
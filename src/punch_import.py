@@ -0,0 +1,155 @@
+import csv
+from collections import Counter
+
+import numpy as np
+
+from src.json_func import OTData, OTDStorage
+from src.sdtime import SDTime
+
+class PunchImporter:
+    """
+    A class to import a punch-clock export into an OTDStorage.
+
+    The export is a CSV file with a header row and the columns "date", "arrive", "lunch_out", "lunch_in" and "leave"
+    (dates in YYYY-MM-DD, times in HH:MM), and optionally a "name" column with the employee of the row (the export of
+    a whole team), which is stored as the "person" of the entry ("by" is who asked for the OT). The file is read as a stream in chunks, the OT of every
+    chunk is computed at once with the same rules as the OT calculator, and the days with OT are inserted with a single save.
+
+    A row that is repeated in the file (same date, name and punches) is read once, and an entry that is already in
+    the storage (same date, amount, reason and person) is not inserted again, so importing the same export twice adds nothing.
+    A row with an invalid date or time is counted as invalid and skipped, like a day with a negative lunch.
+    """
+    columns = ("date", "arrive", "lunch_out", "lunch_in", "leave")
+    timeColumns = ("arrive", "lunch_out", "lunch_in", "leave")
+
+    def __init__(self, storage: OTDStorage, chunkSize: int = 10000, reason: str = None, personColumn: str = "name"):
+        self.storage = storage
+        self.chunkSize = chunkSize
+        self.reason = reason
+        self.personColumn = personColumn
+
+    def readChunks(self, filename: str):
+        """
+        Yields the rows of the CSV file in chunks, as dicts of column -> list of values (with "person" if the file
+        has the person column). Rows with a missing punch and repeated rows are skipped.
+        """
+        with open(filename, 'r', newline='', encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            missing = [column for column in self.columns if column not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"Missing columns in {filename}: {', '.join(missing)}")
+            columns = self.columns
+            if self.personColumn in reader.fieldnames:
+                columns += ("person",)
+
+            seen = set()
+            chunk = {column: [] for column in columns}
+            for row in reader:
+                values = tuple((row[column] or "").strip() for column in self.columns)
+                if not all(values):
+                    continue
+                if "person" in chunk:
+                    values += ((row[self.personColumn] or "").strip(),)
+                if values in seen:
+                    continue
+                seen.add(values)
+                for column, value in zip(columns, values):
+                    chunk[column].append(value)
+                if len(chunk["date"]) >= self.chunkSize:
+                    yield chunk
+                    chunk = {column: [] for column in columns}
+            if chunk["date"]:
+                yield chunk
+
+    @staticmethod
+    def passes(check, values: list[str]) -> np.ndarray:
+        """
+        Check every value with a validator that raises ValueError (e.g. OTDStorage.validDate).
+        Returns whether each value passed.
+        """
+        def passed(value: str) -> bool:
+            try:
+                check(value)
+            except ValueError:
+                return False
+            return True
+        return np.fromiter(map(passed, values), dtype=bool, count=len(values))
+
+    def computeChunk(self, chunk: dict) -> dict:
+        """
+        Compute the total, lunch, work and OT minutes of every day of a chunk.
+        Leaving before arriving means leaving after midnight, and days with a negative lunch, an invalid date or
+        an invalid time are marked invalid.
+        """
+        valid = self.passes(OTDStorage.validDate, chunk["date"])
+        try:
+            total = SDTime.diffTimes(chunk["arrive"], chunk["leave"], overnight=True)
+            lunch = SDTime.diffTimes(chunk["lunch_out"], chunk["lunch_in"])
+        except ValueError:
+            # Find the rows with an invalid time, and compute the others with the invalid times replaced
+            for column in self.timeColumns:
+                valid &= self.passes(SDTime.parseTime, chunk[column])
+            chunk = dict(chunk, **{column: [value if ok else "00:00" for value, ok in zip(chunk[column], valid.tolist())]
+                                   for column in self.timeColumns})
+            total = SDTime.diffTimes(chunk["arrive"], chunk["leave"], overnight=True)
+            lunch = SDTime.diffTimes(chunk["lunch_out"], chunk["lunch_in"])
+        normal = SDTime.diffTime(self.storage.workhour_start, self.storage.workhour_end, overnight=True)  # A night shift
+        return {
+            "total": total,
+            "lunch": lunch,
+            "work": total - lunch,
+            "ot": total - normal,
+            "valid": valid & (lunch >= 0),
+        }
+
+    def ingest(self, filename: str) -> dict:
+        """
+        Import the punch-clock export into the storage.
+        Returns a summary with the number of rows read, entries inserted, invalid rows, entries that were already
+        in the storage and the total OT minutes.
+        """
+        entries = []
+        rows = invalid = 0
+        for chunk in self.readChunks(filename):
+            result = self.computeChunk(chunk)
+            rows += len(chunk["date"])
+            invalid += int(np.count_nonzero(~result["valid"]))
+
+            keep = np.flatnonzero(result["valid"] & (result["ot"] > 0))
+            dates, people = chunk["date"], chunk.get("person")
+            for i, amount in zip(keep.tolist(), result["ot"][keep].tolist()):
+                entries.append(OTData(dates[i], amount, self.reason, None, people and people[i]).to_dict())
+
+        new = self.newEntries(entries)
+        self.storage.newEntries(new)
+        return {
+            "rows": rows,
+            "inserted": len(new),
+            "invalid": invalid,
+            "existing": len(entries) - len(new),
+            "ot_minutes": sum(entry["amount"] for entry in new),
+        }
+
+    def newEntries(self, entries: list[dict]) -> list[dict]:
+        """
+        Get the entries that are not in the storage yet (an entry in the storage matches one imported entry).
+        """
+        if not entries:
+            return []
+        key = lambda entry: (entry["date"], entry["amount"], entry.get("reason"), entry.get("person"))
+        first, last = min(entry["date"] for entry in entries), max(entry["date"] for entry in entries)
+        existing = Counter(map(key, self.storage.rangedEntries(first, last)))
+        new = []
+        for entry in entries:
+            if existing[key(entry)] > 0:
+                existing[key(entry)] -= 1
+            else:
+                new.append(entry)
+        return new
+
+
+if __name__ == "__main__":
+    import sys
+    storage = OTDStorage(sys.argv[2] if len(sys.argv) > 2 else "ot.json")
+    storage.loadJson()
+    print(PunchImporter(storage).ingest(sys.argv[1]))
@@ -0,0 +1,100 @@
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from src.json_func import OTDStorage
+from src.plotting import OTPlot
+from src.sdtime import SDTime
+
+logger = logging.getLogger(__name__)
+
+def monthStorage(filename: str, month: str) -> OTDStorage:
+    """
+    Load a staff file and keep only the entries of a month ("YYYY-MM").
+    The file is only read (see OTDStorage.loadJson), and the returned storage is never saved.
+    """
+    storage = OTDStorage(filename)
+    storage.loadJson(readOnly=True)
+    entries = storage.monthEntries(month)
+    storage.data = dict(storage.data, entries=entries, total=len(entries))
+    return storage
+
+def renderReport(filename: str, month: str, outputDir: str, formats=("png", "pdf")) -> tuple[str, float]:
+    """
+    Render the monthly report (time series, histogram and statistics) of one staff file on the Agg backend.
+    Returns the name of the report and the render time in seconds.
+    """
+    start = time.perf_counter()
+    storage = monthStorage(filename, month)
+    name = f"{os.path.splitext(os.path.basename(filename))[0]}-{month}"
+
+    OTPlot.setupFonts()
+    figure = Figure(figsize=(11.69, 16.53))  # A3 portrait
+    FigureCanvasAgg(figure)
+    seriesAx, histogramAx, statsAx = figure.subplots(3, 1, height_ratios=[3, 2, 2])
+
+    if storage.entries:
+        x, y = OTPlot.timeSeriesData(storage.entries)
+        OTPlot.timeSeries(seriesAx, x, y)
+        OTPlot.pointLabels(seriesAx, x, y)
+        OTPlot.histogram(histogramAx, y, bins=30)
+    else:
+        seriesAx.set_title(f"{month}: 沒有 OT 記錄", fontsize=16)
+        histogramAx.axis('off')
+    OTPlot.statsTable(statsAx, storage)
+    figure.suptitle(name, fontsize=18)
+    figure.tight_layout()
+
+    os.makedirs(outputDir, exist_ok=True)
+    for fmt in formats:
+        figure.savefig(os.path.join(outputDir, f"{name}.{fmt}"))
+    return name, time.perf_counter() - start
+
+def renderAll(inputDir: str, outputDir: str, month: str = None, formats=("png", "pdf"), workers: int = None) -> list:
+    """
+    Render the monthly report of every staff file ("*.json") in a directory, one report per worker process.
+    The JSON files that are not OT data files (e.g. holidays.json) are skipped.
+    Returns the list of (report name, render time) tuples.
+    """
+    month = month or SDTime.lastMonthStart()[:7]
+    files = sorted(glob.glob(os.path.join(inputDir, "*.json")))
+    results = []
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(renderReport, filename, month, outputDir, formats): filename for filename in files}
+        for future in as_completed(futures):
+            try:
+                name, seconds = future.result()
+            except ValueError as e:
+                logger.warning("Skipped %s: %s", futures[future], e)
+                continue
+            except Exception:
+                logger.exception("Failed to render the report of %s", futures[future])
+                continue
+            logger.info("Rendered %s in %.3f s", name, seconds)
+            results.append((name, seconds))
+    elapsed = time.perf_counter() - start
+
+    logger.info("Rendered %d of %d reports in %.3f s (%.2f reports/s)",
+                len(results), len(files), elapsed, len(results) / elapsed if elapsed else 0.0)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Render the monthly OT reports of every staff file without the GUI.")
+    parser.add_argument("input", help="directory of the staff JSON files")
+    parser.add_argument("-o", "--output", default="reports", help="output directory (default: reports)")
+    parser.add_argument("-m", "--month", help="month to report, YYYY-MM (default: last month)")
+    parser.add_argument("-f", "--format", action="append", choices=["png", "pdf"], help="output format (default: png and pdf)")
+    parser.add_argument("-j", "--workers", type=int, help="number of worker processes (default: number of CPUs)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    renderAll(args.input, args.output, args.month, tuple(args.format or ("png", "pdf")), args.workers)
@@ -0,0 +1,154 @@
+import numpy as np
+
+class SDBucket:
+    """
+    A companion of SDTime that works on whole columns of dates at once with NumPy.
+
+    Dates are converted to datetime64[D] in one call, then grouped into integer bucket ids
+    (ISO week, month or weekday) that can be summed with np.bincount instead of parsing every date in Python.
+    """
+    weekdayNames = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+    monthDays = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int32)  # In a common year
+
+    @classmethod
+    def toDays(self, dates) -> np.ndarray:
+        """
+        Convert a sequence of "YYYY-MM-DD" strings to a datetime64[D] array.
+        """
+        dates = list(dates)
+        if not dates:
+            return np.array([], dtype="datetime64[D]")
+
+        # Fast path: parse the digits of all the strings at once from a single byte buffer,
+        # when every string has 10 ASCII characters (so the buffer is one row per string)
+        raw = "".join(dates).encode("utf-8")
+        if len(raw) == 10 * len(dates) and all(len(date) == 10 for date in dates):
+            chars = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 10)
+            if (chars[:, 4] == ord("-")).all() and (chars[:, 7] == ord("-")).all():
+                digits = chars[:, [0, 1, 2, 3, 5, 6, 8, 9]].astype(np.int32) - ord("0")
+                year = digits[:, :4] @ np.array([1000, 100, 10, 1], dtype=np.int32)
+                month = digits[:, 4:6] @ np.array([10, 1], dtype=np.int32)
+                day = digits[:, 6:] @ np.array([10, 1], dtype=np.int32)
+                leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+                monthDays = self.monthDays[np.clip(month, 1, 12) - 1] + ((month == 2) & leap)
+                valid = ((digits >= 0).all(axis=1) & (digits <= 9).all(axis=1)
+                         & (month >= 1) & (month <= 12) & (day >= 1) & (day <= monthDays))
+                if valid.all():
+                    return self.fromCivil(year, month, day)
+
+        # Slow path for other formats, it also raises ValueError for invalid dates
+        return np.asarray(dates, dtype="datetime64[D]")
+
+    @classmethod
+    def toMinutes(self, times) -> np.ndarray:
+        """
+        Convert a sequence of "HH:MM" strings to an array of minutes since midnight.
+        """
+        times = list(times)
+        raw = "".join(times).encode("utf-8")
+        if len(raw) == 5 * len(times) and all(len(t) == 5 for t in times):  # One row of 5 ASCII characters per time
+            chars = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 5)
+            digits = chars[:, [0, 1, 3, 4]].astype(np.int64) - ord("0")
+            hours = digits[:, 0] * 10 + digits[:, 1]
+            minutes = digits[:, 2] * 10 + digits[:, 3]
+            valid = ((chars[:, 2] == ord(":")) & (digits >= 0).all(axis=1) & (digits <= 9).all(axis=1)
+                     & (hours < 24) & (minutes < 60))
+            if valid.all():
+                return hours * 60 + minutes
+
+        # Slow path for "H:MM" times, it also raises ValueError for invalid times
+        from src.sdtime import SDTime
+        return np.fromiter((SDTime.parseTime(t) for t in times), dtype=np.int64, count=len(times))
+
+    @staticmethod
+    def fromCivil(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+        """
+        Convert year, month and day arrays to a datetime64[D] array (proleptic Gregorian calendar).
+        """
+        year = year - (month <= 2)
+        era = year // 400
+        yoe = year - era * 400
+        doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+        doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+        return (era * 146097 + doe - 719468).astype("datetime64[D]")
+
+    @staticmethod
+    def weekdayIds(days: np.ndarray) -> np.ndarray:
+        """
+        Returns the weekday of every date (Monday = 0, Sunday = 6).
+        """
+        return (days.astype(np.int64) + 3) % 7
+
+    @staticmethod
+    def weekIds(days: np.ndarray) -> np.ndarray:
+        """
+        Returns the ISO week bucket of every date, as the number of Monday-to-Sunday weeks since 1970-01-01.
+        """
+        return (days.astype(np.int64) + 3) // 7
+
+    @staticmethod
+    def monthIds(days: np.ndarray) -> np.ndarray:
+        """
+        Returns the month bucket of every date, as the number of months since 1970-01.
+        """
+        return days.astype("datetime64[M]").astype(np.int64)
+
+    @staticmethod
+    def weekStarts(weekIds: np.ndarray) -> np.ndarray:
+        """
+        Returns the Monday of every week bucket.
+        """
+        return (np.asarray(weekIds, dtype=np.int64) * 7 - 3).astype("datetime64[D]")
+
+    @staticmethod
+    def isoWeeks(weekIds: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the ISO year and ISO week number of every week bucket.
+        """
+        thursdays = (np.asarray(weekIds, dtype=np.int64) * 7).astype("datetime64[D]")
+        years = thursdays.astype("datetime64[Y]")
+        weeks = (thursdays - years.astype("datetime64[D]")).astype(np.int64) // 7 + 1
+        return years.astype(np.int64) + 1970, weeks
+
+    @classmethod
+    def labels(self, period: str, ids: np.ndarray) -> list[str]:
+        """
+        Returns readable labels for bucket ids ("YYYY-Www" for weeks, "YYYY-MM" for months, "Mon".."Sun" for weekdays).
+        """
+        if period == "week":
+            years, weeks = self.isoWeeks(ids)
+            return [f"{y}-W{w:02d}" for y, w in zip(years.tolist(), weeks.tolist())]
+        if period == "month":
+            return np.datetime_as_string(np.asarray(ids, dtype=np.int64).astype("datetime64[M]")).tolist()
+        if period == "weekday":
+            return [self.weekdayNames[i] for i in np.asarray(ids).tolist()]
+        raise ValueError(f"Unknown period: {period}")
+
+    @classmethod
+    def bucketIds(self, period: str, days: np.ndarray) -> np.ndarray:
+        """
+        Returns the bucket ids of every date for the given period ("week", "month" or "weekday").
+        """
+        if period == "week":
+            return self.weekIds(days)
+        if period == "month":
+            return self.monthIds(days)
+        if period == "weekday":
+            return self.weekdayIds(days)
+        raise ValueError(f"Unknown period: {period}")
+
+    @staticmethod
+    def bucketSums(ids: np.ndarray, amounts) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Sum the amounts per bucket.
+        Returns the sorted unique bucket ids, the number of values and the total amount of each bucket.
+        """
+        unique, inverse = np.unique(ids, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(unique))
+        totals = np.bincount(inverse, weights=np.asarray(amounts, dtype=np.float64), minlength=len(unique))
+        return unique, counts, totals.astype(np.int64)
+
+
+if __name__ == "__main__":
+    days = SDBucket.toDays(["2024-12-30", "2025-01-05", "2025-01-06"])
+    print("ISO weeks:", SDBucket.labels("week", SDBucket.weekIds(days)))
@@ -1,150 +1,381 @@
-from datetime import datetime, timedelta
+import calendar
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
 from typing import Union
 
+from src.profiling import instrumented
+
+class DateRange:
+    """
+    A lazy, inclusive range of calendar dates.
+
+    The start, the end, the length and membership are all computed in O(1),
+    the dates themselves are only produced when the range is iterated.
+    """
+    def __init__(self, start: date, end: date):
+        self.start = start
+        self.end = end
+
+    @staticmethod
+    def toDate(value: Union[str, date, datetime]) -> date:
+        """
+        Convert a "YYYY-MM-DD" string, date or datetime to a date.
+        """
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return date.fromisoformat(value)
+
+    def __len__(self) -> int:
+        return max((self.end - self.start).days + 1, 0)
+
+    def __contains__(self, value) -> bool:
+        return self.start <= self.toDate(value) <= self.end
+
+    def __getitem__(self, index: int) -> date:
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("DateRange index out of range")
+        return self.start + timedelta(days=index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.start + timedelta(days=i)
+
+    def __reversed__(self):
+        for i in range(len(self) - 1, -1, -1):
+            yield self.start + timedelta(days=i)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DateRange) and (self.start, self.end) == (other.start, other.end)
+
+    def __hash__(self) -> int:
+        return hash((self.start, self.end))
+
+    def __repr__(self) -> str:
+        return f"DateRange({self.start.isoformat()}, {self.end.isoformat()})"
+
+    def strings(self, fmt: str = "%Y-%m-%d"):
+        """
+        Lazily yields the dates of the range as strings.
+        """
+        for d in self:
+            yield d.strftime(fmt)
+
+@instrumented
 class SDTime:
     """
     A class to calculate and provide various date ranges and specific dates.
+
+    The ranges are memoized until the calendar day changes. The clock can be replaced with setClock (e.g. in tests).
     """
     strfdate = "%Y-%m-%d"
     strftime = "%H:%M"
-    
+
+    _clock = staticmethod(datetime.today)
+    _cache = {}
+    _cacheDay = None
+
+    @classmethod
+    def setClock(self, clock=None):
+        """
+        Replace the clock used to find today (a callable returning a date or datetime).
+        Passing None restores the system clock.
+        """
+        self._clock = staticmethod(clock or datetime.today)
+        self._cache.clear()
+        self._cacheDay = None
+
+    @classmethod
+    def today(self) -> date:
+        """
+        Returns today's date according to the clock.
+        """
+        now = self._clock()
+        return now.date() if isinstance(now, datetime) else now
+
+    @classmethod
+    def _memo(self, key, build) -> DateRange:
+        """
+        Returns the cached range for the key, building it with build(today) if it is not cached for today.
+        """
+        today = self.today()
+        if today != self._cacheDay:
+            self._cache.clear()
+            self._cacheDay = today
+        if key not in self._cache:
+            self._cache[key] = build(today)
+        return self._cache[key]
+
+    @staticmethod
+    def addMonths(day: date, n: int) -> date:
+        """
+        Returns the first day of the month n months after the month of the given date (n can be negative).
+        """
+        index = day.year * 12 + day.month - 1 + n
+        return date(index // 12, index % 12 + 1, 1)
+
+    @staticmethod
+    def monthEndOf(day: date) -> date:
+        """
+        Returns the last day of the month of the given date.
+        """
+        return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+    @classmethod
+    def _format(self, day: date, isStr: bool):
+        """
+        Returns the date as a string or as a datetime at midnight.
+        """
+        return day.strftime(self.strfdate) if isStr else datetime.combine(day, time())
+
+    @classmethod
+    def _dates(self, dateRange: DateRange, isStr: bool, reverse: bool = False) -> list:
+        """
+        Returns the dates of a range as a list of strings or datetimes.
+        """
+        days = reversed(dateRange) if reverse else iter(dateRange)
+        return [self._format(d, isStr) for d in days]
+
+    ### Date Ranges ###
+    @classmethod
+    def thisWeekRange(self) -> DateRange:
+        """
+        Returns the range of the current week (Monday to Sunday).
+        """
+        def build(today):
+            start = today - timedelta(days=today.weekday())
+            return DateRange(start, start + timedelta(days=6))
+        return self._memo("thisWeek", build)
+
+    @classmethod
+    def thisMonthRange(self) -> DateRange:
+        """
+        Returns the range of the current month (1st to last day of the month).
+        """
+        return self._memo("thisMonth", lambda today: DateRange(today.replace(day=1), self.monthEndOf(today)))
+
+    @classmethod
+    def lastWeekRange(self) -> DateRange:
+        """
+        Returns the range of the last week (Monday to Sunday).
+        """
+        def build(today):
+            start = today - timedelta(days=today.weekday() + 7)
+            return DateRange(start, start + timedelta(days=6))
+        return self._memo("lastWeek", build)
+
+    @classmethod
+    def lastMonthRange(self) -> DateRange:
+        """
+        Returns the range of the last month (1st to last day of the month).
+        """
+        def build(today):
+            end = today.replace(day=1) - timedelta(days=1)
+            return DateRange(end.replace(day=1), end)
+        return self._memo("lastMonth", build)
+
+    @classmethod
+    def lastNDaysRange(self, n) -> DateRange:
+        """
+        Returns the range of the last N days (including today).
+        """
+        return self._memo(("lastNDays", n), lambda today: DateRange(today - timedelta(days=n - 1), today))
+
+    @classmethod
+    def lastNWeeksRange(self, n) -> DateRange:
+        """
+        Returns the range of the last N weeks (Monday to Sunday).
+        """
+        def build(today):
+            start = today - timedelta(days=today.weekday() + 7 * n)
+            return DateRange(start, start + timedelta(days=7 * n - 1))
+        return self._memo(("lastNWeeks", n), build)
+
+    @classmethod
+    def lastNMonthsRange(self, n) -> DateRange:
+        """
+        Returns the range of the last N months (1st of the earliest month to the last day of last month).
+        """
+        def build(today):
+            end = today.replace(day=1) - timedelta(days=1)
+            return DateRange(self.addMonths(today, -n), end)
+        return self._memo(("lastNMonths", n), build)
+
+    ### Date Lists ###
     @classmethod
     def thisWeekDates(self, isStr: bool = True):
         """
         Returns a list of dates for the current week (Monday to Sunday).
         """
-        today = datetime.today()
-        start_of_week = today - timedelta(days=today.weekday())  # Monday
-        return [start_of_week + timedelta(days=i) for i in range(7)] if not isStr else [(start_of_week + timedelta(days=i)).strftime(self.strfdate) for i in range(7)]
+        return self._dates(self.thisWeekRange(), isStr)
 
     @classmethod
     def thisMonthDates(self, isStr: bool = True):
         """
         Returns a list of dates for the current month (1st to last day of the month).
         """
-        today = datetime.today()
-        start_of_month = today.replace(day=1)
-        next_month = start_of_month.replace(day=28) + timedelta(days=4)  # this will never fail
-        end_of_month = next_month - timedelta(days=next_month.day)
-        return [start_of_month + timedelta(days=i) for i in range((end_of_month - start_of_month).days + 1)] if not isStr else [(start_of_month + timedelta(days=i)).strftime(self.strfdate) for i in range((end_of_month - start_of_month).days + 1)]
+        return self._dates(self.thisMonthRange(), isStr)
 
     @classmethod
     def lastWeekDates(self, isStr: bool = True):
         """
         Returns a list of dates for the last week (Monday to Sunday).
         """
-        today = datetime.today()
-        start_of_last_week = today - timedelta(days=today.weekday() + 7)  # Monday
-        return [start_of_last_week + timedelta(days=i) for i in range(7)] if not isStr else [(start_of_last_week + timedelta(days=i)).strftime(self.strfdate) for i in range(7)]
+        return self._dates(self.lastWeekRange(), isStr)
 
     @classmethod
     def lastMonthDates(self, isStr: bool = True):
         """
         Returns a list of dates for the last month (1st to last day of the month).
         """
-        today = datetime.today()
-        first_day_of_this_month = today.replace(day=1)
-        last_month = first_day_of_this_month - timedelta(days=1)
-        start_of_last_month = last_month.replace(day=1)
-        end_of_last_month = last_month
-        return [start_of_last_month + timedelta(days=i) for i in range((end_of_last_month - start_of_last_month).days + 1)] if not isStr else [(start_of_last_month + timedelta(days=i)).strftime(self.strfdate) for i in range((end_of_last_month - start_of_last_month).days + 1)]
+        return self._dates(self.lastMonthRange(), isStr)
 
     @classmethod
     def thisWeekStart(self, isStr: bool = True):
         """
         Returns the start date of the current week (Monday).
         """
-        return self.thisWeekDates(isStr)[0]
+        return self._format(self.thisWeekRange().start, isStr)
 
     @classmethod
     def thisWeekEnd(self, isStr: bool = True):
         """
         Returns the end date of the current week (Sunday).
         """
-        return self.thisWeekDates(isStr)[-1]
+        return self._format(self.thisWeekRange().end, isStr)
 
     @classmethod
     def thisMonthStart(self, isStr: bool = True):
         """
         Returns the start date of the current month (1st).
         """
-        return self.thisMonthDates(isStr)[0]
+        return self._format(self.thisMonthRange().start, isStr)
 
     @classmethod
     def thisMonthEnd(self, isStr: bool = True):
         """
         Returns the end date of the current month (last day).
         """
-        return self.thisMonthDates(isStr)[-1]
+        return self._format(self.thisMonthRange().end, isStr)
 
     @classmethod
     def lastWeekStart(self, isStr: bool = True):
         """
         Returns the start date of the last week (Monday).
         """
-        return self.lastWeekDates(isStr)[0]
+        return self._format(self.lastWeekRange().start, isStr)
 
     @classmethod
     def lastWeekEnd(self, isStr: bool = True):
         """
         Returns the end date of the last week (Sunday).
         """
-        return self.lastWeekDates(isStr)[-1]
+        return self._format(self.lastWeekRange().end, isStr)
 
     @classmethod
     def lastMonthStart(self, isStr: bool = True):
         """
         Returns the start date of the last month (1st).
         """
-        return self.lastMonthDates(isStr)[0]
+        return self._format(self.lastMonthRange().start, isStr)
 
     @classmethod
     def lastMonthEnd(self, isStr: bool = True):
         """
         Returns the end date of the last month (last day).
         """
-        return self.lastMonthDates(isStr)[-1]
+        return self._format(self.lastMonthRange().end, isStr)
 
     @classmethod
     def lastNDays(self, n, isStr: bool = True):
         """
-        Returns a list of dates for the last N days (including today).
+        Returns a list of dates for the last N days (including today), starting from today.
         """
-        today = datetime.today()
-        return [today - timedelta(days=i) for i in range(n)] if not isStr else [(today - timedelta(days=i)).strftime(self.strfdate) for i in range(n)]
+        return self._dates(self.lastNDaysRange(n), isStr, reverse=True)
 
     @classmethod
     def lastNWeeks(self, n, isStr: bool = True):
         """
         Returns a list of dates for the last N weeks (Monday to Sunday).
         """
-        today = datetime.today()
-        start_of_last_week = today - timedelta(days=today.weekday() + 7 * n)  # Monday
-        return [start_of_last_week + timedelta(days=i) for i in range(7 * n)] if not isStr else [(start_of_last_week + timedelta(days=i)).strftime(self.strfdate) for i in range(7 * n)]
+        return self._dates(self.lastNWeeksRange(n), isStr)
 
     @classmethod
     def lastNMonths(self, n, isStr: bool = True):
         """
         Returns a list of dates for the last N months (1st to last day of the month).
         """
-        today = datetime.today()
-        first_day_of_this_month = today.replace(day=1)
-        last_month = first_day_of_this_month - timedelta(days=1)
-        start_of_last_month = last_month.replace(day=1) - timedelta(days=30 * (n - 1))
-        end_of_last_month = last_month
-        return [start_of_last_month + timedelta(days=i) for i in range((end_of_last_month - start_of_last_month).days + 1)] if not isStr else [(start_of_last_month + timedelta(days=i)).strftime(self.strfdate) for i in range((end_of_last_month - start_of_last_month).days + 1)]
+        return self._dates(self.lastNMonthsRange(n), isStr)
+
+    periods = ("this-week", "last-week", "this-month", "last-month")
+
+    @classmethod
+    def periodBounds(self, name: str, isStr: bool = True) -> tuple:
+        """
+        Returns the start and end dates of a period by name (one of SDTime.periods).
+        """
+        ranges = {
+            "this-week": self.thisWeekRange,
+            "last-week": self.lastWeekRange,
+            "this-month": self.thisMonthRange,
+            "last-month": self.lastMonthRange,
+        }
+        if name not in ranges:
+            raise ValueError(f"Unknown period: {name}")
+        dateRange = ranges[name]()
+        return self._format(dateRange.start, isStr), self._format(dateRange.end, isStr)
     
     ### Time Functions ###
+    timePattern = re.compile(r"^([01]?[0-9]|2[0-3]):([0-5][0-9])$")
+
+    @staticmethod
+    @lru_cache(maxsize=None)  # There are only 24 * 60 valid times (in "H:MM" and "HH:MM" forms)
+    def parseTime(value: str) -> int:
+        """
+        Returns the number of minutes since midnight of a time in HH:MM format.
+        """
+        match = SDTime.timePattern.match(value)
+        if not match:
+            raise ValueError(f"Invalid time: {value!r}")
+        return int(match.group(1)) * 60 + int(match.group(2))
+
+    @staticmethod
+    def formatMinutes(minutes: int) -> str:
+        """
+        Returns a number of minutes in H:MM format (with a leading "-" if negative).
+        """
+        sign = "-" if minutes < 0 else ""
+        minutes = abs(minutes)
+        return f"{sign}{minutes // 60}:{minutes % 60:02d}"
+
     @classmethod
-    def diffTime(self, start: str, end: str, isStr = False) -> Union[str, int]:
+    def diffTime(self, start: str, end: str, isStr = False, overnight: bool = False) -> Union[str, int]:
         """
         Returns the difference between two times in HH:MM format.
+        If the end is before the start, the difference is negative, unless overnight is True,
+        in which case the end is taken to be on the next day.
         """
-        start_time = datetime.strptime(start, self.strftime)
-        end_time = datetime.strptime(end, self.strftime)
-        delta = end_time - start_time
-        return f"{delta.seconds // 3600}:{(delta.seconds // 60) % 60:02d}" if isStr else delta.seconds // 60
+        minutes = self.parseTime(end) - self.parseTime(start)
+        if overnight and minutes < 0:
+            minutes += 24 * 60
+        return self.formatMinutes(minutes) if isStr else minutes
 
+    @classmethod
+    def diffTimes(self, starts, ends, overnight: bool = False):
+        """
+        Returns the differences in minutes between two sequences of times in HH:MM format, as a NumPy array.
+        The overnight rule is the same as diffTime.
+        """
+        from src.sdbucket import SDBucket
+        minutes = SDBucket.toMinutes(ends) - SDBucket.toMinutes(starts)
+        if overnight:
+            minutes[minutes < 0] += 24 * 60
+        return minutes
 
 if __name__ == "__main__":
-    print("This Week Dates:", SDTime.thisWeekDates())
\ No newline at end of file
+    print("This Week Dates:", SDTime.thisWeekDates())
@@ -0,0 +1,337 @@
+import hashlib
+import os
+import re
+from bisect import bisect_left
+
+import numpy as np
+
+from src.sdbucket import SDBucket
+
+class SearchIndex:
+    """
+    An inverted index of the "reason" and "by" strings of the entries.
+
+    The text is split into runs of CJK characters, indexed as unigrams and bigrams (Chinese has no spaces between
+    words), and runs of letters and digits, indexed as lowercase words. Every token of a field maps to the sorted
+    ids of the entries that contain it, so a query intersects a few arrays instead of scanning every entry.
+    A query matches the entries whose field contains every CJK run of the query and every word (or a word starting
+    with it, with prefix=True), and it can be limited to a date range.
+
+    The ids are the positions of the entries when the index is built, and new entries get the next ids.
+    Beside the postings, the index has columns by id: the date, the amount and the code of the distinct text of
+    every field, so that the filters, the totals and the check of long CJK runs are done with NumPy.
+    The index is saved beside the data file (see OTDStorage.searchIndex) with the positions of the current order.
+    """
+    fields = ("reason", "by")
+    tokenPattern = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+|[0-9a-z]+")
+
+    def __init__(self):
+        self.docs = []  # id -> entry
+        self.postings = {}  # "field:token" -> list of ids
+        self.arrays = {}  # "field:token" -> array of the ids, made on first use after a change
+        self.vocabulary = None  # The sorted keys of postings, made on first use after a new key
+        # id -> date (days since 1970-01-01), amount and text code of every field, grown geometrically
+        self.columns = {name: np.zeros(0, dtype=np.int64) for name in ("days", "amounts") + self.fields}
+        self.texts = {field: [""] for field in self.fields}  # field -> distinct texts by code (0 is no text)
+        self.codes = {field: {"": 0} for field in self.fields}  # field -> text -> code
+        self.textRanks = {}  # field -> rank of every code in text order, made on first use after a new text
+        self.dirty = False  # Changed since it was saved or loaded
+
+    ### Tokens ###
+    @classmethod
+    def runs(self, text: str) -> list[str]:
+        """
+        Split a text into runs of CJK characters and lowercase words.
+        """
+        return self.tokenPattern.findall(text.lower()) if text else []
+
+    @staticmethod
+    def isCJK(run: str) -> bool:
+        return not run[0].isascii()
+
+    @classmethod
+    def tokens(self, text: str) -> set[str]:
+        """
+        The tokens of a text: the unigrams and bigrams of its CJK runs and its words.
+        """
+        tokens = set()
+        for run in self.runs(text):
+            if self.isCJK(run):
+                tokens.update(run)
+                tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+            else:
+                tokens.add(run)
+        return tokens
+
+    ### Building ###
+    @classmethod
+    def build(self, entries: list[dict]) -> "SearchIndex":
+        """
+        Build the index of entries.
+        """
+        index = SearchIndex()
+        index.add(entries)
+        return index
+
+    def add(self, entries: list[dict]):
+        """
+        Add entries to the index, with the next ids.
+        """
+        if not entries:
+            return
+        first = len(self.docs)
+        self.docs.extend(entries)
+        size = len(self.docs)
+        if size > len(self.columns["days"]):
+            capacity = max(size, 2 * len(self.columns["days"]))
+            self.columns = {name: np.resize(column, capacity) for name, column in self.columns.items()}
+        self.columns["days"][first:size] = SDBucket.toDays(entry["date"] for entry in entries).astype(np.int64)
+        self.columns["amounts"][first:size] = [entry["amount"] for entry in entries]
+
+        keysOf = {}  # (field, text) -> keys, the same reasons and requesters come up again and again
+        for field in self.fields:
+            texts, codes, column = self.texts[field], self.codes[field], self.columns[field]
+            for i, entry in enumerate(entries, first):
+                text = entry.get(field) or ""
+                code = codes.get(text)
+                if code is None:
+                    code = codes[text] = len(texts)
+                    texts.append(text)
+                column[i] = code
+                if not code:
+                    continue
+                keys = keysOf.get((field, text))
+                if keys is None:
+                    keys = keysOf[(field, text)] = [f"{field}:{token}" for token in self.tokens(text)]
+                for key in keys:
+                    ids = self.postings.get(key)
+                    if ids is None:
+                        ids = self.postings[key] = []
+                        self.vocabulary = None
+                    elif isinstance(ids, np.ndarray):
+                        ids = self.postings[key] = ids.tolist()  # Loaded from a file
+                    ids.append(i)
+                    self.arrays.pop(key, None)
+        self.dirty = True
+
+    def snapshot(self) -> "SearchIndex":
+        """
+        Get a copy of the index to query on another thread, which is not affected by the entries added since.
+        Only the containers are copied: the ids are only ever appended to the postings and the columns (or they are
+        replaced by new ones), and the snapshot leaves out the ids past its own entries.
+        """
+        index = SearchIndex()
+        index.docs = self.docs[:]
+        index.postings = dict(self.postings)
+        index.arrays = dict(self.arrays)
+        index.vocabulary = self.vocabulary
+        index.columns = dict(self.columns)
+        index.texts = {field: texts[:] for field, texts in self.texts.items()}
+        index.textRanks = dict(self.textRanks)
+        return index
+
+    ### Queries ###
+    def ids(self, key: str) -> np.ndarray:
+        """
+        Get the sorted ids of a key.
+        """
+        if key not in self.arrays:
+            ids = np.asarray(self.postings.get(key, ()), dtype=np.int64)
+            self.arrays[key] = ids[:np.searchsorted(ids, len(self.docs))]  # Only those of a snapshot
+        return self.arrays[key]
+
+    def keysWithPrefix(self, prefix: str) -> list[str]:
+        """
+        Get the keys that start with a prefix, from the sorted vocabulary.
+        """
+        if self.vocabulary is None:
+            self.vocabulary = sorted(self.postings)
+        keys = []
+        for key in self.vocabulary[bisect_left(self.vocabulary, prefix):]:
+            if not key.startswith(prefix):
+                break
+            keys.append(key)
+        return keys
+
+    def termIds(self, term: str, fields, prefix: bool) -> np.ndarray:
+        """
+        Get the ids of the entries that contain a token (or a word starting with it) in any of the fields.
+        """
+        arrays = []
+        for field in fields:
+            if prefix:
+                arrays.extend(self.ids(key) for key in self.keysWithPrefix(f"{field}:{term}"))
+            else:
+                arrays.append(self.ids(f"{field}:{term}"))
+        arrays = [ids for ids in arrays if len(ids)]
+        if not arrays:
+            return np.zeros(0, dtype=np.int64)
+        if len(arrays) == 1:
+            return arrays[0]
+        ids = np.sort(np.concatenate(arrays))
+        return ids[np.concatenate(([True], ids[1:] != ids[:-1]))]
+
+    def matchIds(self, query: str = "", field: str = None, prefix: bool = False, start: str = None, end: str = None,
+                 minAmount: int = None, maxAmount: int = None) -> np.ndarray:
+        """
+        Get the sorted ids of the entries whose reason or by (or only the given field) matches every part of the query,
+        dated between start and end and with an amount between minAmount and maxAmount (inclusive) if given.
+        """
+        fields = (field,) if field else self.fields
+        size = len(self.docs)
+        runs = self.runs(query)
+        if not runs and query and query.strip():
+            return np.zeros(0, dtype=np.int64)  # Only punctuation, which no entry is indexed by
+        ids = None
+        longRuns = []
+        for run in runs:
+            if self.isCJK(run):
+                # The bigrams of a run are all needed, and a longer run is checked as a whole below
+                terms = [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+                if len(run) > 2:
+                    longRuns.append(run)
+                termPrefix = False
+            else:
+                terms, termPrefix = [run], prefix
+            for term in terms:
+                termIds = self.termIds(term, fields, termPrefix)
+                ids = termIds if ids is None else np.intersect1d(ids, termIds, assume_unique=True)
+        if ids is None:
+            ids = np.arange(size)
+
+        days = [None if not date else np.datetime64(date, "D").astype(np.int64) for date in (start, end)]
+        for name, (lo, hi) in (("days", days), ("amounts", (minAmount, maxAmount))):
+            if lo is None and hi is None:
+                continue
+            values = self.columns[name][ids]
+            keep = np.ones(len(ids), dtype=bool)
+            if lo is not None:
+                keep &= values >= lo
+            if hi is not None:
+                keep &= values <= hi
+            ids = ids[keep]
+
+        for run in longRuns:
+            # Check the distinct texts of the candidates, rather than every candidate
+            keep = np.zeros(len(ids), dtype=bool)
+            for f in fields:
+                candidates = self.columns[f][ids]
+                codes = np.unique(candidates)
+                matching = [code for code in codes.tolist() if run in self.texts[f][code].lower()]
+                keep |= np.isin(candidates, matching)
+            ids = ids[keep]
+        return ids
+
+    def search(self, query: str = "", field: str = None, prefix: bool = False,
+               start: str = None, end: str = None, limit: int = None) -> dict:
+        """
+        Find the entries that match a query and a date range (see matchIds).
+        Returns the number of entries, their total minutes and the entries sorted by date (at most limit of them).
+        """
+        ids = self.matchIds(query, field, prefix, start, end)
+        order = self.sortIds(ids, "date")
+        if limit is not None:
+            order = order[:limit]
+        return {
+            "count": len(ids),
+            "total_minutes": self.minutes(ids),
+            "entries": [self.docs[i] for i in order.tolist()],
+        }
+
+    def minutes(self, ids: np.ndarray) -> int:
+        """
+        Get the total minutes of the entries of ids.
+        """
+        return int(self.columns["amounts"][ids].sum())
+
+    ### Sorting ###
+    def ranks(self, field: str) -> np.ndarray:
+        """
+        Get the rank of every text code of a field in the sorted order of the texts (no text first).
+        """
+        texts = self.texts[field]
+        if len(self.textRanks.get(field, ())) != len(texts):
+            self.textRanks[field] = np.empty(len(texts), dtype=np.int64)
+            self.textRanks[field][sorted(range(len(texts)), key=texts.__getitem__)] = np.arange(len(texts))
+        return self.textRanks[field]
+
+    def sortIds(self, ids: np.ndarray, column: str, descending: bool = False) -> np.ndarray:
+        """
+        Sort ids by a column ("date", "amount", "reason" or "by"), the ties stay in id (date) order.
+        """
+        if column in self.fields:
+            keys = self.ranks(column)[self.columns[column][ids]]
+        else:
+            keys = self.columns["days" if column == "date" else "amounts"][ids]
+        if descending:
+            keys = -keys
+        elif column == "date" and np.all(keys[1:] >= keys[:-1]):
+            return ids  # The ids are in date order unless entries were added since the index was built or loaded
+        return ids[np.argsort(keys, kind="stable")]
+
+    ### Persistence ###
+    @staticmethod
+    def fingerprint(storage) -> str:
+        """
+        Identify the data an index was saved for: a hash of the indexed values of the entries, in their order.
+        It changes with any change of the entries, even several in the same second or one made by hand.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update("\x1e".join([f"{entry['date']}\x1f{entry['amount']}\x1f{entry.get('reason') or ''}\x1f{entry.get('by') or ''}"
+                                    for entry in storage.entries]).encode("utf-8"))
+        return digest.hexdigest()
+
+    def renumber(self, entries: list[dict]):
+        """
+        Change the ids to the positions of the entries in a list (the same entries, in another order).
+        """
+        position = {id(entry): i for i, entry in enumerate(entries)}
+        newIds = np.fromiter((position[id(doc)] for doc in self.docs), dtype=np.int64, count=len(self.docs))
+        for key, ids in self.postings.items():
+            self.postings[key] = np.sort(newIds[np.asarray(ids, dtype=np.int64)]).tolist()
+        self.arrays.clear()
+        for name, column in self.columns.items():
+            self.columns[name] = np.empty(len(self.docs), dtype=np.int64)
+            self.columns[name][newIds] = column[:len(self.docs)]
+        self.docs = list(entries)
+
+    def save(self, filename: str, storage):
+        """
+        Save the index of the entries of a storage (with the ids of their current order).
+        """
+        if any(doc is not entry for doc, entry in zip(self.docs, storage.entries)):
+            self.renumber(storage.entries)
+        keys = sorted(self.postings)
+        lengths = np.fromiter((len(self.postings[key]) for key in keys), dtype=np.int64, count=len(keys))
+        postings = np.concatenate([np.asarray(self.postings[key], dtype=np.int64) for key in keys] or [np.zeros(0, dtype=np.int64)])
+        temporary = filename + ".tmp.npz"
+        np.savez(temporary, keys=np.asarray(keys, dtype=str), lengths=lengths, postings=postings,
+                 fingerprint=np.asarray(self.fingerprint(storage)),
+                 **{f"column:{name}": column[:len(self.docs)] for name, column in self.columns.items()},
+                 **{f"texts:{field}": np.asarray(texts, dtype=str) for field, texts in self.texts.items()})
+        os.replace(temporary, filename)
+        self.dirty = False
+
+    @classmethod
+    def load(self, filename: str, storage) -> "SearchIndex":
+        """
+        Load the index saved for the current data of a storage.
+        Returns None if there is no index or it was saved for other data.
+        """
+        try:
+            with np.load(filename, allow_pickle=False) as saved:
+                if len(saved["column:days"]) != len(storage.entries) or str(saved["fingerprint"]) != self.fingerprint(storage):
+                    return None
+                index = SearchIndex()
+                index.docs = list(storage.entries)
+                index.columns = {name: saved[f"column:{name}"] for name in index.columns}
+                index.texts = {field: saved[f"texts:{field}"].tolist() for field in index.fields}
+                index.codes = {field: {text: code for code, text in enumerate(texts)} for field, texts in index.texts.items()}
+                bounds = np.concatenate(([0], np.cumsum(saved["lengths"])))
+                postings = saved["postings"]
+                for key, lo, hi in zip(saved["keys"].tolist(), bounds[:-1].tolist(), bounds[1:].tolist()):
+                    index.arrays[key] = postings[lo:hi]
+                    index.postings[key] = index.arrays[key]
+        except (OSError, KeyError, ValueError):
+            return None
+        return index
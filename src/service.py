@@ -0,0 +1,323 @@
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+from src.history import OTHistory
+from src.json_func import OTDStorage
+from src.sdtime import SDTime
+
+logger = logging.getLogger(__name__)
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    """
+    An error answered to the client with a status code.
+    """
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class OTService:
+    """
+    A local HTTP/JSON service that owns an OTDStorage, so that a team shares one process instead of one file.
+
+        POST /entries         {"date": "YYYY-MM-DD", "amount": 45, "reason": ..., "by": ...}
+        POST /entries/batch   {"entries": [...]}
+        GET  /range?start=YYYY-MM-DD&end=YYYY-MM-DD   or   /range?period=this-week
+        GET  /stats
+        GET  /health
+
+    The inserts that arrive together are grouped: they are added with a single newEntries, journal line and save,
+    all run on the commit thread so the event loop keeps answering, and every request is answered once the save that
+    contains it is done. The aggregates are cached until the data version of the storage changes (the least recently
+    used are dropped past maxCached). The statistics scan every entry, so they are computed again on a thread from
+    a copy of the storage, and the previous value is served meanwhile.
+    HTTP/1.1 connections are kept alive.
+    """
+    maxBodySize = 16 * 1024 * 1024
+    maxCached = 256  # Aggregates kept in the cache, e.g. the ranges asked for
+
+    def __init__(self, storage: OTDStorage, commitDelay: float = 0.002):
+        self.storage = storage
+        self.commitDelay = commitDelay  # How long the committer waits for more inserts before saving
+        self.pending = []  # (entries, future) of the inserts waiting for the next commit
+        self.wakeup = asyncio.Event()
+        self.cache = OrderedDict()  # key -> (data version, value), the least recently used first
+        self.refreshing = {}  # key -> future of the value being computed again
+        self.computeExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ot-stats")
+        self.saves = 0
+        self.requests = 0
+
+        # The commits run one after another on their own thread, the only one that changes the storage.
+        # newEntries swaps in the new entries at once, so the event loop can keep reading them meanwhile.
+        self.commitExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ot-commit")
+        self.committing = False
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        """
+        Start listening and committing. Returns the server.
+        """
+        self.committerTask = asyncio.create_task(self.committer())
+        server = await asyncio.start_server(self.handleConnection, host, port)
+        logger.info("Serving %s on %s", self.storage.filename, ", ".join(str(s.getsockname()) for s in server.sockets))
+        return server
+
+    async def close(self):
+        """
+        Stop committing, after the pending inserts and the search index are saved.
+        """
+        while self.pending or self.committing:
+            await asyncio.sleep(self.commitDelay)
+        self.committerTask.cancel()
+        await asyncio.get_running_loop().run_in_executor(self.commitExecutor, self.storage.saveSearchIndex)
+        self.commitExecutor.shutdown()
+        self.computeExecutor.shutdown()
+
+    ### Inserts ###
+    async def insert(self, entries: list[dict]) -> int:
+        """
+        Queue entries for the next commit and wait until they are saved.
+        Returns the number of entries.
+        """
+        try:
+            entries = [self.storage.validEntry(entry) for entry in entries]  # An invalid request fails alone
+        except (ValueError, KeyError, TypeError) as e:
+            raise HTTPError(422, f"Invalid entry: {e}")
+        if not entries:
+            return 0
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((entries, future))
+        self.wakeup.set()
+        await future
+        return len(entries)
+
+    async def committer(self):
+        """
+        Add the pending inserts with one newEntries (one save) at a time, on the commit thread.
+        """
+        while True:
+            await self.wakeup.wait()
+            await asyncio.sleep(self.commitDelay)  # Let the inserts that arrive together join the commit
+            self.wakeup.clear()
+            batch, self.pending = self.pending, []
+            self.committing = True
+            try:
+                await self.commit(batch)
+            except Exception:
+                logger.exception("Failed to commit %d inserts", len(batch))  # The committer keeps running
+            finally:
+                self.committing = False
+
+    async def commit(self, batch: list[tuple]):
+        """
+        Add the entries of a batch of inserts and answer them.
+        The inserts whose request is gone (e.g. the client disconnected) are left out.
+        """
+        batch = [(entries, future) for entries, future in batch if not future.done()]
+        if not batch:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.commitExecutor, self.commitEntries,
+                                                             [entry for entries, _ in batch for entry in entries])
+            self.saves += 1
+        except Exception as e:
+            logger.exception("Failed to commit %d inserts", len(batch))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
+
+    def commitEntries(self, entries: list[dict]):
+        """
+        Add entries, on the commit thread. The search index, if one is loaded, is saved with them.
+        """
+        self.storage.newEntries(entries)
+        self.storage.saveSearchIndex()
+
+    ### Aggregates ###
+    def cached(self, key, compute):
+        """
+        Get an aggregate, computed again only when the data has changed.
+        """
+        version, value = self.cache.get(key, (None, None))
+        if version != self.storage.version:
+            version = self.storage.version  # Read first, the commit thread can change the data meanwhile
+            value = compute()
+            self.remember(key, version, value)
+        else:
+            self.cache.move_to_end(key)
+        return value
+
+    def remember(self, key, version: int, value):
+        """
+        Cache an aggregate, dropping the least recently used ones past maxCached.
+        """
+        self.cache[key] = (version, value)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.maxCached:
+            self.cache.popitem(last=False)
+
+    async def cachedInBackground(self, key, compute):
+        """
+        Get an aggregate computed by compute(storage) on the compute thread, from a copy of the storage.
+        When the data has changed, the previous value is served while the new one is computed.
+        """
+        version, value = self.cache.get(key, (None, None))
+        if version == self.storage.version:
+            self.cache.move_to_end(key)
+            return value
+        if key not in self.refreshing:
+            storage = self.storage.copy()
+
+            def store(future):
+                del self.refreshing[key]
+                if future.exception() is None:
+                    self.remember(key, storage.version, future.result())
+
+            self.refreshing[key] = asyncio.get_running_loop().run_in_executor(self.computeExecutor, compute, storage)
+            self.refreshing[key].add_done_callback(store)
+        if version is not None:
+            return value
+        return await asyncio.shield(self.refreshing[key])
+
+    def rangeAggregate(self, query: dict) -> dict:
+        if "period" in query:
+            if query["period"] not in SDTime.periods:
+                raise HTTPError(400, f"Unknown period: {query['period']}")
+            start, end = SDTime.periodBounds(query["period"])
+        elif "start" in query and "end" in query:
+            start, end = query["start"], query["end"]
+            try:
+                OTDStorage.validDate(start)
+                OTDStorage.validDate(end)
+            except ValueError as e:
+                raise HTTPError(400, str(e))
+        else:
+            raise HTTPError(400, "Give start and end, or period.")
+        return self.cached(("range", start, end), lambda: self.storage.rangeSummary(start, end))
+
+    ### HTTP ###
+    async def route(self, method: str, path: str, query: dict, body: bytes) -> tuple[int, object]:
+        """
+        Answer a request. Returns the status and the JSON document.
+        """
+        routes = {
+            "/entries": ("POST",),
+            "/entries/batch": ("POST",),
+            "/range": ("GET",),
+            "/stats": ("GET",),
+            "/health": ("GET",),
+        }
+        if path not in routes:
+            raise HTTPError(404, f"Not found: {path}")
+        if method not in routes[path]:
+            raise HTTPError(405, f"{method} is not allowed on {path}")
+
+        if path == "/entries":
+            return 201, {"inserted": await self.insert([self.parseBody(body)])}
+        if path == "/entries/batch":
+            document = self.parseBody(body)
+            entries = document.get("entries") if isinstance(document, dict) else document
+            if not isinstance(entries, list):
+                raise HTTPError(400, "Expected a list of entries.")
+            return 201, {"inserted": await self.insert(entries)}
+        if path == "/range":
+            return 200, self.rangeAggregate(query)
+        if path == "/stats":
+            return 200, await self.cachedInBackground(("stats",), OTDStorage.summary)
+        return 200, {"entries": self.storage.total, "version": self.storage.version,
+                     "saves": self.saves, "requests": self.requests}
+
+    @staticmethod
+    def parseBody(body: bytes):
+        try:
+            return json.loads(body or b"null")
+        except ValueError:
+            raise HTTPError(400, "The body is not valid JSON.")
+
+    async def handleConnection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serve the requests of a connection until the client closes it (or asks to).
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                requestLine, *headerLines = head.decode("latin-1").split("\r\n")
+                headers = {}
+                for line in headerLines:
+                    if ":" in line:
+                        name, _, value = line.partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                keepAlive = headers.get("connection", "").lower() != "close"
+
+                try:
+                    method, target, version = requestLine.split(" ", 2)
+                    keepAlive = keepAlive and version == "HTTP/1.1"
+                    length = int(headers.get("content-length", 0))
+                    if length > self.maxBodySize:
+                        keepAlive = False
+                        raise HTTPError(413, "The body is too large.")
+                    body = await reader.readexactly(length) if length else b""
+                    url = urlsplit(target)
+                    self.requests += 1
+                    status, document = await self.route(method, url.path, dict(parse_qsl(url.query)), body)
+                except HTTPError as e:
+                    status, document = e.status, {"error": str(e)}
+                except ValueError as e:
+                    status, document = 400, {"error": f"Bad request: {e}"}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    logger.exception("Failed to answer %s", requestLine)
+                    status, document = 500, {"error": str(e)}
+
+                payload = json.dumps(document, ensure_ascii=False).encode("utf-8")
+                writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                             f"Content-Type: application/json; charset=utf-8\r\n"
+                             f"Content-Length: {len(payload)}\r\n"
+                             f"Connection: {'keep-alive' if keepAlive else 'close'}\r\n\r\n".encode("latin-1") + payload)
+                await writer.drain()
+                if not keepAlive:
+                    break
+        finally:
+            writer.close()
+
+async def main(filename: str, host: str, port: int):
+    storage = OTDStorage(filename)
+    storage.loadJson()
+    OTHistory(storage)  # The inserts are recorded beside the data file, as with the GUI and the command line
+    service = OTService(storage)
+    server = await service.serve(host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve an OT JSON file over HTTP on this computer.")
+    parser.add_argument("-f", "--file", default="ot.json", help="OT JSON file (default: ot.json)")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("-p", "--port", type=int, default=8765, help="port (default: 8765)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    try:
+        asyncio.run(main(args.file, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
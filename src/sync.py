@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+from collections import Counter
+
+from src.json_func import OTDStorage
+
+
+class DirectoryRemote:
+    """
+    A remote copy of the OT data that lives in a local directory (e.g. a shared or synced folder).
+
+    The directory holds a "manifest.json" with the hash of every month, and one "months/YYYY-MM.json" file per month.
+    Only the manifest and the months that differ are read or written during a sync.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.manifestFile = os.path.join(path, "manifest.json")
+        self.monthDir = os.path.join(path, "months")
+
+    def monthHashes(self) -> dict:
+        """
+        Get the month -> hash mapping of the remote copy.
+        """
+        try:
+            with open(self.manifestFile, 'r') as f:
+                return json.load(f)["months"]
+        except FileNotFoundError:
+            return {}
+
+    def fetchMonth(self, month: str) -> list[dict]:
+        """
+        Get the entries of a specific month from the remote copy.
+        """
+        try:
+            with open(os.path.join(self.monthDir, f"{month}.json"), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def pushMonth(self, month: str, entries: list[dict]):
+        """
+        Write the entries of a specific month to the remote copy.
+        """
+        os.makedirs(self.monthDir, exist_ok=True)
+        filename = os.path.join(self.monthDir, f"{month}.json")
+        with open(filename + ".tmp", 'w') as f:
+            json.dump(entries, f, indent=4, ensure_ascii=False)
+        os.replace(filename + ".tmp", filename)  # A reader never sees a half-written month
+
+    def writeManifest(self, hashes: dict):
+        """
+        Write the month -> hash mapping (and the root hash) of the remote copy.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.manifestFile + ".tmp", 'w') as f:
+            json.dump({"root": OTDSync.rootHash(hashes), "months": hashes}, f, indent=4)
+        os.replace(self.manifestFile + ".tmp", self.manifestFile)  # A crash never leaves a truncated manifest
+
+
+class OTDSync:
+    """
+    OTDSync (OT Data Sync) class to reconcile an OTDStorage with a remote copy.
+
+    The entries are partitioned by month, each month is hashed, and the month hashes are hashed again into a root hash.
+    Two copies with the same root hash are identical, otherwise only the months with different hashes are exchanged.
+    Months are merged as a multiset union, so running the sync on both sides always ends with the same data.
+
+    The sync only adds entries: an entry removed on one side (e.g. by an undo, see src/history.py) is still on the
+    other side and comes back with the next sync. Remove it on both sides (or from the remote copy first) to delete it.
+    A fetched month that does not match its hash in the manifest, or that has an invalid entry, is rejected,
+    and nothing is changed.
+    The local month hashes are kept by the storage (see OTDStorage.monthHashes), so a sync only hashes the months
+    changed since the last one.
+    """
+    def __init__(self, storage: OTDStorage, remote: DirectoryRemote):
+        self.storage = storage
+        self.remote = remote
+
+    @staticmethod
+    def canonical(entry: dict) -> str:
+        """
+        Get the canonical string form of an entry, used for hashing, merging and ordering.
+        """
+        return json.dumps(entry, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def monthHash(self, entries: list[dict]) -> str:
+        """
+        Calculate the hash of the entries of one month (independent of their order).
+        """
+        digest = hashlib.sha256()
+        for line in sorted(self.canonical(entry) for entry in entries):
+            digest.update(line.encode("utf-8"))
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    @staticmethod
+    def rootHash(hashes: dict) -> str:
+        """
+        Calculate the root hash from the month -> hash mapping.
+        """
+        digest = hashlib.sha256()
+        for month in sorted(hashes):
+            digest.update(f"{month}:{hashes[month]}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    @classmethod
+    def merge(self, local: list[dict], remote: list[dict]) -> list[dict]:
+        """
+        Merge the entries of one month from both sides.
+        An entry appearing k times on one side and m times on the other appears max(k, m) times in the result.
+        """
+        localCount = Counter(self.canonical(entry) for entry in local)
+        remoteCount = Counter(self.canonical(entry) for entry in remote)
+        merged = localCount | remoteCount
+        lines = sorted(merged.elements(), key=lambda line: (json.loads(line)["date"], line))
+        return [json.loads(line) for line in lines]
+
+    @staticmethod
+    def validRemoteEntry(month: str, entry):
+        """
+        Check an entry of a fetched month as newEntries would, and that it belongs to that month.
+        """
+        try:
+            OTDStorage.validEntry(entry)
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Invalid entry in the remote copy of {month}: {entry!r}") from e
+        if entry["date"][:7] != month:
+            raise ValueError(f"The remote copy of {month} has an entry of another month: {entry!r}")
+
+    def sync(self) -> list[str]:
+        """
+        Synchronize the storage with the remote copy.
+        Returns the list of months that were exchanged.
+        """
+        localHashes = self.storage.monthHashes(self.monthHash)
+        remoteHashes = self.remote.monthHashes()
+
+        if self.rootHash(localHashes) == self.rootHash(remoteHashes):
+            return []
+
+        changed = sorted(month for month in localHashes.keys() | remoteHashes.keys()
+                         if localHashes.get(month) != remoteHashes.get(month))
+
+        # Fetch and check every remote month before anything is changed
+        remoteParts = {}
+        for month in changed:
+            if month not in remoteHashes:
+                continue
+            remoteParts[month] = self.remote.fetchMonth(month)
+            if self.monthHash(remoteParts[month]) != remoteHashes[month]:
+                raise ValueError(f"The remote copy of {month} does not match its hash in the manifest.")
+            for entry in remoteParts[month]:
+                self.validRemoteEntry(month, entry)
+
+        localChanged = False
+        for month in changed:
+            local = self.storage.monthEntries(month)
+            remote = remoteParts.get(month, [])
+            merged = self.merge(local, remote)
+            mergedHash = self.monthHash(merged)
+
+            if mergedHash != localHashes.get(month):
+                self.storage.replaceMonth(month, merged)
+                localChanged = True
+            if mergedHash != remoteHashes.get(month):
+                self.remote.pushMonth(month, merged)
+            localHashes[month] = remoteHashes[month] = mergedHash
+
+        self.remote.writeManifest(remoteHashes)
+        if localChanged:
+            self.storage.saveJson()
+        return changed
+
+
+if __name__ == "__main__":
+    import sys
+    storage = OTDStorage(sys.argv[2] if len(sys.argv) > 2 else "ot.json")
+    storage.loadJson()
+    months = OTDSync(storage, DirectoryRemote(sys.argv[1])).sync()
+    print("Synced months:", ", ".join(months) if months else "(already in sync)")
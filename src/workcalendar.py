@@ -0,0 +1,101 @@
+import json
+from datetime import date, timedelta
+
+from src.sdtime import DateRange
+
+class WorkCalendar:
+    """
+    A calendar of working days (weekdays that are not public holidays).
+
+    Every year is stored as a bitmap of its days (one bit per day, in 64-bit words) together with the popcount
+    of the words before each word, so "is working day" and "working days between A and B" are answered in O(1)
+    (plus one step per whole year in between).
+
+    Holidays are loaded from a local JSON file, either a list of "YYYY-MM-DD" dates or an object like:
+    {"holidays": ["2025-01-01", ...], "workdays": ["2025-02-08", ...]}
+    where "workdays" are weekend days that are worked (e.g. make-up days).
+    """
+    wordBits = 64
+
+    def __init__(self, holidays=(), workdays=(), weekend=(5, 6)):
+        self.holidays = {DateRange.toDate(d) for d in holidays}
+        self.workdays = {DateRange.toDate(d) for d in workdays}
+        self.weekend = frozenset(weekend)
+        self._years = {}
+
+    @classmethod
+    def fromFile(self, filename: str) -> "WorkCalendar":
+        """
+        Load the holidays from a JSON file. A missing file gives a calendar with weekends only.
+        """
+        try:
+            with open(filename, 'r', encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return self()
+        if isinstance(data, list):
+            return self(holidays=data)
+        return self(holidays=data.get("holidays", []), workdays=data.get("workdays", []))
+
+    def _year(self, year: int) -> tuple[list[int], list[int]]:
+        """
+        Returns the bitmap words and the prefix popcounts of a year, building them on first use.
+        """
+        if year not in self._years:
+            first = date(year, 1, 1)
+            days = (date(year + 1, 1, 1) - first).days
+            words = [0] * ((days + self.wordBits - 1) // self.wordBits)
+            for i in range(days):
+                d = first + timedelta(days=i)
+                if (d.weekday() not in self.weekend or d in self.workdays) and d not in self.holidays:
+                    words[i // self.wordBits] |= 1 << (i % self.wordBits)
+
+            prefix = [0]
+            for word in words:
+                prefix.append(prefix[-1] + word.bit_count())
+            self._years[year] = (words, prefix)
+        return self._years[year]
+
+    def _countUpTo(self, d: date) -> int:
+        """
+        Returns the number of working days from the 1st of January to the given date (inclusive).
+        """
+        words, prefix = self._year(d.year)
+        i = d.timetuple().tm_yday - 1
+        word = i // self.wordBits
+        mask = (1 << (i % self.wordBits + 1)) - 1
+        return prefix[word] + (words[word] & mask).bit_count()
+
+    def isWorkingDay(self, d) -> bool:
+        """
+        Returns whether the date is a working day.
+        """
+        d = DateRange.toDate(d)
+        words, _ = self._year(d.year)
+        i = d.timetuple().tm_yday - 1
+        return bool(words[i // self.wordBits] >> (i % self.wordBits) & 1)
+
+    def workingDaysInYear(self, year: int) -> int:
+        """
+        Returns the number of working days of a year.
+        """
+        return self._year(year)[1][-1]
+
+    def workingDaysBetween(self, start, end) -> int:
+        """
+        Returns the number of working days between two dates (inclusive).
+        """
+        start, end = DateRange.toDate(start), DateRange.toDate(end)
+        if start > end:
+            return 0
+        before = self._countUpTo(start) - self.isWorkingDay(start)
+        if start.year == end.year:
+            return self._countUpTo(end) - before
+        between = sum(self.workingDaysInYear(year) for year in range(start.year + 1, end.year))
+        return self.workingDaysInYear(start.year) - before + between + self._countUpTo(end)
+
+
+if __name__ == "__main__":
+    calendar = WorkCalendar.fromFile("holidays.json")
+    today = date.today()
+    print("Working days this year so far:", calendar.workingDaysBetween(date(today.year, 1, 1), today))
@@ -0,0 +1,124 @@
+import inspect
+import threading
+import traceback
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class WorkerSignals(QObject):
+    """
+    The signals of a Worker. A QRunnable is not a QObject, so it cannot have signals itself.
+    """
+    progress = Signal(object)
+    result = Signal(object)
+    error = Signal(object)
+    finished = Signal()
+
+
+class Worker(QRunnable):
+    """
+    Run a function on a thread of a QThreadPool and report back to the GUI thread with Qt signals.
+
+    If the function returns a generator, every value it yields is emitted with the progress signal,
+    so a dialog can be filled in as the values are computed, and the value it returns is the result.
+    A cancelled worker stops at the next yielded value (or does not start at all) and emits nothing more.
+    """
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.setAutoDelete(False)  # The WorkerPool keeps the worker until it is finished
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self.cancelEvent = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        Whether the worker has been cancelled.
+        """
+        return self.cancelEvent.is_set()
+
+    def cancel(self):
+        """
+        Cancel the worker, it can be called from any thread.
+        """
+        self.cancelEvent.set()
+
+    def run(self):
+        try:
+            if self.cancelled:
+                return
+            value = self.fn(*self.args, **self.kwargs)
+            if inspect.isgenerator(value):
+                generator, value = value, None
+                while True:
+                    try:
+                        item = next(generator)
+                    except StopIteration as stop:
+                        value = stop.value
+                        break
+                    if self.cancelled:
+                        generator.close()
+                        return
+                    self.signals.progress.emit(item)
+            if not self.cancelled:
+                self.signals.result.emit(value)
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.error.emit(e)
+        finally:
+            self.signals.finished.emit()
+
+
+class WorkerPool:
+    """
+    Start Workers on a QThreadPool and connect their signals.
+
+    The callbacks are called on the GUI thread, and never after the worker has been cancelled,
+    so a dialog that cancels its workers when it is closed does not receive late results.
+    A pool with a single thread runs its workers in the order they were started (e.g. for the saves).
+    """
+    def __init__(self, maxThreads: int = None):
+        self.pool = QThreadPool()
+        if maxThreads is not None:
+            self.pool.setMaxThreadCount(maxThreads)
+        self.workers = set()  # The started workers, until they are finished
+
+    def start(self, fn, *args, onResult=None, onProgress=None, onError=None, **kwargs) -> Worker:
+        """
+        Run fn(*args, **kwargs) on a thread of the pool.
+        Returns the worker, to cancel it.
+        """
+        worker = Worker(fn, *args, **kwargs)
+        if onResult is not None:
+            worker.signals.result.connect(lambda value: worker.cancelled or onResult(value))
+        if onProgress is not None:
+            worker.signals.progress.connect(lambda item: worker.cancelled or onProgress(item))
+        worker.signals.error.connect(lambda e: worker.cancelled or (onError or self.printError)(e))
+        worker.signals.finished.connect(lambda: self.workers.discard(worker))
+
+        self.workers.add(worker)
+        self.pool.start(worker)
+        return worker
+
+    @staticmethod
+    def printError(e: Exception):
+        """
+        The default error callback, print the traceback of the exception.
+        """
+        traceback.print_exception(e)
+
+    def cancelAll(self):
+        """
+        Cancel all the workers that are not finished.
+        """
+        for worker in list(self.workers):
+            worker.cancel()
+
+    def waitForDone(self, msecs: int = -1) -> bool:
+        """
+        Wait for all the workers to finish (for at most msecs milliseconds if given).
+        Returns False if they did not finish in time.
+        """
+        return self.pool.waitForDone(msecs)
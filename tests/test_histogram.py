@@ -0,0 +1,43 @@
+import numpy as np
+
+from src.histogram import MinuteHistogram
+from src.json_func import OTDStorage
+
+
+def counts(storage: OTDStorage) -> np.ndarray:
+    return np.trim_zeros(storage.histogram.counts, 'b')
+
+
+def test_histogram_follows_the_entries(tmp_path):
+    storage = OTDStorage(str(tmp_path / "ot.json"))
+    storage.loadJson()
+    storage.histogram  # Built now, then kept up to date
+    storage.newEntries([{"date": "2024-03-01", "amount": 30}, {"date": "2024-03-02", "amount": 45},
+                        {"date": "2024-03-03", "amount": 30}])
+    storage.newEntry("2024-03-04", 90)
+    storage.changeEntries([{"date": "2024-03-05", "amount": 15}], [{"date": "2024-03-02", "amount": 45}])
+    assert counts(storage).tolist() == np.bincount([30, 30, 90, 15]).tolist()
+    assert storage.histogram.total == storage.total == 4
+
+    storage.changeEntries([{"date": "2024-03-02", "amount": 45}], [{"date": "2024-03-05", "amount": 15}])  # Undone
+    assert counts(storage).tolist() == np.bincount([30, 45, 30, 90]).tolist()
+    assert counts(storage).tolist() == np.trim_zeros(MinuteHistogram([e["amount"] for e in storage.entries]).counts, 'b').tolist()
+
+
+def test_rebin():
+    histogram = MinuteHistogram([0, 5, 9, 10, 29])
+    edges, binned = histogram.rebin(10)
+    assert edges.tolist() == [0, 10, 20, 30]
+    assert binned.tolist() == [3, 1, 1]
+    assert histogram.defaultWidth(3) == 10
+
+
+def test_huge_amounts_are_capped():
+    histogram = MinuteHistogram([30, 10 ** 12])
+    assert len(histogram.counts) == MinuteHistogram.maxMinutes + 1
+    histogram.add([10 ** 15, 45])
+    assert len(histogram.counts) == MinuteHistogram.maxMinutes + 1
+    assert histogram.counts[MinuteHistogram.maxMinutes] == 2
+    histogram.remove([10 ** 12])
+    assert histogram.counts[MinuteHistogram.maxMinutes] == 1
+    assert histogram.total == 3
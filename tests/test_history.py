@@ -0,0 +1,41 @@
+from src.history import OTHistory
+from src.json_func import OTDStorage
+
+
+def newStorage(path) -> OTDStorage:
+    storage = OTDStorage(str(path))
+    storage.loadJson()
+    OTHistory(storage)
+    return storage
+
+
+def test_checkpoint_is_a_journal_position(tmp_path):
+    storage = newStorage(tmp_path / "ot.json")
+    storage.newEntry("2024-03-01", 30)
+    assert storage.history.checkpoint("before") == 1
+    storage.newEntry("2024-03-02", 45)  # In the same second as the checkpoint
+    storage.newEntries([{"date": "2024-03-01", "amount": 10}])
+
+    assert [entry["amount"] for entry in storage.history.asOf("before").entries] == [30]
+    assert storage.history.asOf("2999-01-01").entries == storage.entries
+
+    # The checkpoints are found again when the journal is read by another process
+    reloaded = newStorage(tmp_path / "ot.json")
+    assert [entry["amount"] for entry in reloaded.history.asOf("before").entries] == [30]
+    assert reloaded.history.log(3)[-1] == {"index": 1, "time": reloaded.history.changes[1]["time"], "checkpoint": "before"}
+
+
+def test_undo_and_redo(tmp_path):
+    storage = newStorage(tmp_path / "ot.json")
+    storage.newEntry("2024-03-01", 30)
+    storage.newEntry("2024-03-02", 45)
+    assert storage.history.undo()
+    assert [entry["amount"] for entry in storage.entries] == [30]
+    assert storage.history.redo()
+    assert [entry["amount"] for entry in storage.entries] == [30, 45]
+    assert not storage.history.redo()
+
+    reloaded = newStorage(tmp_path / "ot.json")
+    assert reloaded.entries == storage.entries
+    assert reloaded.history.undo()
+    assert [entry["amount"] for entry in reloaded.entries] == [30]
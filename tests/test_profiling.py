@@ -0,0 +1,27 @@
+import pytest
+
+from src.profiling import CallStats, percentile
+
+
+@pytest.mark.parametrize("values, q, expected", [
+    ([1, 2], 50, 1),
+    ([1, 2, 3, 4], 25, 1),
+    ([1, 2, 3, 4], 50, 2),
+    ([1, 2, 3, 4], 75, 3),
+    ([1, 2, 3, 4], 100, 4),
+    ([1, 2, 3, 4], 0, 1),
+    (list(range(1, 101)), 99, 99),
+    (list(range(1, 101)), 99.5, 100),
+    ([7], 90, 7),
+    ([], 50, 0.0),
+])
+def test_percentile_is_the_nearest_rank(values, q, expected):
+    assert percentile(values, q) == expected
+
+
+def test_call_stats_keep_a_bounded_sample():
+    stats = CallStats()
+    for duration in range(1, 20_001):
+        stats.add(duration)
+    assert (stats.calls, stats.total, stats.max) == (20_000, 20_000 * 20_001 // 2, 20_000)
+    assert len(stats.samples) == 10_000 and stats.samples[0] == 10_001
@@ -0,0 +1,42 @@
+from src.json_func import OTDStorage
+from src.punch_import import PunchImporter
+
+EXPORT = """date,name,arrive,lunch_out,lunch_in,leave
+2024-03-01,陳大文,08:00,12:30,13:30,18:00
+2024-03-01,李小明,08:00,12:30,13:30,18:00
+2024-03-01,李小明,08:00,12:30,13:30,18:00
+2024-03-02,陳大文,08:00,12:30,13:30,25:00
+2024-02-30,陳大文,08:00,12:30,13:30,18:00
+2024-03-03,陳大文,08:00,13:30,12:30,18:00
+2024-03-04,陳大文,22:00,23:00,23:30,07:00
+"""
+
+
+def ingest(tmp_path, storage: OTDStorage) -> dict:
+    filename = tmp_path / "punch.csv"
+    filename.write_text(EXPORT, encoding="utf-8")
+    return PunchImporter(storage, chunkSize=3, reason="加班").ingest(str(filename))
+
+
+def test_invalid_rows_are_skipped(tmp_path):
+    storage = OTDStorage(str(tmp_path / "ot.json"))
+    storage.loadJson()
+    summary = ingest(tmp_path, storage)
+    assert summary["rows"] == 6  # The repeated row is read once
+    assert summary["invalid"] == 3  # The time 25:00, the date 2024-02-30 and the negative lunch
+    assert summary["inserted"] == 3
+    assert storage.entries == [
+        {"date": "2024-03-01", "amount": 72, "reason": "加班", "person": "陳大文"},
+        {"date": "2024-03-01", "amount": 72, "reason": "加班", "person": "李小明"},
+        {"date": "2024-03-04", "amount": 12, "reason": "加班", "person": "陳大文"},
+    ]
+    assert all("by" not in entry for entry in storage.entries)  # "by" is who asked for the OT
+
+
+def test_importing_twice_adds_nothing(tmp_path):
+    storage = OTDStorage(str(tmp_path / "ot.json"))
+    storage.loadJson()
+    ingest(tmp_path, storage)
+    summary = ingest(tmp_path, storage)
+    assert (summary["inserted"], summary["existing"]) == (0, 3)
+    assert storage.total == 3
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from src.sdbucket import SDBucket
+
+
+def test_to_days():
+    dates = ["2024-02-29", "1999-12-31", "2000-02-29", "2024-01-05"]
+    assert SDBucket.toDays(dates).tolist() == np.asarray(dates, dtype="datetime64[D]").tolist()
+
+
+@pytest.mark.parametrize("dates", [["2024-01-0", "52024-01-05"], ["2024-02-30"], ["2023-02-29"], ["2024-13-01"],
+                                   ["2024/01/05"], ["2024-0a-05"]])
+def test_to_days_rejects_invalid_dates(dates):
+    with pytest.raises(ValueError):
+        SDBucket.toDays(dates)
+
+
+def test_to_minutes():
+    assert SDBucket.toMinutes(["00:00", "12:30", "23:59", "8:05"]).tolist() == [0, 750, 1439, 485]
+
+
+@pytest.mark.parametrize("times", [["12:3", "012:30"], ["25:00"], ["12:60"], ["12-30"], ["1a:30"]])
+def test_to_minutes_rejects_invalid_times(times):
+    with pytest.raises(ValueError):
+        SDBucket.toMinutes(times)
@@ -0,0 +1,72 @@
+from datetime import date, datetime
+
+import pytest
+
+from src.sdtime import DateRange, SDTime
+
+
+@pytest.fixture
+def clock():
+    """
+    A clock that the test can move, installed with SDTime.setClock.
+    """
+    now = {"today": date(2024, 3, 15)}
+    SDTime.setClock(lambda: now["today"])
+    yield now
+    SDTime.setClock()
+
+
+def test_date_range():
+    days = DateRange(date(2024, 2, 27), date(2024, 3, 2))
+    assert len(days) == 5  # 2024 is a leap year
+    assert "2024-02-29" in days and date(2024, 3, 2) in days and datetime(2024, 2, 27, 23, 59) in days
+    assert "2024-03-03" not in days and "2024-02-26" not in days
+    assert days[0] == date(2024, 2, 27) and days[-1] == date(2024, 3, 2) and days[-5] == date(2024, 2, 27)
+    with pytest.raises(IndexError):
+        days[5]
+    with pytest.raises(IndexError):
+        days[-6]
+    assert list(reversed(days)) == list(days)[::-1]
+    assert list(days.strings())[2] == "2024-02-29"
+    assert len(DateRange(date(2024, 3, 2), date(2024, 3, 1))) == 0
+    assert list(DateRange(date(2024, 3, 2), date(2024, 3, 1))) == []
+
+
+def test_ranges_follow_the_clock(clock):
+    assert SDTime.thisWeekRange() == DateRange(date(2024, 3, 11), date(2024, 3, 17))
+    assert SDTime.lastMonthRange() == DateRange(date(2024, 2, 1), date(2024, 2, 29))
+    assert SDTime.lastNDays(3) == ["2024-03-15", "2024-03-14", "2024-03-13"]
+
+    # The memoized ranges are built again when the day changes
+    clock["today"] = date(2024, 3, 18)
+    assert SDTime.thisWeekRange() == DateRange(date(2024, 3, 18), date(2024, 3, 24))
+    assert SDTime.lastNDays(1) == ["2024-03-18"]
+    assert SDTime.periodBounds("last-week") == ("2024-03-11", "2024-03-17")
+
+
+def test_month_and_year_edges(clock):
+    clock["today"] = date(2024, 1, 31)
+    assert SDTime.lastMonthRange() == DateRange(date(2023, 12, 1), date(2023, 12, 31))
+    assert SDTime.lastNMonthsRange(3) == DateRange(date(2023, 10, 1), date(2023, 12, 31))
+    assert SDTime.lastNMonthsRange(13) == DateRange(date(2022, 12, 1), date(2023, 12, 31))
+    assert SDTime.thisMonthEnd() == "2024-01-31"
+
+    clock["today"] = date(2024, 3, 1)
+    assert SDTime.lastMonthEnd() == "2024-02-29"
+    assert SDTime.addMonths(date(2024, 12, 31), 1) == date(2025, 1, 1)
+    assert SDTime.addMonths(date(2024, 1, 15), -1) == date(2023, 12, 1)
+    assert SDTime.addMonths(date(2024, 1, 15), -25) == date(2021, 12, 1)
+
+
+def test_diff_time():
+    assert SDTime.diffTime("08:10", "16:58") == 528
+    assert SDTime.diffTime("8:10", "16:58", isStr=True) == "8:48"
+    # The end before the start is negative, or on the next day with overnight
+    assert SDTime.diffTime("22:00", "06:30") == -930
+    assert SDTime.diffTime("22:00", "06:30", isStr=True) == "-15:30"
+    assert SDTime.diffTime("22:00", "06:30", overnight=True) == 510
+    assert SDTime.diffTime("22:00", "22:00", overnight=True) == 0
+    assert SDTime.diffTimes(["22:00", "08:00"], ["06:30", "17:00"]).tolist() == [-930, 540]
+    assert SDTime.diffTimes(["22:00", "08:00"], ["06:30", "17:00"], overnight=True).tolist() == [510, 540]
+    with pytest.raises(ValueError):
+        SDTime.diffTime("24:00", "08:00")
@@ -0,0 +1,71 @@
+from src.json_func import OTDStorage
+from src.search import SearchIndex
+
+
+def newStorage(path, entries) -> OTDStorage:
+    storage = OTDStorage(str(path))
+    storage.loadJson()
+    storage.newEntries(entries)
+    return storage
+
+
+ENTRIES = [
+    {"date": "2024-03-01", "amount": 30, "reason": "開會 meeting", "by": "校長"},
+    {"date": "2024-03-02", "amount": 45, "reason": "改簿", "by": "主任"},
+]
+
+
+def test_punctuation_only_query_matches_nothing(tmp_path):
+    index = newStorage(tmp_path / "ot.json", ENTRIES).searchIndex
+    assert index.search("!!!")["count"] == 0
+    assert index.search("meeting!")["count"] == 1
+    assert index.search("  ")["count"] == 2  # No query at all
+
+
+def test_saved_index_is_only_loaded_for_the_same_entries(tmp_path):
+    storage = newStorage(tmp_path / "ot.json", ENTRIES)
+    storage.searchIndex  # Built and saved
+    assert SearchIndex.load(storage.searchIndexFile, storage) is not None
+
+    # A change in the same second, with the same number of entries, is still told apart
+    changed = OTDStorage(storage.filename)
+    changed.loadJson()
+    changed.data["entries"][1] = dict(changed.entries[1], reason="批改")
+    assert changed.last_updated == storage.last_updated and changed.total == storage.total
+    assert SearchIndex.load(storage.searchIndexFile, changed) is None
+    assert changed.search("批改")["count"] == 1
+
+
+def test_index_kept_up_to_date_is_saved(tmp_path):
+    storage = newStorage(tmp_path / "ot.json", ENTRIES)
+    storage.searchIndex
+    storage.newEntry("2024-03-03", 15, "開會", "主任")
+    storage.saveSearchIndex()
+
+    reloaded = OTDStorage(storage.filename)
+    reloaded.loadJson()
+    index = SearchIndex.load(reloaded.searchIndexFile, reloaded)
+    assert index is not None
+    assert index.search("開會")["count"] == 2
+
+
+def test_snapshot_is_not_affected_by_new_entries(tmp_path):
+    storage = newStorage(tmp_path / "ot.json", ENTRIES)
+    snapshot = storage.searchIndex.snapshot()
+    storage.newEntries([{"date": "2024-03-03", "amount": 15, "reason": "開會", "by": "主任"}] * 3)
+    assert snapshot.search("開會")["count"] == 1
+    assert snapshot.search("主", prefix=True)["total_minutes"] == 45
+    assert storage.searchIndex.search("開會")["count"] == 4
+
+
+def test_index_of_a_copy_is_only_adopted_for_the_same_data(tmp_path):
+    storage = newStorage(tmp_path / "ot.json", ENTRIES)
+    copy = storage.copy()
+    assert storage.adoptSearchIndex(copy.searchIndex, copy.version)
+    assert storage.searchIndexLoaded
+
+    storage = newStorage(tmp_path / "other.json", ENTRIES)
+    copy = storage.copy()
+    storage.newEntry("2024-03-03", 15)
+    assert not storage.adoptSearchIndex(copy.searchIndex, copy.version)
+    assert not storage.searchIndexLoaded
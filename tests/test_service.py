@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+from src.json_func import OTDStorage
+from src.service import OTService
+
+
+async def request(port: int, method: str, target: str, document=None) -> tuple[int, object]:
+    """
+    Send one request on a new connection. Returns the status and the JSON document of the answer.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if document is None else json.dumps(document).encode("utf-8")
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+                 f"Connection: close\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    payload = await reader.read()
+    writer.close()
+    return int(head.split(" ", 2)[1]), json.loads(payload)
+
+
+def serve(tmp_path, scenario):
+    """
+    Run a scenario (given the service and its port) against a service on a new storage, then close the service.
+    """
+    storage = OTDStorage(str(tmp_path / "ot.json"))
+    storage.loadJson()
+
+    async def run():
+        service = OTService(storage, commitDelay=0.02)
+        server = await service.serve("127.0.0.1", 0)
+        try:
+            return await scenario(service, server.sockets[0].getsockname()[1])
+        finally:
+            server.close()
+            await service.close()
+
+    return storage, asyncio.run(run())
+
+
+def test_concurrent_inserts_are_grouped(tmp_path):
+    async def scenario(service, port):
+        answers = await asyncio.gather(*(request(port, "POST", "/entries", {"date": f"2024-03-{day:02}", "amount": day})
+                                         for day in range(1, 21)))
+        assert answers == [(201, {"inserted": 1})] * 20
+        status, health = await request(port, "GET", "/health")
+        assert status == 200 and health["entries"] == 20
+        assert health["saves"] < 20
+        return await request(port, "GET", "/range?start=2024-03-01&end=2024-03-10")
+
+    storage, (status, summary) = serve(tmp_path, scenario)
+    assert status == 200
+    assert (summary["total"], summary["total_length"]) == (10, 55)
+    saved = OTDStorage(storage.filename)
+    saved.loadJson()
+    assert saved.entries == storage.entries
+    assert [entry["date"] for entry in saved.entries] == sorted(entry["date"] for entry in saved.entries)
+
+
+def test_invalid_requests(tmp_path):
+    async def scenario(service, port):
+        return [
+            await request(port, "POST", "/entries", {"date": "2024-02-30", "amount": 30}),
+            await request(port, "POST", "/entries", {"date": "2024-5-3", "amount": 30}),
+            await request(port, "POST", "/entries", {"date": "2024-05-03", "amount": "many"}),
+            await request(port, "POST", "/entries", {"amount": 30}),
+            await request(port, "POST", "/entries/batch", {"entries": [{"date": "2024-05-03", "amount": 30},
+                                                                       {"date": 20240504, "amount": 30}]}),
+            await request(port, "GET", "/range?start=2024-13-01&end=2024-12-31"),
+            await request(port, "GET", "/range?period=someday"),
+            await request(port, "GET", "/nowhere"),
+        ]
+
+    storage, answers = serve(tmp_path, scenario)
+    assert [status for status, _ in answers] == [422, 422, 422, 422, 422, 400, 400, 404]
+    assert storage.entries == []  # A request with an invalid entry adds nothing
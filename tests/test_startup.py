@@ -0,0 +1,42 @@
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from benchmarks.startup import LAZY_MODULES, environment, firstWindow
+
+# The budget of benchmarks/startup.py, the time to the first window on a slow machine can be given with the variable
+BUDGET_MS = float(os.environ.get("OT_STARTUP_BUDGET_MS", 1500))
+
+PLATFORM = os.environ.get("QT_QPA_PLATFORM", "")
+if not PLATFORM and not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+    pytest.skip("no display (set QT_QPA_PLATFORM=offscreen to run without one)", allow_module_level=True)
+
+# Import app.py and show its window as __main__ does, then tell which of the lazy modules are loaded
+SHOW_WINDOW = f"""
+import sys
+from PySide6.QtWidgets import QApplication
+import app
+qt = QApplication(sys.argv)
+window = app.OTGUI()
+window.show()
+qt.processEvents()
+print(" ".join(module for module in {LAZY_MODULES!r} if module in sys.modules))
+"""
+
+
+def test_graph_libraries_are_not_imported_at_startup():
+    with tempfile.TemporaryDirectory() as cwd:
+        result = subprocess.run([sys.executable, "-c", SHOW_WINDOW], cwd=cwd, env=environment(PLATFORM),
+                                capture_output=True, text=True, timeout=60, check=True)
+    assert result.stdout.split() == []
+
+
+def test_first_window_is_within_the_budget():
+    window = statistics.median(firstWindow(PLATFORM)[0] for _ in range(3))
+    assert window <= BUDGET_MS
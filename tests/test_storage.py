@@ -0,0 +1,28 @@
+import pytest
+
+from src.json_func import OTDStorage
+
+
+def newStorage(path) -> OTDStorage:
+    storage = OTDStorage(str(path))
+    storage.loadJson()
+    return storage
+
+
+@pytest.mark.parametrize("date", ["2024-5-3", "2024-02-30", "2024-W01-1", "20240503", "2024-05-03T10:00", None])
+def test_invalid_dates_are_rejected(tmp_path, date):
+    storage = newStorage(tmp_path / "ot.json")
+    with pytest.raises(ValueError):
+        storage.newEntry(date, 30)
+    with pytest.raises(ValueError):
+        storage.newEntries([{"date": "2024-05-02", "amount": 10}, {"date": date, "amount": 30}])
+    assert storage.entries == []  # Nothing of a rejected batch is added
+    assert newStorage(tmp_path / "ot.json").total == 0
+
+
+def test_valid_dates_are_added_sorted(tmp_path):
+    storage = newStorage(tmp_path / "ot.json")
+    storage.newEntries([{"date": "2024-02-29", "amount": "30"}, {"date": "2024-01-31", "amount": 10}])
+    storage.newEntry("2024-02-01", 5)
+    assert [entry["date"] for entry in storage.entries] == ["2024-01-31", "2024-02-01", "2024-02-29"]
+    assert newStorage(tmp_path / "ot.json").entries == storage.entries
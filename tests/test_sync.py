@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from src.json_func import OTDStorage
+from src.sync import DirectoryRemote, OTDSync
+
+
+def newStorage(path, entries) -> OTDStorage:
+    storage = OTDStorage(str(path))
+    storage.loadJson()
+    storage.newEntries(entries)
+    return storage
+
+
+def test_two_copies_converge(tmp_path):
+    remote = DirectoryRemote(str(tmp_path / "remote"))
+    a = newStorage(tmp_path / "a.json", [{"date": "2024-01-05", "amount": 30}, {"date": "2024-02-01", "amount": 10}])
+    b = newStorage(tmp_path / "b.json", [{"date": "2024-02-01", "amount": 10}, {"date": "2024-03-09", "amount": 45, "by": "校長"}])
+
+    assert OTDSync(a, remote).sync() == ["2024-01", "2024-02"]
+    assert OTDSync(b, remote).sync() == ["2024-01", "2024-03"]
+    assert OTDSync(a, remote).sync() == ["2024-03"]
+    assert a.entries == b.entries
+    assert [entry["date"] for entry in a.entries] == ["2024-01-05", "2024-02-01", "2024-03-09"]
+
+    # In sync: only the manifest is read
+    assert OTDSync(a, remote).sync() == []
+    assert OTDSync(b, remote).sync() == []
+
+
+def test_corrupt_remote_month_is_rejected(tmp_path):
+    remote = DirectoryRemote(str(tmp_path / "remote"))
+    OTDSync(newStorage(tmp_path / "a.json", [{"date": "2024-01-05", "amount": 30}]), remote).sync()
+    with open(os.path.join(remote.monthDir, "2024-01.json"), 'w') as f:
+        f.write('[{"date": "2024-01-05", "amount": 300}]')
+
+    b = newStorage(tmp_path / "b.json", [{"date": "2024-02-01", "amount": 10}])
+    with pytest.raises(ValueError):
+        OTDSync(b, remote).sync()
+    assert b.entries == [{"date": "2024-02-01", "amount": 10}]
+
+
+def test_sync_only_adds(tmp_path):
+    remote = DirectoryRemote(str(tmp_path / "remote"))
+    a = newStorage(tmp_path / "a.json", [{"date": "2024-01-05", "amount": 30}, {"date": "2024-01-06", "amount": 20}])
+    OTDSync(a, remote).sync()
+
+    # An entry removed on one side only comes back from the other side
+    a.replaceMonth("2024-01", [{"date": "2024-01-05", "amount": 30}])
+    OTDSync(a, remote).sync()
+    assert len(a.entries) == 2
+
+
+def test_invalid_remote_entry_is_rejected(tmp_path):
+    remote = DirectoryRemote(str(tmp_path / "remote"))
+    OTDSync(newStorage(tmp_path / "a.json", [{"date": "2024-01-05", "amount": 30}]), remote).sync()
+    for month, entries in (("2024-01", [{"date": "2024-01-32", "amount": 30}]),
+                           ("2024-01", [{"date": "2024-02-01", "amount": 30}]),
+                           ("2024-01", [{"date": "2024-01-05"}])):
+        remote.pushMonth(month, entries)
+        remote.writeManifest({month: OTDSync.monthHash(entries)})  # A consistent but bad copy
+
+        b = newStorage(tmp_path / "b.json", [])
+        with pytest.raises(ValueError):
+            OTDSync(b, remote).sync()
+        assert b.entries == []
+    assert not os.path.exists(remote.manifestFile + ".tmp")
+
+
+def test_only_changed_months_are_hashed(tmp_path, monkeypatch):
+    remote = DirectoryRemote(str(tmp_path / "remote"))
+    hashed = []
+    monthHash = OTDSync.monthHash.__func__
+    monkeypatch.setattr(OTDSync, "monthHash", classmethod(lambda cls, entries: hashed.append(entries[0]["date"][:7]) or monthHash(cls, entries)))
+    a = newStorage(tmp_path / "a.json", [{"date": f"2024-{month:02}-01", "amount": 10} for month in range(1, 13)])
+    OTDSync(a, remote).sync()
+
+    hashed.clear()
+    assert OTDSync(a, remote).sync() == []
+    assert hashed == []
+
+    a.newEntry("2024-03-09", 5)
+    a.changeEntries([], [{"date": "2024-07-01", "amount": 10}])
+    assert OTDSync(a, remote).sync() == ["2024-03", "2024-07"]
+    assert sorted(set(hashed)) == ["2024-03", "2024-07"]
+    assert a.monthHashes(OTDSync.monthHash) == remote.monthHashes()
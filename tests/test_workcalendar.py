@@ -0,0 +1,47 @@
+import json
+from datetime import date, timedelta
+
+from src.workcalendar import WorkCalendar
+
+HOLIDAYS = ["2023-12-25", "2023-12-26", "2024-01-01", "2024-02-10", "2024-02-12", "2024-12-25", "2025-01-01"]
+WORKDAYS = ["2024-02-17"]  # A Saturday that is worked
+
+
+def bruteForce(calendar: WorkCalendar, start: date, end: date) -> int:
+    count = 0
+    while start <= end:
+        holiday = start.isoformat() in HOLIDAYS
+        weekend = start.weekday() >= 5 and start.isoformat() not in WORKDAYS
+        count += not holiday and not weekend
+        start += timedelta(days=1)
+    return count
+
+
+def test_working_days_across_years():
+    calendar = WorkCalendar(HOLIDAYS, WORKDAYS)
+    for start, end in ((date(2023, 12, 20), date(2024, 1, 5)),
+                       (date(2023, 1, 1), date(2025, 12, 31)),
+                       (date(2024, 12, 31), date(2025, 1, 1)),
+                       (date(2024, 2, 10), date(2024, 2, 18)),
+                       (date(2024, 2, 29), date(2024, 2, 29))):
+        assert calendar.workingDaysBetween(start, end) == bruteForce(calendar, start, end), (start, end)
+    assert calendar.workingDaysBetween("2024-01-05", "2024-01-04") == 0
+    assert calendar.workingDaysInYear(2024) == bruteForce(calendar, date(2024, 1, 1), date(2024, 12, 31))
+
+
+def test_holidays_and_workdays():
+    calendar = WorkCalendar(HOLIDAYS, WORKDAYS)
+    assert not calendar.isWorkingDay("2024-01-01")  # A holiday on a Monday
+    assert calendar.isWorkingDay("2024-01-02")
+    assert not calendar.isWorkingDay("2024-02-18")  # A Sunday
+    assert calendar.isWorkingDay("2024-02-17")  # A worked Saturday
+    assert calendar.isWorkingDay("2024-12-31")  # The last day of a leap year
+
+
+def test_from_file(tmp_path):
+    filename = tmp_path / "holidays.json"
+    filename.write_text(json.dumps({"holidays": HOLIDAYS, "workdays": WORKDAYS}))
+    assert WorkCalendar.fromFile(str(filename)).workingDaysBetween("2024-02-10", "2024-02-18") == 5
+    filename.write_text(json.dumps(HOLIDAYS))
+    assert WorkCalendar.fromFile(str(filename)).workingDaysBetween("2024-02-10", "2024-02-18") == 4
+    assert WorkCalendar.fromFile(str(tmp_path / "missing.json")).workingDaysBetween("2024-01-01", "2024-01-07") == 5